@@ -0,0 +1,71 @@
+"""
+Accounts Authentication - JWT request users from token claims
+MVVM: ViewModel Layer
+
+simplejwt's `JWTAuthentication` reads the user row on every request, although
+most storefront views only need `request.user.id`. `ClaimsJWTAuthentication`
+returns a `ClaimsUser` holding only the id from the token, every other field
+deferred, so the row is read the first time a view touches anything else.
+The other claims (email, name, roles) aren't copied: they are as old as the
+token, and a view that saves the user would write them back. It is still a
+`User` instance, so `filter(user=request.user)` and FK assignment work as
+before.
+
+Deactivation is still honoured: whether the user exists and is active is
+cached for `ACCOUNT_ACTIVE_CACHE_SECONDS` and dropped whenever the user is
+saved or deleted.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser, User
+
+def get_auth_settings():
+    return {
+        'active_cache_seconds': getattr(settings, 'ACCOUNT_ACTIVE_CACHE_SECONDS', 60),
+    }
+
+
+def _active_key(user_id):
+    return f'accounts:active:{user_id}'
+
+
+def is_active(user_id):
+    """True if the user exists and is active, from cache when possible."""
+    key = _active_key(user_id)
+    active = cache.get(key)
+    if active is None:
+        active = User.objects.filter(pk=user_id).values_list('is_active', flat=True).first() or False
+        cache.set(key, active, get_auth_settings()['active_cache_seconds'])
+    return active
+
+
+def forget_active(user_id):
+    transaction.on_commit(lambda: cache.delete(_active_key(user_id)))
+
+
+def claims_user(user_id):
+    return ClaimsUser.from_db(User.objects.db, ['id'], [user_id])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication whose request user is the token's user id, not read from the database."""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)  # Needs the password hash
+        try:
+            user_id = uuid.UUID(str(validated_token[api_settings.USER_ID_CLAIM]))
+        except (KeyError, ValueError) as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        if not is_active(user_id):
+            raise AuthenticationFailed(_('User not found or inactive'), code='user_inactive')
+        return claims_user(user_id)
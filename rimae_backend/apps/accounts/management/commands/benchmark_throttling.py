@@ -0,0 +1,61 @@
+"""
+Benchmark the sliding-window throttle (config/throttling.py) against the
+configured throttle cache: checks for one scope spread over a number of
+anonymous clients, each with its own address in the 198.18.0.0/15
+benchmarking range. The counters they leave expire within two windows.
+
+    python manage.py benchmark_throttling
+    python manage.py benchmark_throttling --scope login --checks 50000 --clients 500
+"""
+import ipaddress
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from config.throttling import SlidingWindowThrottle, get_throttle_settings
+
+BENCHMARK_NETWORK = ipaddress.ip_network('198.18.0.0/15')
+
+
+class Command(BaseCommand):
+    help = 'Measure the latency of throttle checks and how many were throttled.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scope', default='default', help='A THROTTLE_SCOPES key')
+        parser.add_argument('--checks', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=100)
+
+    def handle(self, *args, **options):
+        costs = get_throttle_settings()['scopes'].get(options['scope'])
+        if not costs:
+            raise CommandError(f"Scope '{options['scope']}' has no policies in THROTTLE_SCOPES")
+
+        view = type('BenchmarkView', (), {'throttle_scope': options['scope']})()
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = Request(factory.get('/', REMOTE_ADDR=str(BENCHMARK_NETWORK[i + 1])))
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        throttled = 0
+        slowest = 0.0
+        start = time.perf_counter()
+        for i in range(options['checks']):
+            began = time.perf_counter()
+            if not SlidingWindowThrottle().allow_request(requests[i % len(requests)], view):
+                throttled += 1
+            slowest = max(slowest, time.perf_counter() - began)
+        elapsed = time.perf_counter() - start
+
+        per_check = elapsed / options['checks'] * 1000
+        self.stdout.write(
+            f"{options['checks']} checks over {options['clients']} clients in {elapsed:.2f}s: "
+            f"{per_check:.3f} ms each, slowest {slowest * 1000:.3f} ms, {throttled} throttled, "
+            f"{options['clients'] * len(costs) * 2} counters at most"
+        )
+        style = self.style.SUCCESS if per_check < 1 else self.style.WARNING
+        self.stdout.write(style(f'Average check: {per_check:.3f} ms'))
@@ -0,0 +1,71 @@
+"""
+Benchmark refresh-token rotation through the cache blacklist: chains of
+refreshes as clients would make them (each new refresh token is used for
+the next call), then a replay of every rotated token, which must all be
+rejected. The user is created in a transaction that is rolled back; the
+revoked jtis expire from the cache on their own.
+
+    python manage.py benchmark_token_refresh
+    python manage.py benchmark_token_refresh --refreshes 20000 --chains 50
+"""
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.models import User
+from apps.accounts.serializers import RotatingTokenRefreshSerializer
+
+
+def _accepted(token):
+    try:
+        return RotatingTokenRefreshSerializer(data={'refresh': token}).is_valid()
+    except (InvalidToken, TokenError):
+        return False
+
+
+class Command(BaseCommand):
+    help = 'Measure token refreshes per second, queries per refresh and replay rejection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refreshes', type=int, default=5000)
+        parser.add_argument('--chains', type=int, default=10, help='Independent sessions refreshed in turn')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}', email='bench@example.com')
+            current = [str(RefreshToken.for_user(user)) for _ in range(options['chains'])]
+            rotated = []
+
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                for i in range(options['refreshes']):
+                    chain = i % len(current)
+                    serializer = RotatingTokenRefreshSerializer(data={'refresh': current[chain]})
+                    serializer.is_valid(raise_exception=True)
+                    rotated.append(current[chain])
+                    current[chain] = serializer.validated_data['refresh']
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"rotation: {options['refreshes']} refreshes in {elapsed:.2f}s "
+                f"({options['refreshes'] / elapsed:,.0f}/s, {elapsed / options['refreshes'] * 1000:.3f} ms each, "
+                f"{len(captured)} queries total)"
+            )
+
+            start = time.perf_counter()
+            rejected = sum(not _accepted(token) for token in rotated)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'replay: {rejected}/{len(rotated)} rotated tokens rejected in {elapsed:.2f}s '
+                f'({len(rotated) / elapsed:,.0f}/s)'
+            )
+            transaction.set_rollback(True)
+
+        if rejected == len(rotated):
+            self.stdout.write(self.style.SUCCESS('Every rotated token was rejected'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{len(rotated) - rejected} rotated token(s) were accepted again'))
@@ -33,6 +33,23 @@ class User(AbstractUser):
         ordering = ['-created_at']
 
 
+class ClaimsUser(User):
+    """
+    The request user built from the access token's user id
+    (accounts/authentication.py). Every other field is deferred; touching any
+    of them loads the rest of the row in one query.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields)
+
+
 class UserRole(models.Model):
     """Role-based access control - SEPARATE from User for security."""
     ROLE_CHOICES = [
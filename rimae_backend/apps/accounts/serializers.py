@@ -2,8 +2,14 @@
 Accounts Serializers - Data transformation
 MVVM: ViewModel Layer
 """
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from . import tokens
+from .authentication import is_active
 from .models import User, UserRole, Address
 
 
@@ -59,6 +65,50 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
 
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh with rotation against the cache blacklist (accounts/tokens.py):
+    the presented token is checked and revoked in one atomic cache call,
+    and the user's active flag comes from the short-lived auth cache
+    instead of a user query.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            blacklisted = not tokens.revoke(refresh)  # Already revoked: a reused token
+        else:
+            blacklisted = tokens.is_revoked(refresh)
+        if blacklisted:
+            raise InvalidToken(_('Token is blacklisted'))
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id and not is_active(user_id):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Revokes the given refresh token."""
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(str(e))
+
+    def save(self):
+        tokens.revoke(self.validated_data['refresh'])
+
+
 class AddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
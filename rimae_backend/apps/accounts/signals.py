@@ -0,0 +1,17 @@
+"""
+Accounts signals - drop the cached active flag when a user changes
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .authentication import forget_active
+from .models import ClaimsUser, User
+
+
+def user_changed(sender, instance, **kwargs):
+    forget_active(instance.pk)
+
+
+# ClaimsUser is the request user, so profile updates are sent from the proxy
+for model in (User, ClaimsUser):
+    post_save.connect(user_changed, sender=model, dispatch_uid=f'active_save_{model.__name__}')
+    post_delete.connect(user_changed, sender=model, dispatch_uid=f'active_delete_{model.__name__}')
@@ -0,0 +1,45 @@
+"""
+Accounts Tokens - Cache-backed refresh-token blacklist
+MVVM: Service Layer
+
+Rotated and logged-out refresh tokens are revoked by jti in the shared
+cache, each key expiring when the token itself would have, so the
+blacklist only ever holds tokens that could still be presented and never
+needs purging. Revoking is an atomic `cache.add`: a refresh checks and
+revokes the presented token in one round trip, and of two concurrent
+refreshes with the same token only one succeeds.
+
+The cache (`TOKEN_BLACKLIST_CACHE` alias) must be shared between workers
+for revocations to be seen everywhere, and must not evict keys before
+their TTL: an evicted jti is a revoked token accepted again. Use Redis
+with a non-evicting policy, or a dedicated alias for it.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+REVOKED_KEY = 'accounts:revoked:{jti}'
+
+
+def _cache():
+    return caches[getattr(settings, 'TOKEN_BLACKLIST_CACHE', 'default')]
+
+
+def _key(token):
+    return REVOKED_KEY.format(jti=token.payload[api_settings.JTI_CLAIM])
+
+
+def revoke(token):
+    """
+    Blacklist `token` until it expires. Returns False if it was already
+    revoked (or has expired), True if this call revoked it.
+    """
+    remaining = int(token.payload['exp'] - timezone.now().timestamp())
+    if remaining <= 0:
+        return False
+    return _cache().add(_key(token), 1, remaining)
+
+
+def is_revoked(token):
+    return _cache().get(_key(token)) is not None
@@ -4,7 +4,7 @@ Accounts URL Configuration
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
-    RegisterView, CustomTokenObtainPairView, ProfileView,
+    RegisterView, CustomTokenObtainPairView, LogoutView, ProfileView,
     AddressListCreateView, AddressDetailView,
     CustomerListView, CustomerDetailView, CustomerActivityView
 )
@@ -14,6 +14,7 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     
     # User profile
     path('profile/', ProfileView.as_view(), name='profile'),
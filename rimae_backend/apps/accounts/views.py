@@ -7,11 +7,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.db.models import Count, Sum
+from config.projections import Projection, ProjectedListMixin, Related
 from .models import User, UserRole, Address
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, 
     CustomTokenObtainPairSerializer, AddressSerializer,
-    CustomerListSerializer
+    CustomerListSerializer, LogoutSerializer
 )
 
 
@@ -25,6 +26,18 @@ class RegisterView(generics.CreateAPIView):
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Login with JWT tokens."""
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'login'
+
+
+class LogoutView(APIView):
+    """Revoke a refresh token (see accounts/tokens.py)."""
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_205_RESET_CONTENT)
 
 
 class ProfileView(generics.RetrieveUpdateAPIView):
@@ -68,13 +81,14 @@ class IsAdmin(permissions.BasePermission):
         return UserRole.objects.filter(user=request.user, role='admin').exists()
 
 
-class CustomerListView(generics.ListAPIView):
+class CustomerListView(ProjectedListMixin, generics.ListAPIView):
     """Admin: List all customers with stats."""
     serializer_class = CustomerListSerializer
     permission_classes = [IsAdmin]
     filterset_fields = ['is_active', 'city', 'state']
     search_fields = ['email', 'first_name', 'last_name', 'phone']
     ordering_fields = ['created_at', 'total_orders', 'total_spent']
+    projection = Projection(computed={'roles': Related('roles', 'role')})
     
     def get_queryset(self):
         return User.objects.annotate(
@@ -103,7 +117,8 @@ class CustomerActivityView(APIView):
         from apps.reviews.models import Review
         from apps.products.models import ProductView
         
-        recent_views = ProductView.objects.filter(user=user).order_by('-viewed_at')[:10]
+        recent_views = (ProductView.objects.filter(user=user).select_related('product')
+                        .only('product', 'product__name', 'viewed_at').order_by('-viewed_at')[:10])
         recent_reviews = Review.objects.filter(user=user).order_by('-created_at')[:10]
         
         return Response({
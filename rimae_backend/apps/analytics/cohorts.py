@@ -0,0 +1,194 @@
+"""
+Analytics Cohorts - Retention, repeat purchase and order-gap statistics
+MVVM: Service Layer
+
+Customers' orders are streamed once, sorted by (user, created_at), as
+(user_id, created_at, month, total_amount), and every statistic below is a
+whole-array NumPy operation over them:
+
+- cohort retention: customers grouped by the month of their first order;
+  for each cohort, the share still ordering N months later, and the
+  cumulative revenue per cohort customer by month N
+- repeat purchase: share of customers with 2+ orders, overall and per
+  cohort, and the distribution of orders per customer
+- time between orders: consecutive-order gaps per customer, as a
+  histogram and percentiles, plus the days from first to second order
+
+The result is cached under a version built from the most recently changed
+order, so requests are a cache read until orders change, and at most
+`COHORT_ANALYTICS_CACHE_SECONDS` stale for changes made with queryset
+updates (which don't touch updated_at).
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.orders.models import Order
+
+# Orders that never turned into a purchase
+EXCLUDED_ORDER_STATUSES = ('cancelled',)
+CACHE_KEY = 'analytics:cohorts:{version}'
+SECONDS_PER_DAY = 86400
+
+
+def get_cohort_settings():
+    return {
+        'max_months': getattr(settings, 'COHORT_ANALYTICS_MAX_MONTHS', 24),  # Cohorts and offsets reported
+        'gap_bins_days': getattr(settings, 'COHORT_ANALYTICS_GAP_BINS_DAYS', [0, 7, 14, 30, 60, 90, 180, 365]),
+        'chunk_size': getattr(settings, 'COHORT_ANALYTICS_CHUNK_SIZE', 20000),
+        'cache_seconds': getattr(settings, 'COHORT_ANALYTICS_CACHE_SECONDS', 6 * 3600),
+    }
+
+
+def month_index(value):
+    return value.year * 12 + value.month - 1
+
+
+def month_label(index):
+    return f'{index // 12:04d}-{index % 12 + 1:02d}'
+
+
+# ============ LOADING ============
+
+def load_orders(chunk_size=20000):
+    """
+    (user codes, epoch seconds, month indexes, amounts) as arrays, sorted by
+    user then time. User codes are 0..n-1 in the order users appear.
+    """
+    rows = Order.objects.filter(user__isnull=False).exclude(status__in=EXCLUDED_ORDER_STATUSES).annotate(
+        month=TruncMonth('created_at'),
+    ).order_by('user_id', 'created_at').values_list('user_id', 'created_at', 'month', 'total_amount')
+
+    users, times, months, amounts = [], [], [], []
+    code, last = -1, None
+    for user_id, created_at, month, total in rows.iterator(chunk_size=chunk_size):
+        if user_id != last:
+            code, last = code + 1, user_id
+        users.append(code)
+        times.append(created_at.timestamp())
+        months.append(month_index(month))
+        amounts.append(total)
+    return (
+        np.array(users, dtype=np.int64),
+        np.array(times, dtype=np.float64),
+        np.array(months, dtype=np.int64),
+        np.array(amounts, dtype=np.float64),
+    )
+
+
+# ============ STATISTICS ============
+
+def _percentiles(values, qs=(50, 75, 90)):
+    if not len(values):
+        return {f'p{q}': None for q in qs}
+    return {f'p{q}': round(float(v), 1) for q, v in zip(qs, np.percentile(values, qs))}
+
+
+def _histogram(values, bins):
+    edges = np.array(list(bins) + [np.inf])
+    counts, _ = np.histogram(values, bins=edges)
+    return [
+        {'min_days': int(lo), 'max_days': None if np.isinf(hi) else int(hi), 'orders': int(n)}
+        for lo, hi, n in zip(edges[:-1], edges[1:], counts)
+    ]
+
+
+def compute(users, times, months, amounts, current_month, config):
+    """Cohort matrices and order statistics from the arrays `load_orders` returns."""
+    if not len(users):
+        return {'customers': 0, 'orders': 0, 'cohorts': [], 'repeat_purchase': None, 'time_between_orders': None}
+
+    max_months = config['max_months']
+    first = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])  # Each user's first order
+    orders_per_user = np.diff(np.r_[first, len(users)])
+    cohort_month = months[first]
+    offsets = months - cohort_month[users]
+
+    # Cohort x months-since-first-order, for the latest `max_months` cohorts
+    oldest = max(cohort_month.min(), current_month - max_months + 1)
+    n_cohorts = current_month - oldest + 1
+    in_range = (cohort_month[users] >= oldest) & (offsets < max_months)
+    row = cohort_month[users][in_range] - oldest
+    col = offsets[in_range]
+
+    revenue = np.zeros((n_cohorts, max_months))
+    np.add.at(revenue, (row, col), amounts[in_range])
+    # A customer counts once per month however many orders they placed
+    active_keys = np.unique(users[in_range] * max_months + col)
+    active = np.zeros((n_cohorts, max_months), dtype=np.int64)
+    np.add.at(active, (cohort_month[active_keys // max_months] - oldest, active_keys % max_months), 1)
+
+    sizes = active[:, 0]
+    reported = cohort_month >= oldest
+    repeaters = np.bincount(cohort_month[reported] - oldest, weights=orders_per_user[reported] >= 2,
+                            minlength=n_cohorts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        retention = active / sizes[:, None]
+        ltv = np.cumsum(revenue, axis=1) / sizes[:, None]
+
+    cohorts = []
+    for i in range(n_cohorts):
+        if not sizes[i]:
+            continue
+        observed = current_month - (oldest + i) + 1  # Months that have started for this cohort
+        cohorts.append({
+            'cohort': month_label(oldest + i),
+            'customers': int(sizes[i]),
+            'repeat_rate': round(float(repeaters[i] / sizes[i]), 4),
+            'retention': [round(float(v), 4) for v in retention[i, :observed]],
+            'active_customers': [int(v) for v in active[i, :observed]],
+            'revenue_per_customer': [round(float(v), 2) for v in ltv[i, :observed]],
+        })
+
+    # Gaps between consecutive orders of the same customer
+    same_user = users[1:] == users[:-1]
+    gaps = np.diff(times)[same_user] / SECONDS_PER_DAY
+    second = first[orders_per_user >= 2] + 1
+    to_second = (times[second] - times[second - 1]) / SECONDS_PER_DAY
+
+    counts = np.bincount(np.minimum(orders_per_user, 5))
+    return {
+        'customers': int(len(first)),
+        'orders': int(len(users)),
+        'cohorts': cohorts,
+        'repeat_purchase': {
+            'rate': round(float((orders_per_user >= 2).mean()), 4),
+            'repeat_customers': int((orders_per_user >= 2).sum()),
+            'orders_per_customer': {
+                ('5+' if n == 5 else str(n)): int(counts[n]) for n in range(1, len(counts)) if counts[n]
+            },
+        },
+        'time_between_orders': {
+            'gaps': int(len(gaps)),
+            'mean_days': round(float(gaps.mean()), 1) if len(gaps) else None,
+            **{f'{key}_days': value for key, value in _percentiles(gaps).items()},
+            'histogram': _histogram(gaps, config['gap_bins_days']),
+            'days_to_second_order': _percentiles(to_second),
+        },
+    }
+
+
+# ============ CACHED RESULT ============
+
+def current_version():
+    latest = Order.objects.last_updated()
+    return latest.strftime('%Y%m%d%H%M%S%f') if latest else 'empty'
+
+
+def build(version=None):
+    """Compute and cache the report for the current orders. Returns it."""
+    config = get_cohort_settings()
+    version = version or current_version()
+    now = timezone.localtime()
+    result = compute(*load_orders(config['chunk_size']), month_index(now), config)
+    result.update({'version': version, 'generated_at': now.isoformat()})
+    cache.set(CACHE_KEY.format(version=version), result, config['cache_seconds'])
+    return result
+
+
+def get_report():
+    """The cached report for the current orders, computing it on a miss."""
+    version = current_version()
+    return cache.get(CACHE_KEY.format(version=version)) or build(version)
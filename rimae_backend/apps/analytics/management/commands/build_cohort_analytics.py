@@ -0,0 +1,19 @@
+"""
+Precompute the cohort analytics report so the endpoint is a cache hit.
+
+    python manage.py build_cohort_analytics       # e.g. hourly cron
+"""
+from django.core.management.base import BaseCommand
+
+from apps.analytics import cohorts
+
+
+class Command(BaseCommand):
+    help = 'Compute and cache cohort retention and repeat-purchase analytics.'
+
+    def handle(self, *args, **options):
+        report = cohorts.build()
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached cohorts for {report['customers']} customer(s) / {report['orders']} order(s) "
+            f"(version {report['version']})"
+        ))
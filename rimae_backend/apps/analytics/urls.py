@@ -7,6 +7,7 @@ from apps.products.models import Product
 from apps.accounts.models import User
 from django.db.models import Sum, Count, Avg
 from django.db.models.functions import TruncMonth, TruncDay
+from . import cohorts
 
 class DashboardStatsView(APIView):
     permission_classes = [IsAdmin]
@@ -32,11 +33,24 @@ class SalesAnalyticsView(APIView):
         ).values('month').annotate(
             revenue=Sum('total_amount'),
             orders=Count('id'),
-            profit=Sum('total_amount') - Sum('cogs')
+            profit=Sum('gross_profit')
         ).order_by('month')
         return Response(list(monthly))
 
+class CohortAnalyticsView(APIView):
+    """
+    GET /api/v1/analytics/cohorts/
+
+    Cohort retention, repeat-purchase rate and time between orders (see
+    analytics/cohorts.py). Served from cache until orders change.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(cohorts.get_report())
+
 urlpatterns = [
     path('dashboard/', DashboardStatsView.as_view()),
     path('sales/', SalesAnalyticsView.as_view()),
+    path('cohorts/', CohortAnalyticsView.as_view()),
 ]
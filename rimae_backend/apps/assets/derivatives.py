@@ -0,0 +1,184 @@
+"""
+Asset Derivatives - Resized, recompressed image variants for responsive delivery
+MVVM: Service Layer
+
+Derivatives are encoded in a small thread pool after the upload transaction
+commits (Pillow releases the GIL while resampling and encoding), so the
+request that created the asset never waits on image work. The
+`generate_asset_derivatives` command runs the same code for backfills.
+"""
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from .models import Asset
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_derivative_settings():
+    formats = getattr(settings, 'ASSET_DERIVATIVE_FORMATS', ['webp'])
+    return {
+        'widths': sorted(getattr(settings, 'ASSET_DERIVATIVE_WIDTHS', [200, 400, 800, 1600]), reverse=True),
+        'formats': [f for f in formats if features.check(f)],
+        'quality': getattr(settings, 'ASSET_DERIVATIVE_QUALITY', 80),
+        'workers': getattr(settings, 'ASSET_DERIVATIVE_WORKERS', 2),
+    }
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_derivative_settings()['workers'],
+                thread_name_prefix='asset-derivatives',
+            )
+    return _executor
+
+
+def derivative_name(asset, width, fmt):
+    return f"assets/derivatives/{asset.id}/{width}.{fmt}"
+
+
+def schedule_derivatives(asset):
+    """Queue derivative generation for an image asset once the current transaction commits."""
+    if asset.asset_type != 'image':
+        return
+    Asset.objects.filter(pk=asset.pk).update(derivatives_status='pending')
+    asset_id = asset.pk
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, asset_id))
+
+
+def _run_in_worker(asset_id):
+    close_old_connections()
+    try:
+        asset = Asset.objects.filter(pk=asset_id).first()
+        if asset:
+            generate_derivatives(asset)
+    except Exception:
+        logger.exception('Derivative generation failed for asset %s', asset_id)
+    finally:
+        close_old_connections()
+
+
+def encode_derivatives(image, widths, formats, quality):
+    """
+    Resize `image` to each width (largest first, each step resampling the
+    previous result) and encode it. Yields (width, height, format, bytes).
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    targets = [w for w in widths if w < image.width] or [image.width]
+    current = image
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        if current.size != (width, height):
+            current = current.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            current.save(buffer, format=fmt.upper(), quality=quality)
+            yield width, height, fmt, buffer.getvalue()
+
+
+def generate_derivatives(asset):
+    """Encode and store every configured derivative, then record them on the asset."""
+    config = get_derivative_settings()
+    storage = asset.file.storage
+
+    try:
+        with asset.file.open('rb') as fh:
+            image = Image.open(fh)
+            # Let the JPEG decoder downscale while decoding when the original is huge.
+            image.draft('RGB', (config['widths'][0], config['widths'][0]))
+            image.load()
+
+        derivatives = []
+        for width, height, fmt, data in encode_derivatives(
+            image, config['widths'], config['formats'], config['quality']
+        ):
+            name = derivative_name(asset, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(data))
+            derivatives.append({
+                'width': width, 'height': height, 'format': fmt,
+                'name': name, 'size': len(data),
+            })
+    except Exception:
+        logger.exception('Could not generate derivatives for asset %s', asset.pk)
+        Asset.objects.filter(pk=asset.pk).update(derivatives_status='failed')
+        return []
+
+    Asset.objects.filter(pk=asset.pk).update(derivatives=derivatives, derivatives_status='ready')
+    asset.derivatives = derivatives
+    asset.derivatives_status = 'ready'
+    return derivatives
+
+
+def delete_derivatives(asset):
+    storage = asset.file.storage
+    for derivative in asset.derivatives or []:
+        if storage.exists(derivative['name']):
+            storage.delete(derivative['name'])
+
+
+# ============ SRCSET ============
+
+def storage_name_from_url(url):
+    """Map a stored media URL (absolute or relative) back to its storage name."""
+    path = urlparse(url).path.lstrip('/')
+    media_prefix = urlparse(settings.MEDIA_URL).path.strip('/') + '/'
+    if path.startswith(media_prefix):
+        return path[len(media_prefix):]
+    return None
+
+
+def build_srcset(derivatives, storage, request=None, fmt=None):
+    """`url 200w, url 400w, ...` for one format (the first configured one by default)."""
+    fmt = fmt or (get_derivative_settings()['formats'] or ['webp'])[0]
+    entries = []
+    for derivative in sorted(derivatives, key=lambda d: d['width']):
+        if derivative['format'] != fmt:
+            continue
+        url = storage.url(derivative['name'])
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        entries.append(f"{url} {derivative['width']}w")
+    return ', '.join(entries)
+
+
+def srcset_map(urls, request=None):
+    """Resolve many image URLs to srcset strings with a single query."""
+    names = {}
+    for url in urls:
+        name = storage_name_from_url(url) if url else None
+        if name:
+            names.setdefault(name, set()).add(url)
+
+    if not names:
+        return {}
+
+    storage = Asset._meta.get_field('file').storage
+    rows = Asset.objects.filter(
+        file__in=list(names), derivatives_status='ready'
+    ).values_list('file', 'derivatives')
+
+    resolved = {}
+    for name, derivatives in rows:
+        srcset = build_srcset(derivatives, storage, request)
+        for url in names[name]:
+            resolved[url] = srcset
+    return resolved
@@ -0,0 +1,86 @@
+"""
+Benchmark derivative encoding: throughput and bytes saved per storefront page.
+
+    python manage.py benchmark_derivatives --images 20 --size 2400 --page-size 24
+    python manage.py benchmark_derivatives --path shot1.jpg --path shot2.png
+"""
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter
+
+from apps.assets.derivatives import encode_derivatives, get_derivative_settings
+
+
+def _synthetic_photo(size, seed):
+    """A noisy gradient with shapes; compresses roughly like a product photo."""
+    image = Image.effect_noise((size, size), 40 + seed % 20).convert('RGB')
+    gradient = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    image = Image.blend(image, gradient, 0.6)
+    draw = ImageDraw.Draw(image)
+    for i in range(6):
+        box = [size * i // 8, size // 4, size * i // 8 + size // 5, size * 3 // 4]
+        draw.ellipse(box, fill=((seed * 37 + i * 50) % 255, 120, 200 - i * 20))
+    return image.filter(ImageFilter.GaussianBlur(1))
+
+
+def _as_jpeg(image, quality=92):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Measure derivative encode throughput and bytes saved per page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', default=[], help='Original image file (repeatable)')
+        parser.add_argument('--images', type=int, default=12, help='Synthetic originals when no --path is given')
+        parser.add_argument('--size', type=int, default=2400, help='Synthetic original edge length (px)')
+        parser.add_argument('--page-size', type=int, default=24, help='Products per grid page')
+        parser.add_argument('--grid-width', type=int, default=400, help='Derivative width a grid cell loads')
+
+    def handle(self, *args, **options):
+        config = get_derivative_settings()
+        if options['path']:
+            originals = [open(path, 'rb').read() for path in options['path']]
+        else:
+            originals = [_as_jpeg(_synthetic_photo(options['size'], i)) for i in range(options['images'])]
+
+        def encode(data):
+            image = Image.open(io.BytesIO(data))
+            image.draft('RGB', (config['widths'][0], config['widths'][0]))
+            image.load()
+            return list(encode_derivatives(image, config['widths'], config['formats'], config['quality']))
+
+        for workers in sorted({1, config['workers']}):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(encode, originals))
+            elapsed = time.perf_counter() - start
+            encoded = sum(len(r) for r in results)
+            self.stdout.write(
+                f'workers={workers}: {len(originals)} originals, {encoded} derivatives in {elapsed:.2f}s '
+                f'({len(originals) / elapsed:.1f} originals/s, {encoded / elapsed:.1f} encodes/s)'
+            )
+
+        avg_original = sum(len(d) for d in originals) / len(originals)
+        self.stdout.write(f'\nAverage original: {avg_original / 1024:.1f} KB')
+        for fmt in config['formats']:
+            for width in sorted(config['widths']):
+                sizes = [len(data) for r in results for (w, _, f, data) in r if w == width and f == fmt]
+                if sizes:
+                    avg = sum(sizes) / len(sizes)
+                    self.stdout.write(f'  {fmt} {width}px: {avg / 1024:.1f} KB ({avg / avg_original:.1%} of original)')
+
+            grid = [len(data) for r in results for (w, _, f, data) in r if w == options['grid_width'] and f == fmt]
+            if grid:
+                page = options['page_size']
+                before = avg_original * page
+                after = sum(grid) / len(grid) * page
+                self.stdout.write(
+                    f'Grid page ({page} x {options["grid_width"]}px {fmt}): '
+                    f'{before / 1024:.0f} KB -> {after / 1024:.0f} KB, saves {(before - after) / 1024:.0f} KB per page'
+                )
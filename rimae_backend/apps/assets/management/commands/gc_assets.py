@@ -0,0 +1,27 @@
+"""Delete unreferenced assets in batches and reclaim their storage."""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.assets.references import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Garbage-collect assets with no AssetReference entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=7,
+                            help='Keep orphans uploaded more recently than this')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        deleted, freed = collect_garbage(
+            grace=timedelta(days=options['grace_days']),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {deleted} orphaned asset(s), {freed / (1024 * 1024):.2f} MB'
+        ))
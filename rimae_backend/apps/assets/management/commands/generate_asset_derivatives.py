@@ -0,0 +1,30 @@
+"""Generate (or regenerate) responsive derivatives for image assets."""
+from django.core.management.base import BaseCommand
+
+from apps.assets.derivatives import generate_derivatives
+from apps.assets.models import Asset
+
+
+class Command(BaseCommand):
+    help = 'Encode resized WebP/AVIF derivatives for image assets that are missing them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate even assets that are ready')
+        parser.add_argument('--limit', type=int, default=None)
+
+    def handle(self, *args, **options):
+        assets = Asset.objects.filter(asset_type='image')
+        if not options['all']:
+            assets = assets.exclude(derivatives_status='ready')
+        assets = assets.order_by('created_at')
+        if options['limit']:
+            assets = assets[:options['limit']]
+
+        done = failed = 0
+        for asset in assets.iterator():
+            if generate_derivatives(asset):
+                done += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {done} asset(s), {failed} failed'))
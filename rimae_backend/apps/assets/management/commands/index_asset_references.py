@@ -0,0 +1,21 @@
+"""Rebuild the asset reference index from existing product images (one-off backfill)."""
+from django.core.management.base import BaseCommand
+
+from apps.assets.signals import product_image_urls
+from apps.assets.references import sync_references
+from apps.products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = 'Backfill AssetReference rows for every ProductImage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = 0
+        for product_image in ProductImage.objects.only('id', 'image', 'images').iterator(chunk_size=options['chunk_size']):
+            sync_references(product_image, product_image_urls(product_image))
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} product image row(s)'))
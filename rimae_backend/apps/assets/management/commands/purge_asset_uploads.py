@@ -0,0 +1,26 @@
+"""Delete stored parts of upload sessions that were abandoned mid-transfer."""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.assets.models import AssetUpload
+from apps.assets.uploads import abort_upload
+
+
+class Command(BaseCommand):
+    help = 'Abort chunked uploads with no activity for --hours and reclaim their parts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = AssetUpload.objects.filter(status__in=['uploading', 'assembling'], updated_at__lt=cutoff)
+
+        count = 0
+        for upload in stale.iterator():
+            abort_upload(upload)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Aborted {count} stale upload(s)'))
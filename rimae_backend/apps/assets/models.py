@@ -3,6 +3,13 @@ import os
 from django.db import models
 
 class Asset(models.Model):
+    DERIVATIVE_STATUS_CHOICES = [
+        ('none', 'Not applicable'),
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=200)
     file = models.FileField(upload_to='assets/') # Stores in folder
@@ -12,6 +19,9 @@ class Asset(models.Model):
     file_size = models.IntegerField() # Store in bytes for calculation
     mime_type = models.CharField(max_length=100)
     used_in = models.JSONField(default=list) # Maps to jsonb
+    # Resized/recompressed variants: [{width, height, format, name, size}, ...]
+    derivatives = models.JSONField(default=list, blank=True)
+    derivatives_status = models.CharField(max_length=20, choices=DERIVATIVE_STATUS_CHOICES, default='none')
     created_by = models.UUIDField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -20,4 +30,78 @@ class Asset(models.Model):
         db_table = 'asset'
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class AssetUpload(models.Model):
+    """Resumable chunked upload session. Parts live in storage until completed."""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('assembling', 'Assembling'),  # Claimed by one complete request
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=200)
+    folder = models.CharField(max_length=100, default='default')
+    alt_text = models.CharField(max_length=255, null=True, blank=True)
+    mime_type = models.CharField(max_length=100)
+    asset_type = models.CharField(max_length=20)
+
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    total_chunks = models.IntegerField()
+    checksum = models.CharField(max_length=64, blank=True)  # Optional sha256 of the whole file
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True, related_name='uploads')
+    created_by = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'asset_uploads'
+        indexes = [models.Index(fields=['status', 'updated_at'])]
+
+    def __str__(self):
+        return f"Upload {self.name} ({self.status})"
+
+    def expected_chunk_size(self, index):
+        """Every chunk is `chunk_size` bytes except the last, which holds the remainder."""
+        if index < self.total_chunks - 1:
+            return self.chunk_size
+        return self.total_size - self.chunk_size * (self.total_chunks - 1)
+
+    def part_name(self, index):
+        return f"uploads/{self.id}/{index:06d}.part"
+
+
+class AssetUploadChunk(models.Model):
+    """One stored, checksum-verified part of an upload session."""
+    upload = models.ForeignKey(AssetUpload, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    size = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'asset_upload_chunks'
+        unique_together = ['upload', 'index']
+        ordering = ['index']
+
+
+class AssetReference(models.Model):
+    """Index of where an asset is used: asset <-> (model, object id, field)."""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='references')
+    model = models.CharField(max_length=100)  # app_label.ModelName, e.g. products.ProductImage
+    object_id = models.CharField(max_length=64)
+    field = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'asset_references'
+        unique_together = ['asset', 'model', 'object_id', 'field']
+        indexes = [models.Index(fields=['model', 'object_id'])]
+
+    def __str__(self):
+        return f"{self.asset_id} -> {self.model}:{self.object_id}.{self.field}"
@@ -0,0 +1,123 @@
+"""
+Asset References - Index of which rows use which assets
+MVVM: Service Layer
+
+Product images store plain URL strings, so usage can't be read off a foreign
+key. Every write of a referencing row re-syncs its entries in
+`AssetReference`; orphan reports and garbage collection then become indexed
+anti-joins on that table instead of scans over product rows.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .derivatives import delete_derivatives, storage_name_from_url
+from .models import Asset, AssetReference
+
+
+def model_label(instance_or_model):
+    return instance_or_model._meta.label
+
+
+def resolve_assets(urls):
+    """Map URLs to asset ids with one query. Unknown or external URLs are skipped."""
+    names = {}
+    for url in urls:
+        name = storage_name_from_url(url) if url else None
+        if name:
+            names.setdefault(name, []).append(url)
+    if not names:
+        return {}
+
+    resolved = {}
+    for name, asset_id in Asset.objects.filter(file__in=list(names)).values_list('file', 'id'):
+        for url in names[name]:
+            resolved[url] = asset_id
+    return resolved
+
+
+def sync_references(instance, field_urls):
+    """
+    Make the index match `field_urls` ({field: [url, ...]}) for one row.
+    Only the difference is written, so re-saving an unchanged row costs one read.
+    """
+    label = model_label(instance)
+    object_id = str(instance.pk)
+    by_url = resolve_assets(url for urls in field_urls.values() for url in urls)
+
+    wanted = {
+        (by_url[url], field)
+        for field, urls in field_urls.items()
+        for url in urls if url in by_url
+    }
+    existing = {
+        (asset_id, field): pk
+        for pk, asset_id, field in AssetReference.objects.filter(
+            model=label, object_id=object_id
+        ).values_list('pk', 'asset_id', 'field')
+    }
+
+    stale = [pk for key, pk in existing.items() if key not in wanted]
+    if stale:
+        AssetReference.objects.filter(pk__in=stale).delete()
+
+    missing = wanted - existing.keys()
+    if missing:
+        AssetReference.objects.bulk_create([
+            AssetReference(asset_id=asset_id, model=label, object_id=object_id, field=field)
+            for asset_id, field in missing
+        ], ignore_conflicts=True)
+
+
+def clear_references(instance):
+    AssetReference.objects.filter(model=model_label(instance), object_id=str(instance.pk)).delete()
+
+
+def orphaned_assets(older_than=None):
+    """Assets with no index entries, optionally only those uploaded before `older_than`."""
+    assets = Asset.objects.filter(~Exists(AssetReference.objects.filter(asset=OuterRef('pk'))))
+    if older_than is not None:
+        assets = assets.filter(created_at__lt=older_than)
+    return assets
+
+
+def collect_garbage(grace=timedelta(days=7), batch_size=500, dry_run=False):
+    """
+    Delete orphaned assets in batches and reclaim their storage.
+    The orphan condition is re-checked under a row lock, so an asset that
+    gains a reference mid-run is kept. Returns (assets_deleted, bytes_freed).
+    """
+    cutoff = timezone.now() - grace
+    deleted = freed = 0
+
+    if dry_run:
+        for file_size in orphaned_assets(cutoff).values_list('file_size', flat=True).iterator():
+            deleted += 1
+            freed += file_size or 0
+        return deleted, freed
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                orphaned_assets(cutoff)
+                .order_by('created_at')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not batch:
+                break
+            Asset.objects.filter(pk__in=[a.pk for a in batch]).delete()
+            transaction.on_commit(lambda batch=batch: _delete_files(batch))
+
+        deleted += len(batch)
+        freed += sum(a.file_size or 0 for a in batch)
+
+    return deleted, freed
+
+
+def _delete_files(assets):
+    for asset in assets:
+        if asset.file:
+            delete_derivatives(asset)
+            asset.file.delete(save=False)
@@ -1,23 +1,52 @@
 # apps/assets/serializers.py
 from rest_framework import serializers
-from .models import Asset
+from .models import Asset, AssetUpload
 
 class AssetSerializer(serializers.ModelSerializer):
     # We calculate these on the fly for the frontend
     size_mb = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
+    # Built from the AssetReference index (prefetch 'references' for lists)
+    used_in = serializers.SerializerMethodField()
 
     class Meta:
         model = Asset
         fields = '__all__'
         # THIS IS THE FIX: Tell DRF not to require these in the POST request
-        read_only_fields = ['asset_type', 'file_size', 'mime_type', 'used_in']
+        read_only_fields = [
+            'asset_type', 'file_size', 'mime_type', 'used_in',
+            'derivatives', 'derivatives_status'
+        ]
 
     def get_size_mb(self, obj):
         return round(obj.file_size / (1024 * 1024), 2) if obj.file_size else 0
 
+    def get_used_in(self, obj):
+        return [
+            {'model': ref.model, 'object_id': ref.object_id, 'field': ref.field}
+            for ref in obj.references.all()
+        ]
+
     def get_file_url(self, obj):
         request = self.context.get('request')
         if obj.file and request:
             return request.build_absolute_uri(obj.file.url)
-        return obj.file.url if obj.file else None
\ No newline at end of file
+        return obj.file.url if obj.file else None
+
+class AssetUploadSerializer(serializers.ModelSerializer):
+    received_chunks = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AssetUpload
+        fields = [
+            'id', 'name', 'folder', 'alt_text', 'mime_type', 'asset_type',
+            'total_size', 'chunk_size', 'total_chunks', 'checksum',
+            'status', 'asset', 'received_chunks', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'mime_type', 'asset_type', 'chunk_size', 'total_chunks',
+            'status', 'asset', 'created_at', 'updated_at'
+        ]
+
+    def get_received_chunks(self, obj):
+        return list(obj.chunks.values_list('index', flat=True))
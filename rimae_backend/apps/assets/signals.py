@@ -0,0 +1,23 @@
+"""Keep the asset reference index in step with rows that embed asset URLs."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.products.models import ProductImage
+from .references import clear_references, sync_references
+
+
+def product_image_urls(product_image):
+    return {
+        'image': [product_image.image] if product_image.image else [],
+        'images': list(product_image.images or []),
+    }
+
+
+@receiver(post_save, sender=ProductImage)
+def index_product_image(sender, instance, **kwargs):
+    sync_references(instance, product_image_urls(instance))
+
+
+@receiver(post_delete, sender=ProductImage)
+def unindex_product_image(sender, instance, **kwargs):
+    clear_references(instance)
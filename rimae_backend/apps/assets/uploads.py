@@ -0,0 +1,264 @@
+"""
+Asset Uploads - Chunked, resumable uploads streamed straight to storage
+MVVM: Service Layer
+
+Protocol: init a session, PUT numbered chunks (any order, retryable), then
+complete. Request bodies are read in small blocks and handed to the storage
+backend as a stream, so a worker never holds more than one block in memory.
+"""
+import hashlib
+import io
+import math
+import mimetypes
+
+from django.conf import settings
+from django.core.files.base import File
+from django.db import transaction
+from django.utils import timezone
+
+from .derivatives import schedule_derivatives
+from .models import Asset, AssetUpload, AssetUploadChunk
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised when a chunk or completion request can't be accepted."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_upload_settings():
+    return {
+        'chunk_size': getattr(settings, 'ASSET_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+        'max_size': getattr(settings, 'ASSET_UPLOAD_MAX_SIZE', 2 ** 31 - 1),
+    }
+
+
+def classify_file(filename):
+    """Return (mime_type, asset_type) for an uploaded file name."""
+    mime_type, _ = mimetypes.guess_type(filename)
+    mime_type = mime_type or 'application/octet-stream'
+
+    asset_type = 'image'
+    if 'video' in mime_type:
+        asset_type = 'video'
+    elif 'gif' in mime_type or filename.lower().endswith('.gif'):
+        asset_type = 'gif'
+    return mime_type, asset_type
+
+
+class _HashingReader(io.RawIOBase):
+    """Reads at most `length` bytes from `stream`, updating a sha256 digest."""
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._remaining = length
+        self.digest = hashlib.sha256()
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        data = self._stream.read(min(len(buffer), self._remaining))
+        if not data:
+            return 0
+        size = len(data)
+        buffer[:size] = data
+        self._remaining -= size
+        self.bytes_read += size
+        self.digest.update(data)
+        return size
+
+
+class _PartsReader(io.RawIOBase):
+    """Concatenates stored parts into one sequential stream, one part open at a time."""
+
+    def __init__(self, storage, names):
+        self._storage = storage
+        self._names = list(names)
+        self._current = None
+        self.digest = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._current is None:
+                if not self._names:
+                    return 0
+                self._current = self._storage.open(self._names.pop(0), 'rb')
+            data = self._current.read(len(buffer))
+            if data:
+                size = len(data)
+                buffer[:size] = data
+                self.digest.update(data)
+                return size
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def _storage():
+    return Asset._meta.get_field('file').storage
+
+
+def start_upload(name, total_size, folder='default', alt_text=None, checksum='', created_by=None):
+    """Create an upload session sized to the configured chunk size."""
+    config = get_upload_settings()
+    if total_size <= 0:
+        raise UploadError('total_size must be positive')
+    if total_size > config['max_size']:
+        raise UploadError('File exceeds the maximum upload size', status=413)
+
+    mime_type, asset_type = classify_file(name)
+    return AssetUpload.objects.create(
+        name=name,
+        folder=folder or 'default',
+        alt_text=alt_text,
+        mime_type=mime_type,
+        asset_type=asset_type,
+        total_size=total_size,
+        chunk_size=config['chunk_size'],
+        total_chunks=math.ceil(total_size / config['chunk_size']),
+        checksum=(checksum or '').lower(),
+        created_by=created_by,
+    )
+
+
+def store_chunk(upload, index, stream, content_length, checksum=None):
+    """
+    Stream one chunk into storage and verify its size and sha256.
+    Re-sending a chunk replaces the stored part, which is what makes resume safe.
+    """
+    if upload.status != 'uploading':
+        raise UploadError(f'Upload is {upload.status}', status=409)
+    if not 0 <= index < upload.total_chunks:
+        raise UploadError('Chunk index out of range')
+
+    expected = upload.expected_chunk_size(index)
+    if content_length != expected:
+        raise UploadError(f'Chunk {index} must be {expected} bytes')
+
+    storage = _storage()
+    name = upload.part_name(index)
+    if storage.exists(name):
+        storage.delete(name)
+
+    reader = _HashingReader(stream, content_length)
+    content = File(io.BufferedReader(reader, STREAM_BLOCK_SIZE), name=name)
+    content.size = content_length
+    saved_name = storage.save(name, content)
+
+    sha256 = reader.digest.hexdigest()
+    if reader.bytes_read != expected or (checksum and checksum.lower() != sha256):
+        storage.delete(saved_name)
+        raise UploadError(f'Chunk {index} failed integrity check', status=422)
+
+    chunk, _ = AssetUploadChunk.objects.update_or_create(
+        upload=upload, index=index,
+        defaults={'size': reader.bytes_read, 'sha256': sha256}
+    )
+    AssetUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now())
+    return chunk
+
+
+def missing_chunks(upload):
+    received = set(upload.chunks.values_list('index', flat=True))
+    return [i for i in range(upload.total_chunks) if i not in received]
+
+
+def _claim(upload):
+    """Move the session to 'assembling' under a row lock, so only one complete proceeds."""
+    with transaction.atomic():
+        locked = AssetUpload.objects.select_for_update().get(pk=upload.pk)
+        if locked.status != 'uploading':
+            raise UploadError(f'Upload is {locked.status}', status=409)
+        missing = missing_chunks(locked)
+        if missing:
+            raise UploadError(f'Missing chunks: {missing[:20]}', status=409)
+        locked.status = 'assembling'
+        locked.save(update_fields=['status', 'updated_at'])
+    upload.status = locked.status
+    upload.updated_at = locked.updated_at
+
+
+def _release(upload):
+    """Hand a failed assembly back to the client to retry."""
+    upload.status = 'uploading'
+    upload.save(update_fields=['status', 'updated_at'])
+
+
+def complete_upload(upload):
+    """Assemble the parts into the final asset file and create the Asset row."""
+    _claim(upload)
+    try:
+        asset = _assemble(upload)
+    except Exception:
+        _release(upload)
+        raise
+    discard_parts(upload)
+    return asset
+
+
+def _assemble(upload):
+    storage = _storage()
+    part_names = [upload.part_name(i) for i in range(upload.total_chunks)]
+    reader = _PartsReader(storage, part_names)
+    target = Asset._meta.get_field('file').generate_filename(None, upload.name)
+    content = File(io.BufferedReader(reader, STREAM_BLOCK_SIZE), name=upload.name)
+    content.size = upload.total_size
+    try:
+        saved_name = storage.save(target, content)
+    finally:
+        reader.close()
+
+    if upload.checksum and upload.checksum != reader.digest.hexdigest():
+        storage.delete(saved_name)
+        raise UploadError('File checksum mismatch', status=422)
+
+    with transaction.atomic():
+        asset = Asset.objects.create(
+            name=upload.name,
+            file=saved_name,
+            asset_type=upload.asset_type,
+            alt_text=upload.alt_text,
+            folder=upload.folder,
+            file_size=upload.total_size,
+            mime_type=upload.mime_type,
+            used_in=[],
+            created_by=upload.created_by,
+        )
+        upload.status = 'completed'
+        upload.asset = asset
+        upload.save(update_fields=['status', 'asset', 'updated_at'])
+        schedule_derivatives(asset)
+    return asset
+
+
+def discard_parts(upload):
+    """Delete stored parts and chunk rows for a session."""
+    storage = _storage()
+    for index in upload.chunks.values_list('index', flat=True):
+        name = upload.part_name(index)
+        if storage.exists(name):
+            storage.delete(name)
+    upload.chunks.all().delete()
+
+
+def abort_upload(upload):
+    discard_parts(upload)
+    upload.status = 'aborted'
+    upload.save(update_fields=['status', 'updated_at'])
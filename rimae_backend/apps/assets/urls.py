@@ -1,10 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AssetViewSet  # Import the ViewSet we created
+from .views import (
+    AssetViewSet,  # Import the ViewSet we created
+    AssetUploadInitView, AssetUploadDetailView,
+    AssetUploadChunkView, AssetUploadCompleteView
+)
 
 router = DefaultRouter()
 router.register(r'', AssetViewSet, basename='asset')
 
 urlpatterns = [
+    # Chunked uploads (must come before the router's detail route)
+    path('uploads/', AssetUploadInitView.as_view(), name='asset-upload-init'),
+    path('uploads/<uuid:pk>/', AssetUploadDetailView.as_view(), name='asset-upload-detail'),
+    path('uploads/<uuid:pk>/chunks/<int:index>/', AssetUploadChunkView.as_view(), name='asset-upload-chunk'),
+    path('uploads/<uuid:pk>/complete/', AssetUploadCompleteView.as_view(), name='asset-upload-complete'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
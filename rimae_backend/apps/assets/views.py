@@ -1,38 +1,37 @@
-import mimetypes
-from django.db.models import Sum
+from datetime import timedelta
+from django.db.models import Count, Sum
+from django.utils import timezone
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
-from .models import Asset
-from .serializers import AssetSerializer
+from .models import Asset, AssetUpload
+from .serializers import AssetSerializer, AssetUploadSerializer
+from .derivatives import schedule_derivatives, delete_derivatives
+from .references import orphaned_assets
+from .uploads import (
+    UploadError, classify_file, start_upload, store_chunk,
+    complete_upload, abort_upload
+)
 
 class AssetViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
-    queryset = Asset.objects.all().order_by('-created_at')
+    queryset = Asset.objects.all().prefetch_related('references').order_by('-created_at')
     serializer_class = AssetSerializer
 
         # apps/assets/views.py
     def perform_create(self, serializer):
         file_obj = self.request.data.get('file')
-        
-        # 1. Detect Mime Type
-        mime_type, _ = mimetypes.guess_type(file_obj.name)
-        mime_type = mime_type or 'application/octet-stream'
-        
-        # 2. Determine Asset Type
-        asset_type = 'image'
-        if 'video' in mime_type:
-            asset_type = 'video'
-        elif 'gif' in mime_type or file_obj.name.lower().endswith('.gif'):
-            asset_type = 'gif'
-
-        # 3. Save with backend-calculated values
-        serializer.save(
+        mime_type, asset_type = classify_file(file_obj.name)
+
+        asset = serializer.save(
             file_size=file_obj.size,
             mime_type=mime_type,
             asset_type=asset_type,
             used_in=[] # Initialize as empty list for your JSONB/JSON column
         )
+        schedule_derivatives(asset)
 
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
@@ -46,8 +45,129 @@ class AssetViewSet(viewsets.ModelViewSet):
             'assets': response.data 
         })
 
+    @action(detail=False, methods=['get'])
+    def orphans(self, request):
+        """
+        GET /api/v1/assets/orphans/?older_than_days=7
+        Assets no product row references, answered from the reference index.
+        """
+        try:
+            days = int(request.query_params.get('older_than_days', 0))
+        except ValueError:
+            return Response({'error': 'older_than_days must be an integer'}, status=400)
+
+        cutoff = timezone.now() - timedelta(days=days) if days else None
+        orphans = orphaned_assets(cutoff).order_by('created_at')
+        totals = orphans.aggregate(count=Count('id'), total=Sum('file_size'))
+
+        page = self.paginate_queryset(orphans)
+        data = AssetSerializer(page, many=True, context={'request': request}).data
+        return Response({
+            'orphan_count': totals['count'],
+            'reclaimable_mb': round((totals['total'] or 0) / (1024 * 1024), 2),
+            'assets': self.get_paginated_response(data).data,
+        })
+
     def destroy(self, request, *args, **kwargs):
         asset = self.get_object()
         if asset.file:
+            delete_derivatives(asset)
             asset.file.delete(save=False) 
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        return super().destroy(request, *args, **kwargs)
+
+
+# ============ CHUNKED UPLOADS ============
+
+class AssetUploadInitView(APIView):
+    """
+    POST /api/v1/assets/uploads/
+    Body: {name, total_size, folder?, alt_text?, checksum?} -> session with chunk_size/total_chunks
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        try:
+            upload = start_upload(
+                name=request.data.get('name', ''),
+                total_size=int(request.data.get('total_size', 0)),
+                folder=request.data.get('folder', 'default'),
+                alt_text=request.data.get('alt_text'),
+                checksum=request.data.get('checksum', ''),
+                created_by=request.user.id if request.user.is_authenticated else None,
+            )
+        except (TypeError, ValueError):
+            return Response({'error': 'total_size must be an integer'}, status=400)
+        except UploadError as e:
+            return Response({'error': e.message}, status=e.status)
+        return Response(AssetUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class AssetUploadDetailView(APIView):
+    """GET session state (received chunks, for resuming) / DELETE to abort."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        try:
+            upload = AssetUpload.objects.get(pk=pk)
+        except AssetUpload.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=404)
+        return Response(AssetUploadSerializer(upload).data)
+
+    def delete(self, request, pk):
+        try:
+            upload = AssetUpload.objects.get(pk=pk)
+        except AssetUpload.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=404)
+        abort_upload(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AssetUploadChunkView(APIView):
+    """
+    PUT /api/v1/assets/uploads/{id}/chunks/{index}/
+    Raw chunk bytes as the body; optional X-Chunk-Checksum: <sha256 hex>.
+    The body is streamed to storage without going through DRF parsers.
+    """
+    permission_classes = [AllowAny]
+
+    def put(self, request, pk, index):
+        try:
+            upload = AssetUpload.objects.get(pk=pk)
+        except AssetUpload.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=404)
+
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'error': 'Invalid Content-Length'}, status=400)
+
+        try:
+            chunk = store_chunk(
+                upload, index, request._request, content_length,
+                checksum=request.META.get('HTTP_X_CHUNK_CHECKSUM')
+            )
+        except UploadError as e:
+            return Response({'error': e.message}, status=e.status)
+
+        return Response({'index': chunk.index, 'size': chunk.size, 'sha256': chunk.sha256})
+
+
+class AssetUploadCompleteView(APIView):
+    """POST once every chunk is stored; assembles the file and creates the Asset."""
+    permission_classes = [AllowAny]
+
+    def post(self, request, pk):
+        try:
+            upload = AssetUpload.objects.get(pk=pk)
+        except AssetUpload.DoesNotExist:
+            return Response({'error': 'Upload not found'}, status=404)
+
+        try:
+            asset = complete_upload(upload)
+        except UploadError as e:
+            return Response({'error': e.message}, status=e.status)
+
+        return Response(
+            AssetSerializer(asset, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class EventsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.events'
+
+    def ready(self):
+        # Each app registers its outbox handlers in a `handlers` module.
+        autodiscover_modules('handlers')
@@ -0,0 +1,41 @@
+"""
+Drain the transactional outbox. Run one or more of these next to the web workers:
+
+    python manage.py run_outbox_worker
+    python manage.py run_outbox_worker --once   # single pass, e.g. from cron
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.events.outbox import drain, get_outbox_settings, purge_processed
+
+
+class Command(BaseCommand):
+    help = 'Dispatch pending outbox events to their handlers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain until empty, then exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or get_outbox_settings()['batch_size']
+        last_purge = 0.0
+
+        while True:
+            close_old_connections()
+            processed = drain(batch_size)
+            if processed:
+                self.stdout.write(f'Processed {processed} event(s)')
+
+            if time.monotonic() - last_purge > 3600:
+                purge_processed()
+                last_purge = time.monotonic()
+
+            if processed < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
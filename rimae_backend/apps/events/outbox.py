@@ -0,0 +1,119 @@
+"""
+Outbox - Publish domain events and drain them to handlers
+MVVM: Service Layer
+
+Views call `publish()` inside their transaction; the event row commits or
+rolls back with the change. `run_outbox_worker` drains pending rows with
+`SELECT ... FOR UPDATE SKIP LOCKED`, so several workers can run side by side
+against plain PostgreSQL without a broker.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Event types
+ORDER_CREATED = 'order.created'
+SHIPMENT_STATUS_CHANGED = 'shipment.status_changed'
+INVENTORY_MOVEMENT = 'inventory.movement'
+LOW_STOCK = 'inventory.low_stock'
+REVIEW_SUBMITTED = 'review.submitted'
+CATALOG_CHANGED = 'catalog.changed'
+BACK_IN_STOCK = 'inventory.back_in_stock'
+PRICE_DROPPED = 'product.price_dropped'
+WISHLIST_ALERT = 'notifications.wishlist_alert'  # One batch of an alert fan-out
+
+_handlers = defaultdict(list)
+
+
+def handler(event_type):
+    """Register a function as a handler: `@handler(ORDER_CREATED) def f(payload): ...`"""
+    def decorator(func):
+        _handlers[event_type].append(func)
+        return func
+    return decorator
+
+
+def get_outbox_settings():
+    return {
+        'batch_size': getattr(settings, 'OUTBOX_BATCH_SIZE', 100),
+        'max_attempts': getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8),
+        'retry_base_seconds': getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 5),
+        'retention_days': getattr(settings, 'OUTBOX_RETENTION_DAYS', 7),
+    }
+
+
+def publish(event_type, **payload):
+    """Record an event in the caller's transaction. Cheap: a single INSERT."""
+    return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+
+def publish_many(event_type, payloads):
+    """Record one event per payload with a single multi-row INSERT."""
+    return OutboxEvent.objects.bulk_create(
+        [OutboxEvent(event_type=event_type, payload=payload) for payload in payloads], batch_size=1000
+    )
+
+
+def dispatch(event):
+    for func in _handlers.get(event.event_type, []):
+        func(event.payload)
+
+
+def _retry_delay(attempts, base):
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def drain(batch_size=None):
+    """
+    Process one batch of due events. Each event's handlers run in a savepoint,
+    so one failure is retried later without undoing the rest of the batch.
+    Returns the number of events claimed.
+    """
+    config = get_outbox_settings()
+    batch_size = batch_size or config['batch_size']
+
+    with transaction.atomic():
+        now = timezone.now()
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('id')[:batch_size]
+        )
+
+        for event in events:
+            try:
+                with transaction.atomic():
+                    dispatch(event)
+            except Exception as e:
+                logger.exception('Outbox handler failed for %s #%s', event.event_type, event.id)
+                event.attempts += 1
+                event.last_error = f'{type(e).__name__}: {e}'
+                if event.attempts >= config['max_attempts']:
+                    event.status = 'failed'
+                else:
+                    event.available_at = now + _retry_delay(event.attempts, config['retry_base_seconds'])
+            else:
+                event.status = 'done'
+                event.processed_at = now
+
+        if events:
+            OutboxEvent.objects.bulk_update(
+                events, ['status', 'attempts', 'available_at', 'last_error', 'processed_at']
+            )
+
+    return len(events)
+
+
+def purge_processed(retention_days=None):
+    retention_days = retention_days if retention_days is not None else get_outbox_settings()['retention_days']
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = OutboxEvent.objects.filter(status='done', processed_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,282 @@
+"""
+Inventory Costing - FIFO cost layers and COGS
+MVVM: Service Layer
+
+Every purchase-order receipt opens a cost layer (units x unit cost). When an
+order is fulfilled its items consume the oldest open layers of their
+product/variant, the blended cost is stamped on `OrderItem.unit_cost`, and
+`Order.cogs` is rolled up from the items. Units sold beyond the recorded
+layers are costed at the most recent layer's price. Items of a variant that
+has never had a layer stay uncosted (`costed_at` unset) rather than costed
+at zero; `recost_orders` prices them once stock has been received.
+
+`recost_fifo` replays the whole history in bulk: per variant, cumulative
+receipts and cumulative demand are two sorted arrays, so the FIFO cost of
+every order line is a searchsorted + interpolation over the cumulative cost
+curve, with no per-unit loop. Amounts are handled in integer paise.
+"""
+from decimal import Decimal
+from itertools import groupby
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from .models import CostLayer, PurchaseOrderItem
+
+# Orders whose goods have left the warehouse
+FULFILLED_STATUSES = ('shipped', 'delivered', 'returned')
+
+CENT = Decimal('0.01')
+
+
+# ============ ONLINE ============
+
+def add_layer(po_item, quantity, received_at=None):
+    """Open a layer for `quantity` units just received against a PO line."""
+    if quantity <= 0:
+        return None
+    return CostLayer.objects.create(
+        product_id=po_item.product_id,
+        variant_id=po_item.variant_id,
+        purchase_order_item=po_item,
+        unit_cost=po_item.unit_cost,
+        quantity_received=quantity,
+        quantity_remaining=quantity,
+        received_at=received_at or timezone.now(),
+    )
+
+
+def _last_unit_cost(product_id, variant_id):
+    return CostLayer.objects.filter(
+        product_id=product_id, variant_id=variant_id
+    ).order_by('-received_at', '-created_at').values_list('unit_cost', flat=True).first()
+
+
+def consume(product_id, variant_id, quantity):
+    """
+    Take `quantity` units from the oldest open layers. Returns their total
+    cost, or None (consuming nothing) if the variant has no layers at all.
+    """
+    layers = list(
+        CostLayer.objects.select_for_update()
+        .filter(product_id=product_id, variant_id=variant_id, quantity_remaining__gt=0)
+        .order_by('received_at', 'created_at')
+    )
+    total = Decimal('0')
+    left = quantity
+    touched = []
+    for layer in layers:
+        if not left:
+            break
+        taken = min(left, layer.quantity_remaining)
+        layer.quantity_remaining -= taken
+        total += taken * layer.unit_cost
+        left -= taken
+        touched.append(layer)
+
+    if left:
+        last_cost = touched[-1].unit_cost if touched else _last_unit_cost(product_id, variant_id)
+        if last_cost is None:
+            return None
+        total += left * last_cost
+    if touched:
+        CostLayer.objects.bulk_update(touched, ['quantity_remaining'])
+    return total
+
+
+def refresh_order_cogs(order_ids=None):
+    """
+    Set Order.cogs to the sum of its items' unit costs, for orders with
+    costed items, and refresh their stored profit.
+    """
+    item_costs = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+        total=Sum(F('unit_cost') * F('quantity'))
+    ).values('total')[:1]
+
+    orders = Order.objects.filter(
+        id__in=OrderItem.objects.filter(costed_at__isnull=False).values('order_id')
+    )
+    if order_ids is not None:
+        orders = orders.filter(id__in=order_ids)
+    updated = orders.update(cogs=Coalesce(
+        Subquery(item_costs, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        Value(Decimal('0')),
+    ))
+    orders.refresh_profit()
+    return updated
+
+
+@transaction.atomic
+def cost_order(order_id):
+    """
+    Consume cost layers for a fulfilled order's uncosted items. Idempotent:
+    items already costed are left alone, and items with no cost known yet
+    stay uncosted. Returns the number of items costed.
+    """
+    items = list(
+        OrderItem.objects.select_for_update()
+        .filter(order_id=order_id, costed_at__isnull=True, product__isnull=False)
+        .order_by('id')
+    )
+    if not items:
+        return 0
+
+    now = timezone.now()
+    costed = []
+    for item in items:
+        total = consume(item.product_id, item.variant_id, item.quantity)
+        if total is None:
+            continue
+        item.unit_cost = (total / item.quantity).quantize(CENT) if item.quantity else Decimal('0')
+        item.costed_at = now
+        item.compute_profit()
+        costed.append(item)
+    if not costed:
+        return 0
+    OrderItem.objects.bulk_update(costed, ['unit_cost', 'costed_at', 'profit'])
+    refresh_order_cogs([order_id])
+    return len(costed)
+
+
+# ============ BATCH RE-COSTING ============
+
+def fifo_costs(layer_qty, layer_cost, item_qty):
+    """
+    Vectorized FIFO for one variant.
+
+    layer_qty/layer_cost: layers in receipt order (cost in integer paise).
+    item_qty: consumptions in fulfillment order.
+    Returns (total cost per item in paise, remaining quantity per layer).
+    """
+    layer_qty = np.asarray(layer_qty, dtype=np.int64)
+    layer_cost = np.asarray(layer_cost, dtype=np.int64)
+    item_qty = np.asarray(item_qty, dtype=np.int64)
+
+    received = np.cumsum(layer_qty)
+    edges = np.concatenate(([0], received[:-1]))  # units received before each layer
+    cost_before = np.concatenate(([0], np.cumsum(layer_qty * layer_cost)[:-1]))
+
+    def cumulative_cost(units):
+        # Layer holding the `units`-th unit; past the last layer, keep its price
+        idx = np.minimum(np.searchsorted(received, units, side='left'), len(received) - 1)
+        return cost_before[idx] + (units - edges[idx]) * layer_cost[idx]
+
+    demand = np.concatenate(([0], np.cumsum(item_qty)))
+    totals = np.diff(cumulative_cost(demand))
+    consumed = np.clip(demand[-1] - edges, 0, layer_qty)
+    return totals, layer_qty - consumed
+
+
+def _write_columns(model, columns, rows, batch_size):
+    """UPDATE `columns` for many rows of (pk, *values) in batches."""
+    if not rows:
+        return
+    if connection.vendor == 'postgresql':
+        from psycopg2.extras import execute_values
+
+        table = model._meta.db_table
+        pk = model._meta.pk
+        fields = [model._meta.get_field(name) for name in columns]
+        assignments = ', '.join(
+            f'"{field.column}" = v.c{i}::{field.db_type(connection)}' for i, field in enumerate(fields)
+        )
+        aliases = ', '.join(f'c{i}' for i in range(len(fields)))
+        sql = (
+            f'UPDATE "{table}" AS t SET {assignments} FROM (VALUES %s) AS v(pk, {aliases}) '
+            f'WHERE t."{pk.column}" = v.pk::{pk.db_type(connection)}'
+        )
+        with connection.cursor() as cursor:
+            execute_values(cursor.cursor, sql, rows, page_size=batch_size)
+        return
+
+    objs = [model(pk=row[0], **dict(zip(columns, row[1:]))) for row in rows]
+    model.objects.bulk_update(objs, columns, batch_size=batch_size)
+
+
+def _variant_key(row):
+    return row[1], row[2]
+
+
+@transaction.atomic
+def recost_fifo(batch_size=5000):
+    """
+    Re-derive every fulfilled item's unit cost, every layer's remaining
+    quantity and every affected order's COGS from the full history.
+    Variants with no layers are left untouched. Returns a stats dict.
+    """
+    if connection.vendor == 'postgresql':
+        # Keep online costing out until the replay is written back
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE "{CostLayer._meta.db_table}" IN SHARE ROW EXCLUSIVE MODE')
+
+    layers = {
+        key: list(rows) for key, rows in groupby(
+            CostLayer.objects.order_by('product_id', 'variant_id', 'received_at', 'created_at')
+            .values_list('id', 'product_id', 'variant_id', 'quantity_received', 'unit_cost')
+            .iterator(chunk_size=batch_size),
+            key=_variant_key,
+        )
+    }
+    items = (
+        OrderItem.objects.filter(order__status__in=FULFILLED_STATUSES, product__isnull=False)
+        .order_by('product_id', 'variant_id', 'order__created_at', 'id')
+        .values_list('id', 'product_id', 'variant_id', 'quantity', 'total_price')
+        .iterator(chunk_size=batch_size)
+    )
+
+    now = timezone.now()
+    item_rows, layer_rows = [], []
+    stats = {'variants': 0, 'items': 0, 'layers': 0, 'uncosted_variants': 0}
+    for key, group in groupby(items, key=_variant_key):
+        group = list(group)
+        variant_layers = layers.pop(key, None)
+        if not variant_layers:
+            stats['uncosted_variants'] += 1
+            continue
+
+        totals, remaining = fifo_costs(
+            [layer[3] for layer in variant_layers],
+            [int(layer[4] * 100) for layer in variant_layers],
+            [item[3] for item in group],
+        )
+        for item, total in zip(group, totals.tolist()):
+            unit_cost = (Decimal(total) / item[3] / 100).quantize(CENT) if item[3] else Decimal('0')
+            item_rows.append((item[0], unit_cost, now, item[4] - unit_cost * item[3]))
+        layer_rows.extend(zip([layer[0] for layer in variant_layers], remaining.tolist()))
+        stats['variants'] += 1
+
+    # Layers nothing has consumed yet are back to full
+    for variant_layers in layers.values():
+        layer_rows.extend((layer[0], layer[3]) for layer in variant_layers)
+
+    _write_columns(OrderItem, ['unit_cost', 'costed_at', 'profit'], item_rows, batch_size)
+    _write_columns(CostLayer, ['quantity_remaining'], layer_rows, batch_size)
+    stats['items'] = len(item_rows)
+    stats['layers'] = len(layer_rows)
+    stats['orders'] = refresh_order_cogs()
+    return stats
+
+
+def backfill_layers():
+    """Open layers for PO receipts recorded before cost layers existed."""
+    created = []
+    po_items = PurchaseOrderItem.objects.filter(
+        quantity_received__gt=0, cost_layers__isnull=True
+    ).select_related('purchase_order')
+    for po_item in po_items.iterator():
+        po = po_item.purchase_order
+        created.append(CostLayer(
+            product_id=po_item.product_id,
+            variant_id=po_item.variant_id,
+            purchase_order_item=po_item,
+            unit_cost=po_item.unit_cost,
+            quantity_received=po_item.quantity_received,
+            quantity_remaining=po_item.quantity_received,
+            received_at=po.received_at or po.updated_at,
+        ))
+    CostLayer.objects.bulk_create(created, batch_size=1000)
+    return len(created)
@@ -0,0 +1,39 @@
+"""
+Inventory outbox handlers - run by the outbox worker, not in the request
+"""
+from django.utils.dateparse import parse_datetime
+
+from apps.events.outbox import handler, INVENTORY_MOVEMENT, SHIPMENT_STATUS_CHANGED
+from . import costing, routing, tracking
+from .models import InventoryMovement
+
+
+@handler(INVENTORY_MOVEMENT)
+def log_inventory_movement(payload):
+    movement = InventoryMovement.objects.create(
+        inventory_id=payload['inventory_id'],
+        movement_type=payload['movement_type'],
+        quantity=payload['quantity'],
+        previous_quantity=payload['previous_quantity'],
+        new_quantity=payload['new_quantity'],
+        reference_type=payload.get('reference_type', ''),
+        reference_id=payload.get('reference_id'),
+        notes=payload.get('notes', ''),
+        created_by_id=payload.get('created_by_id'),
+    )
+    # Keep the time of the change, not the time the worker got to it
+    if payload.get('created_at'):
+        InventoryMovement.objects.filter(pk=movement.pk).update(created_at=parse_datetime(payload['created_at']))
+
+
+@handler(SHIPMENT_STATUS_CHANGED)
+def sync_order_status(payload):
+    tracking.sync_orders([payload['order_id']])
+
+
+@handler(SHIPMENT_STATUS_CHANGED)
+def cost_fulfilled_order(payload):
+    if payload['status'] in tracking.FULFILLED_SHIPMENT_STATUSES:
+        # Only the shipping warehouse's stock has left; shipments without one cover the order
+        routing.fulfil_allocations(payload['order_id'], warehouse_id=payload.get('warehouse_id'))
+        costing.cost_order(payload['order_id'])
@@ -0,0 +1,102 @@
+"""
+Inventory Ledger - Balance snapshots and stock-as-of queries
+MVVM: Service Layer
+
+A snapshot records `Inventory.quantity` at an instant. "Stock as of X" is
+the nearest snapshot adjusted by the movements between it and X, so only a
+short, partition-pruned slice of the ledger is read. Movements store
+previous/new quantities, so each one's delta is `new - previous`.
+"""
+from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .models import Inventory, InventoryBalanceSnapshot, InventoryMovement
+
+DELTA = F('new_quantity') - F('previous_quantity')
+
+
+def take_snapshots(as_of=None, batch_size=2000):
+    """Snapshot every inventory row at `as_of` (default now). Idempotent per instant."""
+    as_of = as_of or timezone.now()
+    created = 0
+    batch = []
+    for inventory_id, quantity in Inventory.objects.values_list('id', 'quantity').iterator(chunk_size=batch_size):
+        batch.append(InventoryBalanceSnapshot(inventory_id=inventory_id, as_of=as_of, quantity=quantity))
+        if len(batch) >= batch_size:
+            created += len(InventoryBalanceSnapshot.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        created += len(InventoryBalanceSnapshot.objects.bulk_create(batch, ignore_conflicts=True))
+    return created
+
+
+def _delta(inventory_id, after=None, until=None):
+    movements = InventoryMovement.objects.filter(inventory_id=inventory_id)
+    if after is not None:
+        movements = movements.filter(created_at__gt=after)
+    if until is not None:
+        movements = movements.filter(created_at__lte=until)
+    return movements.aggregate(delta=Sum(DELTA, output_field=IntegerField()))['delta'] or 0
+
+
+def balance_as_of(inventory_id, at):
+    """
+    Quantity on hand for one inventory row at `at`, from whichever snapshot is
+    closer (rolling forward from the one before, or back from the one after).
+    Returns (quantity, snapshot_as_of or None).
+    """
+    snapshots = InventoryBalanceSnapshot.objects.filter(inventory_id=inventory_id)
+    before = snapshots.filter(as_of__lte=at).order_by('-as_of').first()
+    after = snapshots.filter(as_of__gt=at).order_by('as_of').first()
+
+    if after and (not before or after.as_of - at < at - before.as_of):
+        return after.quantity - _delta(inventory_id, after=at, until=after.as_of), after.as_of
+    if before:
+        return before.quantity + _delta(inventory_id, after=before.as_of, until=at), before.as_of
+    # No snapshots yet: replay the whole ledger for this row
+    return _delta(inventory_id, until=at), None
+
+
+def balances_as_of(at, inventory_ids=None):
+    """
+    {inventory_id: quantity} at `at` for many rows in two queries: the latest
+    snapshot per row, then one grouped delta over movements after it.
+    """
+    def latest(outer_field):
+        return InventoryBalanceSnapshot.objects.filter(
+            inventory_id=OuterRef(outer_field), as_of__lte=at
+        ).order_by('-as_of')
+
+    rows = Inventory.objects.all()
+    if inventory_ids is not None:
+        rows = rows.filter(id__in=inventory_ids)
+    base = {
+        inventory_id: (snap_at, snap_qty or 0)
+        for inventory_id, snap_at, snap_qty in rows.annotate(
+            snap_at=Subquery(latest('id').values('as_of')[:1]),
+            snap_qty=Subquery(latest('id').values('quantity')[:1]),
+        ).values_list('id', 'snap_at', 'snap_qty')
+    }
+    if not base:
+        return {}
+
+    movements = InventoryMovement.objects.filter(created_at__lte=at)
+    if inventory_ids is not None:
+        movements = movements.filter(inventory_id__in=list(base))
+    snapshot_times = [snap_at for snap_at, _ in base.values()]
+    if all(snapshot_times):
+        # Every row has a snapshot: nothing older than the earliest one is needed,
+        # which lets PostgreSQL prune older partitions.
+        movements = movements.filter(created_at__gt=min(snapshot_times))
+
+    deltas = movements.annotate(
+        snap_at=Subquery(latest('inventory_id').values('as_of')[:1])
+    ).filter(
+        Q(snap_at__isnull=True) | Q(created_at__gt=F('snap_at'))
+    ).values('inventory_id').annotate(delta=Sum(DELTA, output_field=IntegerField()))
+
+    balances = {inventory_id: qty for inventory_id, (_, qty) in base.items()}
+    for row in deltas:
+        if row['inventory_id'] in balances:
+            balances[row['inventory_id']] += row['delta'] or 0
+    return balances
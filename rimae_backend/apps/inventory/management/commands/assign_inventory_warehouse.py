@@ -0,0 +1,24 @@
+"""Attach inventory rows that predate warehouses to one warehouse."""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.models import Inventory, Warehouse
+
+
+class Command(BaseCommand):
+    help = 'Set the warehouse on every inventory row that has none.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('code', help='Warehouse code')
+        parser.add_argument('--name', help='Create the warehouse with this name if it does not exist')
+        parser.add_argument('--pincode', default='', help='Pincode for a newly created warehouse')
+
+    def handle(self, *args, **options):
+        warehouse = Warehouse.objects.filter(code=options['code']).first()
+        if warehouse is None:
+            if not options['name']:
+                raise CommandError(f"No warehouse {options['code']}; pass --name to create it")
+            warehouse = Warehouse.objects.create(
+                code=options['code'], name=options['name'], pincode=options['pincode']
+            )
+        updated = Inventory.objects.filter(warehouse__isnull=True).update(warehouse=warehouse)
+        self.stdout.write(self.style.SUCCESS(f'Assigned {updated} inventory row(s) to {warehouse.code}'))
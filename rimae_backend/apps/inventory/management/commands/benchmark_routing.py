@@ -0,0 +1,67 @@
+"""
+Benchmark the routing engine on synthetic orders (no database access).
+
+    python manage.py benchmark_routing --orders 20000 --warehouses 4 --skus 2000
+"""
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.inventory.routing import Router, ZoneMap
+
+
+class Command(BaseCommand):
+    help = 'Measure orders routed per second and how many ship from a single warehouse.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--warehouses', type=int, default=3)
+        parser.add_argument('--skus', type=int, default=1000)
+        parser.add_argument('--zones', type=int, default=20)
+        parser.add_argument('--max-lines', type=int, default=4)
+        parser.add_argument('--stock', type=int, default=20, help='Mean units per SKU per warehouse')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        zones = [f'Z{i:02d}' for i in range(options['zones'])]
+        # Pincodes 100000-999999 split evenly across zones
+        width = 900000 // len(zones)
+        ranges = [(100000 + i * width, 100000 + (i + 1) * width - 1, zone) for i, zone in enumerate(zones)]
+        distances = [
+            (a, b, 50 + 40 * abs(i - j)) for i, a in enumerate(zones) for j, b in enumerate(zones) if i < j
+        ]
+        zone_map = ZoneMap(ranges, distances, 3000)
+
+        warehouse_zones = [zone_map.zone_of(rng.randint(100000, 999999)) for _ in range(options['warehouses'])]
+        np_rng = np.random.default_rng(options['seed'])
+        stock = {
+            sku: np_rng.poisson(options['stock'], options['warehouses']).astype(np.int64)
+            for sku in range(options['skus'])
+        }
+        orders = [
+            (
+                str(rng.randint(100000, 999999)),
+                [(rng.randrange(options['skus']), rng.randint(1, 3)) for _ in range(rng.randint(1, options['max_lines']))],
+            )
+            for _ in range(options['orders'])
+        ]
+
+        router = Router(zone_map, warehouse_zones, stock)
+        single = split = backordered = 0
+        start = time.perf_counter()
+        for pincode, lines in orders:
+            allocations, missing = router.route(pincode, lines)
+            used = len({warehouse for _, warehouse, _ in allocations})
+            single += used == 1 and not missing
+            split += used > 1
+            backordered += bool(missing)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{options['orders']} orders across {options['warehouses']} warehouses in {elapsed:.3f}s "
+            f"({options['orders'] / elapsed:,.0f} orders/s)"
+        )
+        self.stdout.write(f'Single warehouse: {single}, split: {split}, with backordered lines: {backordered}')
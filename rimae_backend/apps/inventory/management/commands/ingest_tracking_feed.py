@@ -0,0 +1,44 @@
+"""
+Apply a carrier tracking feed (CSV or JSON lines) to shipments and orders.
+
+    python manage.py ingest_tracking_feed feed.csv --carrier DELHIVERY
+    python manage.py ingest_tracking_feed events.jsonl --unmatched-out unmatched.txt
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory import tracking
+from apps.inventory.models import Carrier
+
+
+class Command(BaseCommand):
+    help = 'Bulk-apply (tracking_number, status, timestamp) events to shipments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--carrier', help='Carrier code; only match its shipments')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Detected from content by default')
+        parser.add_argument('--unmatched-out', help='Write every unmatched tracking number to this file')
+
+    def handle(self, *args, **options):
+        carrier = None
+        if options['carrier']:
+            carrier = Carrier.objects.filter(code=options['carrier']).first()
+            if carrier is None:
+                raise CommandError(f"Carrier {options['carrier']} not found")
+
+        with open(options['path'], 'rb') as handle:
+            events, invalid = tracking.parse_feed(handle.read(), options['format'])
+
+        report = tracking.ingest(events, carrier=carrier, report_limit=None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['events']} event(s): {report['shipments_updated']} shipment(s) updated, "
+            f"{report['stale_or_backward']} stale or backward, {report['orders_updated']} order(s) synced"
+        ))
+        if invalid:
+            self.stdout.write(self.style.WARNING(f'{len(invalid)} invalid row(s), e.g. line {invalid[0]["line"]}'))
+        if report['unmatched_count']:
+            self.stdout.write(self.style.WARNING(f"{report['unmatched_count']} tracking number(s) matched no shipment"))
+            if options['unmatched_out']:
+                with open(options['unmatched_out'], 'w') as out:
+                    out.write('\n'.join(report['unmatched']) + '\n')
@@ -0,0 +1,44 @@
+"""
+Replace carrier rate cards from a CSV file.
+
+    python manage.py load_rate_cards rates.csv
+
+rates.csv: carrier_code,zone,max_weight_grams,rate  (zone '*' = any other zone)
+"""
+import csv
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.inventory.models import Carrier, RateSlab
+from apps.inventory.rates import bump_rates_version
+
+
+class Command(BaseCommand):
+    help = 'Load per-carrier rate slabs by zone and weight.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        carriers = dict(Carrier.objects.values_list('code', 'id'))
+        slabs = []
+        with open(options['path'], newline='') as handle:
+            for line_no, row in enumerate(csv.DictReader(handle), 2):
+                code = row['carrier_code'].strip()
+                if code not in carriers:
+                    raise CommandError(f'Line {line_no}: unknown carrier {code}')
+                slabs.append(RateSlab(
+                    carrier_id=carriers[code],
+                    zone=row['zone'].strip(),
+                    max_weight_grams=int(row['max_weight_grams']),
+                    rate=Decimal(row['rate']),
+                ))
+
+        loaded = {slab.carrier_id for slab in slabs}
+        RateSlab.objects.filter(carrier_id__in=loaded).delete()
+        RateSlab.objects.bulk_create(slabs, batch_size=1000)
+        transaction.on_commit(bump_rates_version)
+        self.stdout.write(self.style.SUCCESS(f'Loaded {len(slabs)} slab(s) for {len(loaded)} carrier(s)'))
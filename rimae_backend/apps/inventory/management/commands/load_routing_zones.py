@@ -0,0 +1,58 @@
+"""
+Replace the pincode zone and zone distance tables from CSV files.
+
+    python manage.py load_routing_zones --zones zones.csv --distances distances.csv
+
+zones.csv: start,end,zone (inclusive pincode ranges)
+distances.csv: from_zone,to_zone,distance_km
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.inventory.models import PincodeZone, ZoneDistance
+from apps.inventory.routing import bump_zone_version
+
+
+def _rows(path, columns):
+    with open(path, newline='') as handle:
+        reader = csv.DictReader(handle)
+        missing = set(columns) - set(reader.fieldnames or [])
+        if missing:
+            raise CommandError(f'{path} is missing column(s): {", ".join(sorted(missing))}')
+        return [tuple(row[column].strip() for column in columns) for row in reader]
+
+
+class Command(BaseCommand):
+    help = 'Load pincode -> zone ranges and zone distances used for routing and shipping rates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zones', help='CSV of start,end,zone')
+        parser.add_argument('--distances', help='CSV of from_zone,to_zone,distance_km')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options['zones']:
+            ranges = sorted(
+                (int(start), int(end), zone) for start, end, zone in _rows(options['zones'], ['start', 'end', 'zone'])
+            )
+            for (_, prev_end, prev_zone), (start, _, zone) in zip(ranges, ranges[1:]):
+                if start <= prev_end:
+                    raise CommandError(f'Pincode range for {zone} overlaps {prev_zone} at {start}')
+            PincodeZone.objects.all().delete()
+            PincodeZone.objects.bulk_create(
+                [PincodeZone(start=start, end=end, zone=zone) for start, end, zone in ranges], batch_size=1000
+            )
+            self.stdout.write(f'Loaded {len(ranges)} pincode range(s)')
+
+        if options['distances']:
+            distances = _rows(options['distances'], ['from_zone', 'to_zone', 'distance_km'])
+            ZoneDistance.objects.all().delete()
+            ZoneDistance.objects.bulk_create([
+                ZoneDistance(from_zone=a, to_zone=b, distance_km=int(km)) for a, b, km in distances
+            ], batch_size=1000)
+            self.stdout.write(f'Loaded {len(distances)} zone distance(s)')
+
+        # bulk_create/delete send no per-row signals
+        transaction.on_commit(bump_zone_version)
@@ -0,0 +1,46 @@
+"""
+Manage monthly partitions of the inventory movement ledger (PostgreSQL).
+
+    python manage.py partition_inventory_movements --convert        # once
+    python manage.py partition_inventory_movements                  # monthly cron: create ahead
+    python manage.py partition_inventory_movements --detach-before 2025-01 [--drop]
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.partitions import (
+    PartitionError, convert_to_partitioned, detach_partitions, ensure_partitions
+)
+
+
+class Command(BaseCommand):
+    help = 'Convert, extend or archive the partitioned inventory_movements table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true', help='Rebuild the ledger as a partitioned table')
+        parser.add_argument('--keep-legacy', action='store_true', help='Keep the pre-conversion table')
+        parser.add_argument('--months-ahead', type=int, default=3)
+        parser.add_argument('--detach-before', help='YYYY-MM: detach partitions ending before this month')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions instead of archiving')
+
+    def handle(self, *args, **options):
+        try:
+            if options['convert']:
+                if convert_to_partitioned(options['months_ahead'], options['keep_legacy']):
+                    self.stdout.write(self.style.SUCCESS('Converted inventory_movements to monthly partitions'))
+                else:
+                    self.stdout.write('inventory_movements is already partitioned')
+
+            if options['detach_before']:
+                try:
+                    before = datetime.strptime(options['detach_before'], '%Y-%m').replace(tzinfo=dt_timezone.utc)
+                except ValueError:
+                    raise CommandError('--detach-before must be YYYY-MM')
+                detached = detach_partitions(before, drop=options['drop'])
+                self.stdout.write(self.style.SUCCESS(f'Detached {len(detached)} partition(s): {", ".join(detached)}'))
+            else:
+                created = ensure_partitions(options['months_ahead'])
+                self.stdout.write(self.style.SUCCESS(f'Partitions present: {", ".join(created)}'))
+        except PartitionError as e:
+            raise CommandError(str(e))
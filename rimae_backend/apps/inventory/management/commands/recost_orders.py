@@ -0,0 +1,39 @@
+"""
+Replay FIFO costing over the full order history.
+
+    python manage.py recost_orders
+    python manage.py recost_orders --backfill-layers --batch-size 10000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory import costing
+
+
+class Command(BaseCommand):
+    help = 'Recompute order item unit costs, cost layer balances and order COGS with FIFO.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--backfill-layers', action='store_true',
+            help='First open layers for PO receipts recorded before cost layers existed'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill_layers']:
+            created = costing.backfill_layers()
+            self.stdout.write(f'Opened {created} cost layer(s) from past PO receipts')
+
+        start = time.perf_counter()
+        stats = costing.recost_fifo(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Costed {stats['items']} item(s) across {stats['variants']} variant(s), "
+            f"{stats['layers']} layer(s), {stats['orders']} order(s) in {elapsed:.2f}s"
+        ))
+        if stats['uncosted_variants']:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['uncosted_variants']} variant(s) have sales but no cost layers; left unchanged"
+            ))
@@ -0,0 +1,12 @@
+"""Recompute stored available_quantity / needs_reorder for every inventory row."""
+from django.core.management.base import BaseCommand
+
+from apps.inventory.models import Inventory
+
+
+class Command(BaseCommand):
+    help = 'Backfill Inventory.available_quantity and needs_reorder in a single UPDATE.'
+
+    def handle(self, *args, **options):
+        updated = Inventory.objects.all().refresh_stock_state()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {updated} inventory row(s)'))
@@ -0,0 +1,62 @@
+"""
+Reprice a day's shipments against the current rate cards in one vectorized pass.
+
+    python manage.py reprice_shipments --date 2026-10-18
+    python manage.py reprice_shipments --date 2026-10-18 --apply
+"""
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.inventory.models import Shipment
+from apps.inventory.rates import get_rate_table
+
+
+class Command(BaseCommand):
+    help = "Recompute shipping_cost for one day's shipments from the carrier rate cards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='YYYY-MM-DD (default: yesterday)')
+        parser.add_argument('--apply', action='store_true', help='Write the new shipping_cost values')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+        else:
+            day = timezone.localdate() - timedelta(days=1)
+        start = timezone.make_aware(datetime.combine(day, dt_time.min))
+
+        rows = list(Shipment.objects.filter(
+            created_at__gte=start, created_at__lt=start + timedelta(days=1)
+        ).values_list('id', 'carrier_id', 'order__shipping_pincode', 'weight', 'length', 'width', 'height', 'shipping_cost'))
+        if not rows:
+            self.stdout.write(f'No shipments on {day}')
+            return
+
+        ids, carriers, pincodes, weights, lengths, widths, heights, costs = zip(*rows)
+        began = time.perf_counter()
+        prices = get_rate_table().price_many(carriers, pincodes, weights, lengths, widths, heights)
+        elapsed = time.perf_counter() - began
+
+        priced = ~np.isnan(prices)
+        old = np.array([float(cost) for cost in costs])
+        self.stdout.write(
+            f'{day}: priced {int(priced.sum())}/{len(rows)} shipment(s) in {elapsed * 1000:.1f}ms; '
+            f'recorded {old[priced].sum():.2f}, rate cards {prices[priced].sum():.2f}'
+        )
+
+        if options['apply']:
+            changed = [
+                Shipment(id=ids[i], shipping_cost=round(float(prices[i]), 2))
+                for i in np.flatnonzero(priced) if round(float(prices[i]), 2) != float(costs[i])
+            ]
+            with transaction.atomic():
+                Shipment.objects.bulk_update(changed, ['shipping_cost'], batch_size=1000)
+            self.stdout.write(self.style.SUCCESS(f'Updated {len(changed)} shipment(s)'))
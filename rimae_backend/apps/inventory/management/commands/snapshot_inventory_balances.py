@@ -0,0 +1,12 @@
+"""Record per-inventory balance snapshots (run periodically, e.g. nightly)."""
+from django.core.management.base import BaseCommand
+
+from apps.inventory.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Snapshot Inventory.quantity for every row so as-of queries only scan recent movements.'
+
+    def handle(self, *args, **options):
+        created = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f'Recorded {created} balance snapshot(s)'))
@@ -0,0 +1,49 @@
+"""
+Compute demand-driven reorder suggestions and optionally act on them.
+
+    python manage.py suggest_reorders
+    python manage.py suggest_reorders --draft --apply-levels
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.inventory import replenishment
+
+
+class Command(BaseCommand):
+    help = 'Suggest reorder points from sales velocity and lead times; draft POs per supplier and warehouse.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--draft', action='store_true', help='Draft purchase orders per supplier')
+        parser.add_argument('--apply-levels', action='store_true', help='Store reorder points on Inventory')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        suggestions = replenishment.suggest_reorders()
+        elapsed = time.perf_counter() - start
+        to_order = [s for s in suggestions if s['suggested_quantity'] > 0]
+        self.stdout.write(
+            f'{len(suggestions)} SKU(s) with sales analysed in {elapsed:.2f}s; {len(to_order)} need ordering'
+        )
+        for s in to_order:
+            self.stdout.write(
+                f"  {s['product_id']}/{s['variant_id'] or '-'}: order {s['suggested_quantity']} "
+                f"(velocity {s['daily_velocity']}/day, reorder point {s['reorder_point']}, "
+                f"available {s['available']}, on order {s['on_order']})"
+            )
+
+        with transaction.atomic():
+            if options['draft']:
+                orders = replenishment.draft_purchase_orders(suggestions)
+                self.stdout.write(self.style.SUCCESS(f'Drafted {len(orders)} purchase order(s)'))
+                unsourced = sum(1 for s in to_order if not s['supplier_id'])
+                if unsourced:
+                    self.stdout.write(self.style.WARNING(f'{unsourced} SKU(s) have no known supplier'))
+                unplaced = sum(1 for s in to_order if not s['warehouse_id'])
+                if unplaced:
+                    self.stdout.write(self.style.WARNING(f'{unplaced} SKU(s) have no active receiving warehouse'))
+            if options['apply_levels']:
+                updated = replenishment.apply_reorder_levels(suggestions)
+                self.stdout.write(self.style.SUCCESS(f'Updated reorder level on {updated} inventory row(s)'))
@@ -3,37 +3,123 @@ Inventory Models - Stock & Logistics tracking
 MVVM: Model Layer
 """
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
 import uuid
 
 
+class InventoryQuerySet(models.QuerySet):
+    def refresh_stock_state(self):
+        """
+        Recompute the stored availability columns in one UPDATE. Use after any
+        queryset .update() that touches quantity, reserved_quantity or reorder_level.
+        """
+        available = F('quantity') - F('reserved_quantity')
+        return self.update(
+            available_quantity=available,
+            needs_reorder=Case(
+                When(quantity__lte=F('reserved_quantity') + F('reorder_level'), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+
+class Warehouse(models.Model):
+    """A fulfillment centre that holds stock."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    address = models.TextField(blank=True)
+    pincode = models.CharField(max_length=10)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'warehouses'
+        ordering = ['code']
+
+    def __str__(self):
+        return self.code
+
+
+class PincodeZone(models.Model):
+    """Inclusive pincode range -> delivery zone. Ranges must not overlap."""
+    start = models.IntegerField()
+    end = models.IntegerField()
+    zone = models.CharField(max_length=20)
+
+    class Meta:
+        db_table = 'pincode_zones'
+        ordering = ['start']
+
+
+class ZoneDistance(models.Model):
+    """Road distance between two zones; looked up in either direction."""
+    from_zone = models.CharField(max_length=20)
+    to_zone = models.CharField(max_length=20)
+    distance_km = models.IntegerField()
+
+    class Meta:
+        db_table = 'zone_distances'
+        unique_together = ['from_zone', 'to_zone']
+
+
 class Inventory(models.Model):
-    """Stock tracking per product variant."""
+    """Stock tracking per product variant and warehouse."""
+    # Fields that availability is derived from
+    STOCK_FIELDS = {'quantity', 'reserved_quantity', 'reorder_level'}
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='inventory')
     variant = models.ForeignKey('products.ProductVariant', on_delete=models.CASCADE, null=True, blank=True, related_name='inventory')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, null=True, blank=True, related_name='inventory')
     
     quantity = models.IntegerField(default=0)
     reserved_quantity = models.IntegerField(default=0)  # Reserved for pending orders
     reorder_level = models.IntegerField(default=10)
     reorder_quantity = models.IntegerField(default=50)
     
-    warehouse_location = models.CharField(max_length=100, blank=True)
+    # Stored so low-stock queries run in SQL; maintained by save() / refresh_stock_state()
+    available_quantity = models.IntegerField(default=0, editable=False)
+    needs_reorder = models.BooleanField(default=True, editable=False)
+    
+    warehouse_location = models.CharField(max_length=100, blank=True)  # Bin/shelf within the warehouse
     batch_number = models.CharField(max_length=50, blank=True)
     
     last_restocked = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InventoryQuerySet.as_manager()
+
     class Meta:
         db_table = 'inventory'
-        unique_together = ['product', 'variant']
+        unique_together = ['product', 'variant', 'warehouse']
+        # NULLs are distinct in unique indexes, so rows without a variant or a
+        # warehouse (not yet assigned) need their own partial constraints
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'variant'], condition=Q(warehouse__isnull=True),
+                                    name='inventory_unassigned_uniq'),
+            models.UniqueConstraint(fields=['product', 'warehouse'], condition=Q(variant__isnull=True),
+                                    name='inventory_no_variant_uniq'),
+            models.UniqueConstraint(fields=['product'], condition=Q(variant__isnull=True, warehouse__isnull=True),
+                                    name='inventory_unassigned_no_variant_uniq'),
+        ]
+        indexes = [
+            # Only rows that need reordering; low-stock alerts read nothing else
+            models.Index(fields=['available_quantity'], name='inventory_reorder_idx',
+                         condition=Q(needs_reorder=True)),
+        ]
 
-    @property
-    def available_quantity(self):
-        return self.quantity - self.reserved_quantity
-    
-    @property
-    def needs_reorder(self):
-        return self.available_quantity <= self.reorder_level
+    def compute_stock_state(self):
+        self.available_quantity = self.quantity - self.reserved_quantity
+        self.needs_reorder = self.available_quantity <= self.reorder_level
+
+    def save(self, *args, **kwargs):
+        self.compute_stock_state()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.STOCK_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'available_quantity', 'needs_reorder'}
+        super().save(*args, **kwargs)
 
 
 class InventoryMovement(models.Model):
@@ -61,8 +147,28 @@ class InventoryMovement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # In PostgreSQL this is a table partitioned by month on created_at
+        # (see inventory/partitions.py); the DB primary key is (id, created_at).
         db_table = 'inventory_movements'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['inventory', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+
+class InventoryBalanceSnapshot(models.Model):
+    """Stock on hand per inventory row at a point in time; the base for as-of queries."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='snapshots')
+    as_of = models.DateTimeField()
+    quantity = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'inventory_balance_snapshots'
+        unique_together = ['inventory', 'as_of']
+        indexes = [models.Index(fields=['inventory', '-as_of'])]
 
 
 class Supplier(models.Model):
@@ -93,6 +199,7 @@ class PurchaseOrder(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     po_number = models.CharField(max_length=20, unique=True)
     supplier = models.ForeignKey(Supplier, on_delete=models.SET_NULL, null=True, related_name='purchase_orders')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, null=True, blank=True, related_name='purchase_orders')  # Receiving warehouse
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -127,6 +234,48 @@ class PurchaseOrderItem(models.Model):
         db_table = 'purchase_order_items'
 
 
+class CostLayer(models.Model):
+    """
+    A FIFO cost layer: units received together at one unit cost.
+    Fulfilled orders consume the oldest layers of their product/variant first.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='cost_layers')
+    variant = models.ForeignKey('products.ProductVariant', on_delete=models.SET_NULL, null=True, blank=True)
+    purchase_order_item = models.ForeignKey(PurchaseOrderItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='cost_layers')
+    
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity_received = models.IntegerField()
+    quantity_remaining = models.IntegerField()
+    
+    received_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'cost_layers'
+        ordering = ['received_at', 'created_at']
+        indexes = [
+            # Open layers in FIFO order, the only rows online costing reads
+            models.Index(fields=['product', 'variant', 'received_at'], name='cost_layer_open_idx',
+                         condition=Q(quantity_remaining__gt=0)),
+        ]
+
+
+class OrderAllocation(models.Model):
+    """Units of an order line reserved at a warehouse by the routing engine."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order_item = models.ForeignKey('orders.OrderItem', on_delete=models.CASCADE, related_name='allocations')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='allocations')
+    quantity = models.IntegerField()
+    fulfilled_at = models.DateTimeField(null=True, blank=True)  # Stock left the warehouse
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'order_allocations'
+        # No (order_item, warehouse) uniqueness: backordered units routed by a
+        # later run may land at a warehouse the line already has a row for
+
+
 class Shipment(models.Model):
     """Shipment tracking for orders."""
     STATUS_CHOICES = [
@@ -140,13 +289,16 @@ class Shipment(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    order = models.OneToOneField('orders.Order', on_delete=models.CASCADE, related_name='shipment')
+    # One per warehouse an order ships from
+    order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name='shipments')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.SET_NULL, null=True, blank=True, related_name='shipments')
     
     carrier = models.ForeignKey('Carrier', on_delete=models.SET_NULL, null=True)
-    tracking_number = models.CharField(max_length=100, blank=True)
+    tracking_number = models.CharField(max_length=100, blank=True, db_index=True)
     tracking_url = models.URLField(blank=True)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    status_updated_at = models.DateTimeField(null=True, blank=True)  # Time of the event behind `status`
     
     # Costs
     shipping_charged = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -179,6 +331,7 @@ class Carrier(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=20, unique=True)
     tracking_url_template = models.URLField(blank=True)  # With {tracking_number} placeholder
+    volumetric_divisor = models.IntegerField(default=5000)  # cm³ per chargeable kg
     is_active = models.BooleanField(default=True)
     
     # Performance metrics (updated via analytics)
@@ -189,3 +342,22 @@ class Carrier(models.Model):
 
     class Meta:
         db_table = 'carriers'
+
+
+class RateSlab(models.Model):
+    """
+    One rate card cell: what a carrier charges to deliver into a zone for
+    chargeable weights up to max_weight_grams (above the previous slab).
+    Zone '*' applies wherever the carrier has no zone-specific slab.
+    """
+    ANY_ZONE = '*'
+
+    carrier = models.ForeignKey(Carrier, on_delete=models.CASCADE, related_name='rate_slabs')
+    zone = models.CharField(max_length=20)
+    max_weight_grams = models.IntegerField()
+    rate = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'rate_slabs'
+        unique_together = ['carrier', 'zone', 'max_weight_grams']
+        ordering = ['carrier', 'zone', 'max_weight_grams']
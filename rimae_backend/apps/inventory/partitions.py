@@ -0,0 +1,196 @@
+"""
+Inventory Partitions - Monthly range partitions for the movement ledger
+MVVM: Service Layer (PostgreSQL only)
+
+`inventory_movements` is converted once into a table partitioned by month
+on created_at. After that, `ensure_partitions` keeps a few months created
+ahead of time, and old months can be detached (CONCURRENTLY, so writers are
+not blocked) and parked in an archive schema or dropped. Balance snapshots
+make detached months unnecessary for current as-of queries.
+
+There is no DEFAULT partition: PostgreSQL refuses DETACH ... CONCURRENTLY
+while one exists. A movement can only be written once its month has a
+partition, so run `ensure_partitions` (the command's default) on a
+schedule. Tables converted with a DEFAULT partition have it folded into
+monthly partitions on the next `ensure_partitions`.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import InventoryBalanceSnapshot
+
+TABLE = 'inventory_movements'
+ARCHIVE_SCHEMA = 'archive'
+_PARTITION_RE = re.compile(rf'^{TABLE}_(\d{{4}})_(\d{{2}})$')
+
+
+class PartitionError(Exception):
+    pass
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(start):
+    return f'{TABLE}_{start:%Y_%m}'
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitionError('Ledger partitioning requires PostgreSQL')
+
+
+def is_partitioned():
+    _require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = %s AND n.nspname = current_schema()", [TABLE]
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions():
+    """[(name, month_start)] of attached monthly partitions, oldest first."""
+    _require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s", [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions.append((name, start))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def _create_partition(cursor, start):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(start)}" PARTITION OF "{TABLE}" '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [start, add_months(start, 1)]
+    )
+
+
+def _retire_default_partition(cursor):
+    """Move the rows of a DEFAULT partition (older conversions) into monthly partitions."""
+    default = f'{TABLE}_default'
+    cursor.execute('SELECT to_regclass(%s)', [default])
+    if cursor.fetchone()[0] is None:
+        return False
+    cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{default}"')
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM \"{default}\"")
+    for (month,) in cursor.fetchall():
+        _create_partition(cursor, month.replace(tzinfo=dt_timezone.utc))
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{default}"')
+    cursor.execute(f'DROP TABLE "{default}"')
+    return True
+
+
+def ensure_partitions(months_ahead=3, start=None):
+    """Create monthly partitions from `start` (default: this month) through `months_ahead`."""
+    if not is_partitioned():
+        raise PartitionError(f'{TABLE} is not partitioned yet; run with --convert first')
+
+    first = month_start(start or timezone.now().astimezone(dt_timezone.utc))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        _retire_default_partition(cursor)
+        for offset in range(months_ahead + 1):
+            begin = add_months(first, offset)
+            _create_partition(cursor, begin)
+            created.append(partition_name(begin))
+    return created
+
+
+def convert_to_partitioned(months_ahead=3, keep_legacy=False):
+    """
+    One-off: rebuild the ledger as a partitioned table and copy existing rows.
+    Holds an exclusive lock on the ledger for the duration of the copy.
+    """
+    if is_partitioned():
+        return False
+
+    legacy = f'{TABLE}_legacy'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        # The partition key must be part of the primary key
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, created_at)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT {TABLE}_inventory_fk FOREIGN KEY (inventory_id) '
+            f'REFERENCES inventory (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT {TABLE}_created_by_fk FOREIGN KEY (created_by_id) '
+            f'REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(f'CREATE INDEX {TABLE}_inv_created_idx ON "{TABLE}" (inventory_id, created_at)')
+        cursor.execute(f'CREATE INDEX {TABLE}_created_idx ON "{TABLE}" (created_at)')
+        cursor.execute(f'CREATE INDEX {TABLE}_created_by_idx ON "{TABLE}" (created_by_id)')
+
+        cursor.execute(f'SELECT MIN(created_at), MAX(created_at) FROM "{legacy}"')
+        oldest, newest = cursor.fetchone()
+        now = timezone.now()
+        current = month_start((oldest or now).astimezone(dt_timezone.utc))
+        last = max(
+            add_months(month_start(now.astimezone(dt_timezone.utc)), months_ahead),
+            month_start((newest or now).astimezone(dt_timezone.utc)),
+        )
+        # Every legacy month gets a partition; no DEFAULT (see module docstring)
+        while current <= last:
+            _create_partition(cursor, current)
+            current = add_months(current, 1)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{legacy}"')
+        if not keep_legacy:
+            cursor.execute(f'DROP TABLE "{legacy}"')
+    return True
+
+
+def detach_partitions(before, drop=False):
+    """
+    Detach monthly partitions that end on or before `before` and before the
+    latest balance snapshot. Detached tables move to the archive schema
+    (or are dropped). Must run outside a transaction for CONCURRENTLY.
+    """
+    latest_snapshot = InventoryBalanceSnapshot.objects.order_by('-as_of').values_list('as_of', flat=True).first()
+    if latest_snapshot is None:
+        raise PartitionError('Take a balance snapshot before detaching ledger partitions')
+
+    cutoff = min(before, latest_snapshot)
+    detached = []
+    with connection.cursor() as cursor:
+        if not drop:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}')
+        for name, start in list_partitions():
+            if add_months(start, 1) > cutoff:
+                break
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}" CONCURRENTLY')
+            if drop:
+                cursor.execute(f'DROP TABLE "{name}"')
+            else:
+                cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA {ARCHIVE_SCHEMA}')
+            detached.append(name)
+    return detached
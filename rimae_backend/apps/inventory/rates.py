@@ -0,0 +1,193 @@
+"""
+Inventory Rates - Shipping rate cards as in-memory lookup arrays
+MVVM: Service Layer
+
+Rate slabs are expanded once per process into a dense array
+`rates[carrier, zone, bucket]`, where bucket = ceil(chargeable grams / grain).
+A quote is then the pincode's zone (binary search over the sorted ranges of
+the routing ZoneMap) plus one array read per carrier; repricing many
+shipments is a single fancy-indexed read. The table is rebuilt when rate
+slabs, carriers or zones change (signals bump a version key in the cache).
+
+Chargeable weight is the larger of actual and volumetric weight,
+L x W x H (cm) / the carrier's volumetric divisor.
+"""
+import math
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Carrier, RateSlab
+from .routing import get_zone_map, ZONES_VERSION_KEY
+
+RATES_VERSION_KEY = 'shipping:rates_version'
+
+
+def get_rate_settings():
+    return {
+        'grain_grams': getattr(settings, 'SHIPPING_RATE_GRAIN_GRAMS', 50),
+        'max_weight_grams': getattr(settings, 'SHIPPING_MAX_WEIGHT_GRAMS', 30000),
+        'item_weight_grams': getattr(settings, 'SHIPPING_ITEM_WEIGHT_GRAMS', {}),
+        'default_item_weight_grams': getattr(settings, 'SHIPPING_DEFAULT_ITEM_WEIGHT_GRAMS', 300),
+        'packaging_weight_grams': getattr(settings, 'SHIPPING_PACKAGING_WEIGHT_GRAMS', 150),
+    }
+
+
+def volumetric_grams(length, width, height, divisor):
+    if not (length and width and height):
+        return 0
+    return float(length) * float(width) * float(height) / divisor * 1000
+
+
+def chargeable_grams(weight_kg, length, width, height, divisor):
+    """Chargeable weight of a parcel; weight in kg, dimensions in cm."""
+    actual = float(weight_kg or 0) * 1000
+    return max(actual, volumetric_grams(length, width, height, divisor))
+
+
+class RateTable:
+    """Dense rates[carrier, zone, bucket] (NaN = not served) over a ZoneMap."""
+
+    def __init__(self, carriers, slabs, zone_map, grain_grams, max_weight_grams):
+        # carriers: [(id, code, volumetric_divisor)]; slabs: [(carrier_id, zone, max_grams, rate)]
+        self.zone_map = zone_map
+        self.grain = grain_grams
+        self.buckets = max_weight_grams // grain_grams + 1
+        self.carrier_ids = [carrier_id for carrier_id, _, _ in carriers]
+        self.carrier_codes = [code for _, code, _ in carriers]
+        self.divisors = np.array([divisor for _, _, divisor in carriers], dtype=np.float64)
+        position = {carrier_id: i for i, carrier_id in enumerate(self.carrier_ids)}
+
+        zones = zone_map.unknown + 1
+        self.rates = np.full((len(carriers), zones, self.buckets), np.nan)
+        fallback = np.full((len(carriers), self.buckets), np.nan)
+
+        cards = {}
+        for carrier_id, zone, max_grams, rate in slabs:
+            if carrier_id in position:
+                cards.setdefault((position[carrier_id], zone), []).append((max_grams, float(rate)))
+
+        for (carrier, zone), card in cards.items():
+            if zone == RateSlab.ANY_ZONE:
+                row = fallback[carrier]
+            elif zone in zone_map.zone_index:
+                row = self.rates[carrier, zone_map.zone_index[zone]]
+            else:
+                continue  # Zone not in the pincode tables; unreachable
+            low = 1
+            for max_grams, rate in sorted(card):
+                high = min(math.ceil(max_grams / self.grain), self.buckets - 1)
+                row[low:high + 1] = rate
+                low = high + 1
+            row[0] = row[1]  # Zero-weight parcels pay the first slab
+
+        # Zone-specific slabs win; '*' fills the rest, including unknown pincodes
+        missing = np.isnan(self.rates)
+        self.rates[missing] = np.broadcast_to(fallback[:, None, :], self.rates.shape)[missing]
+        self.has_rates = bool(self.rates.size) and not np.isnan(self.rates).all()
+
+    @classmethod
+    def load(cls):
+        config = get_rate_settings()
+        return cls(
+            list(Carrier.objects.filter(is_active=True).values_list('id', 'code', 'volumetric_divisor')),
+            list(RateSlab.objects.values_list('carrier_id', 'zone', 'max_weight_grams', 'rate')),
+            get_zone_map(),
+            config['grain_grams'],
+            config['max_weight_grams'],
+        )
+
+    def bucket(self, grams):
+        return math.ceil(grams / self.grain)
+
+    def quote(self, pincode, grams=None, weight_kg=None, length=None, width=None, height=None):
+        """
+        {carrier_code: Decimal rate} for every carrier serving the pincode at
+        this weight. Pass `grams` directly, or a parcel's weight and dimensions.
+        """
+        zone = self.zone_map.zone_of(pincode)
+        quotes = {}
+        for i, code in enumerate(self.carrier_codes):
+            weight = grams if grams is not None else chargeable_grams(
+                weight_kg, length, width, height, self.divisors[i]
+            )
+            bucket = self.bucket(weight)
+            if bucket < self.buckets and not math.isnan(self.rates[i, zone, bucket]):
+                quotes[code] = Decimal(f'{self.rates[i, zone, bucket]:.2f}')
+        return quotes
+
+    def price_many(self, carrier_ids, pincodes, weight_kg, lengths, widths, heights):
+        """
+        Vectorized repricing. All arguments are equal-length sequences (None
+        allowed for missing values). Returns float rates, NaN where unpriced.
+        """
+        position = {carrier_id: i for i, carrier_id in enumerate(self.carrier_ids)}
+        carriers = np.array([position.get(c, -1) for c in carrier_ids], dtype=np.intp)
+        pins = np.array([int(p) if str(p).strip().isdigit() else -1 for p in pincodes], dtype=np.int64)
+
+        def column(values):
+            return np.array([float(v) if v is not None else 0.0 for v in values])
+
+        known = carriers >= 0
+        divisors = self.divisors[np.where(known, carriers, 0)] if len(self.divisors) else np.ones(len(carriers))
+        volumetric = column(lengths) * column(widths) * column(heights) / divisors * 1000
+        grams = np.maximum(column(weight_kg) * 1000, volumetric)
+        buckets = np.ceil(grams / self.grain).astype(np.intp)
+
+        valid = known & (buckets < self.buckets) & (grams > 0)
+        prices = np.full(len(carriers), np.nan)
+        if valid.any():
+            zones = self.zone_map.zones_of(pins[valid])
+            prices[valid] = self.rates[carriers[valid], zones, buckets[valid]]
+        return prices
+
+
+_rate_table = None
+_rate_table_version = None
+
+
+def bump_rates_version(**kwargs):
+    cache.set(RATES_VERSION_KEY, timezone.now().timestamp(), None)
+
+
+def get_rate_table():
+    """This process's RateTable, rebuilt when rates or zones have changed."""
+    global _rate_table, _rate_table_version
+    version = (cache.get(RATES_VERSION_KEY), cache.get(ZONES_VERSION_KEY))
+    if _rate_table is None or version != _rate_table_version:
+        _rate_table = RateTable.load()
+        _rate_table_version = version
+    return _rate_table
+
+
+def cart_weight_grams(items):
+    """Estimated parcel weight for (variant size or None, quantity) pairs."""
+    config = get_rate_settings()
+    weights = config['item_weight_grams']
+    total = config['packaging_weight_grams']
+    for size, quantity in items:
+        total += weights.get(size, config['default_item_weight_grams']) * quantity
+    return total
+
+
+def cart_quotes(pincode, items):
+    """(grams, {carrier_code: rate}) for a cart's (variant size or None, quantity) pairs."""
+    grams = cart_weight_grams(items)
+    return grams, get_rate_table().quote(pincode, grams=grams)
+
+
+def shipment_rate(shipment):
+    """Rate for one shipment from its carrier's card, or None if it can't be priced."""
+    if shipment.carrier_id is None:
+        return None
+    table = get_rate_table()
+    if shipment.carrier_id not in table.carrier_ids:
+        return None
+    prices = table.price_many(
+        [shipment.carrier_id], [shipment.order.shipping_pincode],
+        [shipment.weight], [shipment.length], [shipment.width], [shipment.height],
+    )
+    return None if np.isnan(prices[0]) else Decimal(f'{prices[0]:.2f}')
@@ -0,0 +1,289 @@
+"""
+Inventory Replenishment - Demand-driven reorder points and draft POs
+MVVM: Service Layer
+
+Daily unit sales per product/variant come from one grouped query over
+OrderItem and land in a SKU x day numpy matrix, so every statistic below is
+a whole-matrix operation:
+
+- velocity: a blend of a short and a long moving average
+- seasonality: last year's rate over the coming window relative to the
+  trailing window before it, clipped, for SKUs with a year of history
+- variability: standard deviation of daily demand over the long window
+
+Supplier lead times (mean and spread) come from PurchaseOrder ordered_at ->
+received_at. Reorder point = demand over the lead time + safety stock;
+when stock on hand plus stock on order falls to it, the suggestion tops up
+to the reorder point plus `cover_days` of demand.
+
+Each SKU is received at the active warehouse that shipped most of it over
+the long window (routing allocations), else at the configured default, so
+received stock lands where routing can allocate it.
+"""
+import math
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import OrderItem
+from .models import Inventory, OrderAllocation, PurchaseOrder, PurchaseOrderItem, Warehouse
+
+# Orders that never consumed stock
+EXCLUDED_ORDER_STATUSES = ('cancelled',)
+# POs whose unreceived units are still coming (drafts count so reruns don't double up)
+OPEN_PO_STATUSES = ('draft', 'ordered', 'partial')
+
+
+def get_replenishment_settings():
+    return {
+        'history_days': getattr(settings, 'REPLENISHMENT_HISTORY_DAYS', 730),
+        'short_window': getattr(settings, 'REPLENISHMENT_SHORT_WINDOW_DAYS', 28),
+        'long_window': getattr(settings, 'REPLENISHMENT_LONG_WINDOW_DAYS', 90),
+        'short_weight': getattr(settings, 'REPLENISHMENT_SHORT_WEIGHT', 0.6),
+        'season_window': getattr(settings, 'REPLENISHMENT_SEASON_WINDOW_DAYS', 30),
+        'season_clip': getattr(settings, 'REPLENISHMENT_SEASON_CLIP', (0.5, 2.0)),
+        'service_z': getattr(settings, 'REPLENISHMENT_SERVICE_Z', 1.65),  # ~95% cycle service level
+        'cover_days': getattr(settings, 'REPLENISHMENT_COVER_DAYS', 30),
+        'default_lead_days': getattr(settings, 'REPLENISHMENT_DEFAULT_LEAD_DAYS', 14),
+        'receiving_warehouse': getattr(settings, 'REPLENISHMENT_RECEIVING_WAREHOUSE', None),
+    }
+
+
+# ============ DEMAND ============
+
+def demand_matrix(end=None, history_days=730):
+    """
+    Returns (keys, matrix): keys[i] = (product_id, variant_id) and
+    matrix[i, d] = units sold on day d, the last column being `end` (a date).
+    """
+    end = end or timezone.localdate()
+    start = end - timedelta(days=history_days - 1)
+
+    rows = (
+        OrderItem.objects.filter(
+            order__created_at__date__gte=start, order__created_at__date__lte=end, product__isnull=False
+        )
+        .exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+        .annotate(day=TruncDate('order__created_at'))
+        .values_list('product_id', 'variant_id', 'day')
+        .annotate(units=Sum('quantity'))
+        .order_by()
+    )
+
+    index = {}
+    sku_idx, day_idx, units = [], [], []
+    for product_id, variant_id, day, total in rows.iterator(chunk_size=10000):
+        sku_idx.append(index.setdefault((product_id, variant_id), len(index)))
+        day_idx.append((day - start).days)
+        units.append(total)
+
+    matrix = np.zeros((len(index), history_days), dtype=np.float64)
+    if index:
+        np.add.at(matrix, (np.array(sku_idx), np.array(day_idx)), np.array(units, dtype=np.float64))
+    return list(index), matrix
+
+
+def forecast(matrix, config):
+    """Daily demand rate and its standard deviation per row of `matrix`."""
+    days = matrix.shape[1]
+    short = matrix[:, -config['short_window']:].mean(axis=1)
+    long_window = matrix[:, -config['long_window']:]
+    rate = config['short_weight'] * short + (1 - config['short_weight']) * long_window.mean(axis=1)
+    sigma = long_window.std(axis=1)
+
+    season = np.ones(len(matrix))
+    window, trailing = config['season_window'], config['long_window']
+    if days >= 365 + trailing:
+        # Last year: the window we're about to sell into vs. the trailing window before it
+        anchor = days - 365
+        ahead = matrix[:, anchor:anchor + window].mean(axis=1)
+        before = matrix[:, anchor - trailing:anchor].mean(axis=1)
+        has_base = before > 0
+        low, high = config['season_clip']
+        season[has_base] = np.clip(ahead[has_base] / before[has_base], low, high)
+
+    return rate * season, sigma, season
+
+
+# ============ SUPPLY ============
+
+def supplier_lead_times():
+    """{supplier_id: (mean_days, std_days)} from received purchase orders."""
+    samples = defaultdict(list)
+    for supplier_id, ordered_at, received_at in PurchaseOrder.objects.filter(
+        supplier__isnull=False, ordered_at__isnull=False, received_at__isnull=False
+    ).values_list('supplier_id', 'ordered_at', 'received_at'):
+        samples[supplier_id].append(max((received_at - ordered_at).total_seconds() / 86400, 0))
+
+    return {
+        supplier_id: (float(np.mean(days)), float(np.std(days)) if len(days) > 1 else 0.0)
+        for supplier_id, days in samples.items()
+    }
+
+
+def latest_sources():
+    """{(product_id, variant_id): (supplier_id, unit_cost)} from the most recent PO line."""
+    sources = {}
+    for product_id, variant_id, supplier_id, unit_cost in PurchaseOrderItem.objects.filter(
+        purchase_order__supplier__isnull=False
+    ).exclude(purchase_order__status='cancelled').order_by('purchase_order__created_at').values_list(
+        'product_id', 'variant_id', 'purchase_order__supplier_id', 'unit_cost'
+    ):
+        sources[(product_id, variant_id)] = (supplier_id, unit_cost)
+    return sources
+
+
+def on_order():
+    """{(product_id, variant_id): units ordered but not yet received}."""
+    return {
+        (row['product_id'], row['variant_id']): row['pending']
+        for row in PurchaseOrderItem.objects.filter(purchase_order__status__in=OPEN_PO_STATUSES)
+        .values('product_id', 'variant_id')
+        .annotate(pending=Sum(F('quantity_ordered') - F('quantity_received')))
+        .order_by()
+    }
+
+
+def receiving_warehouses(since):
+    """{(product_id, variant_id): warehouse_id} of the active warehouse that shipped the most since `since`."""
+    best = {}
+    for product_id, variant_id, warehouse_id, units in (
+        OrderAllocation.objects.filter(created_at__gte=since, warehouse__is_active=True)
+        .values_list('order_item__product_id', 'order_item__variant_id', 'warehouse_id')
+        .annotate(units=Sum('quantity'))
+        .order_by()
+    ):
+        key = (product_id, variant_id)
+        if key not in best or units > best[key][1]:
+            best[key] = (warehouse_id, units)
+    return {key: warehouse_id for key, (warehouse_id, _) in best.items()}
+
+
+def default_receiving_warehouse(config):
+    warehouses = Warehouse.objects.filter(is_active=True)
+    if config['receiving_warehouse']:
+        warehouses = warehouses.filter(code=config['receiving_warehouse'])
+    return warehouses.values_list('id', flat=True).first()
+
+
+# ============ SUGGESTIONS ============
+
+def suggest_reorders(end=None):
+    """
+    Reorder suggestions for every SKU with sales history. Each suggestion is a
+    dict; `suggested_quantity` is 0 when the SKU doesn't need ordering yet.
+    """
+    config = get_replenishment_settings()
+    keys, matrix = demand_matrix(end, config['history_days'])
+    if not keys:
+        return []
+
+    rate, sigma, season = forecast(matrix, config)
+    lead_times = supplier_lead_times()
+    sources = latest_sources()
+    pending = on_order()
+    receiving = receiving_warehouses(timezone.now() - timedelta(days=config['long_window']))
+    default_warehouse = default_receiving_warehouse(config)
+    # Suppliers ship to the network, so stock is summed across warehouses
+    stock = defaultdict(lambda: ([], 0))
+    for inventory_id, product_id, variant_id, available in Inventory.objects.values_list(
+        'id', 'product_id', 'variant_id', 'available_quantity'
+    ):
+        ids, total = stock[(product_id, variant_id)]
+        stock[(product_id, variant_id)] = (ids + [inventory_id], total + available)
+
+    suggestions = []
+    for i, key in enumerate(keys):
+        supplier_id, unit_cost = sources.get(key, (None, None))
+        lead_mean, lead_std = lead_times.get(supplier_id, (config['default_lead_days'], 0.0))
+        daily = float(rate[i])
+
+        # Safety stock covers demand noise over the lead time and lead-time noise
+        safety = config['service_z'] * math.sqrt(lead_mean * sigma[i] ** 2 + (daily * lead_std) ** 2)
+        reorder_point = math.ceil(daily * lead_mean + safety)
+        order_up_to = reorder_point + math.ceil(daily * config['cover_days'])
+
+        inventory_ids, available = stock.get(key, ([], 0))
+        incoming = pending.get(key, 0) or 0
+        position = available + incoming
+        quantity = order_up_to - position if daily > 0 and position <= reorder_point else 0
+
+        suggestions.append({
+            'product_id': key[0],
+            'variant_id': key[1],
+            'inventory_ids': inventory_ids,
+            'supplier_id': supplier_id,
+            'warehouse_id': receiving.get(key, default_warehouse),
+            'unit_cost': unit_cost,
+            'daily_velocity': round(daily, 3),
+            'seasonality': round(float(season[i]), 3),
+            'lead_time_days': round(lead_mean, 1),
+            'safety_stock': math.ceil(safety),
+            'reorder_point': reorder_point,
+            'available': available,
+            'on_order': incoming,
+            'suggested_quantity': max(quantity, 0),
+        })
+    return suggestions
+
+
+def apply_reorder_levels(suggestions):
+    """
+    Write computed reorder points onto Inventory.reorder_level, split evenly
+    across the warehouses that stock the SKU.
+    """
+    rows = [
+        Inventory(id=inventory_id, reorder_level=math.ceil(s['reorder_point'] / len(s['inventory_ids'])))
+        for s in suggestions for inventory_id in s['inventory_ids']
+    ]
+    Inventory.objects.bulk_update(rows, ['reorder_level'], batch_size=1000)
+    Inventory.objects.filter(id__in=[row.id for row in rows]).refresh_stock_state()
+    return len(rows)
+
+
+@transaction.atomic
+def draft_purchase_orders(suggestions, user=None):
+    """
+    One draft PurchaseOrder per supplier and receiving warehouse for every
+    suggestion with a quantity. Suggestions with no known supplier or no
+    receiving warehouse (no active warehouses) are skipped. Returns the
+    created POs.
+    """
+    by_destination = defaultdict(list)
+    for suggestion in suggestions:
+        if suggestion['suggested_quantity'] > 0 and suggestion['supplier_id'] and suggestion['warehouse_id']:
+            by_destination[(suggestion['supplier_id'], suggestion['warehouse_id'])].append(suggestion)
+
+    stamp = timezone.now().strftime('%y%m%d%H%M%S')
+    orders = []
+    for (supplier_id, warehouse_id), lines in by_destination.items():
+        po = PurchaseOrder.objects.create(
+            # Random suffix: drafts from runs in the same second must not collide (20 chars)
+            po_number=f'PO{stamp}{uuid.uuid4().hex[:6].upper()}',
+            supplier_id=supplier_id,
+            warehouse_id=warehouse_id,
+            status='draft',
+            total_amount=sum(line['unit_cost'] * line['suggested_quantity'] for line in lines),
+            notes='Drafted from reorder suggestions',
+            created_by=user,
+        )
+        PurchaseOrderItem.objects.bulk_create([
+            PurchaseOrderItem(
+                purchase_order=po,
+                product_id=line['product_id'],
+                variant_id=line['variant_id'],
+                quantity_ordered=line['suggested_quantity'],
+                unit_cost=line['unit_cost'],
+                total_cost=line['unit_cost'] * line['suggested_quantity'],
+            )
+            for line in lines
+        ])
+        orders.append(po)
+    return orders
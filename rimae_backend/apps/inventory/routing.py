@@ -0,0 +1,358 @@
+"""
+Inventory Routing - Pick fulfillment warehouses for orders
+MVVM: Service Layer
+
+Orders are routed in batches against an in-memory snapshot of per-warehouse
+availability, decremented as each order is placed so one batch never
+over-allocates. For each order the router repeatedly picks the warehouse
+that can ship the most of what is still needed, breaking ties by distance.
+A warehouse that can ship everything therefore always wins (one shipment),
+and the nearest such warehouse is chosen.
+
+An order stays routable while any of its lines has units without an
+allocation, so lines backordered in one run are routed by a later one
+once stock arrives. Runs walk the routable orders once with a
+(created_at, id) cursor, so orders that can't be placed yet don't hold
+back the ones behind them.
+
+Distances come from `ZoneMap`: pincode ranges resolved by binary search and
+a zone x zone distance matrix, both held per process and rebuilt when the
+zone tables change (signals bump a version key in the shared cache).
+"""
+from bisect import bisect_right
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from .models import Inventory, OrderAllocation, PincodeZone, Warehouse, ZoneDistance
+
+ROUTABLE_STATUSES = ('confirmed', 'processing')
+ZONES_VERSION_KEY = 'routing:zones_version'
+
+
+def get_routing_settings():
+    return {
+        'batch_size': getattr(settings, 'ROUTING_BATCH_SIZE', 500),
+        'unknown_distance_km': getattr(settings, 'ROUTING_UNKNOWN_DISTANCE_KM', 3000),
+    }
+
+
+# ============ ZONES ============
+
+class ZoneMap:
+    """Pincode -> zone index by bisect over sorted ranges; zone distances as a matrix."""
+
+    def __init__(self, ranges, distances, unknown_distance_km):
+        ranges = sorted(ranges)
+        zones = sorted({zone for _, _, zone in ranges} | {z for a, b, _ in distances for z in (a, b)})
+        self.zone_index = {zone: i for i, zone in enumerate(zones)}
+        self.unknown = len(zones)  # Pincodes outside every range
+
+        self.starts = [start for start, _, _ in ranges]
+        self.ends = [end for _, end, _ in ranges]
+        self.range_zones = [self.zone_index[zone] for _, _, zone in ranges]
+
+        size = len(zones) + 1
+        self.matrix = np.full((size, size), unknown_distance_km, dtype=np.int32)
+        idx = np.arange(len(zones))
+        self.matrix[idx, idx] = 0
+        for from_zone, to_zone, km in distances:
+            a, b = self.zone_index[from_zone], self.zone_index[to_zone]
+            self.matrix[a, b] = self.matrix[b, a] = km
+
+    @classmethod
+    def load(cls):
+        return cls(
+            list(PincodeZone.objects.values_list('start', 'end', 'zone')),
+            list(ZoneDistance.objects.values_list('from_zone', 'to_zone', 'distance_km')),
+            get_routing_settings()['unknown_distance_km'],
+        )
+
+    def zone_of(self, pincode):
+        try:
+            value = int(pincode)
+        except (TypeError, ValueError):
+            return self.unknown
+        pos = bisect_right(self.starts, value) - 1
+        if pos >= 0 and value <= self.ends[pos]:
+            return self.range_zones[pos]
+        return self.unknown
+
+    def zones_of(self, pincodes):
+        """Vectorized zone_of for an array of integer pincodes (-1 for unparseable)."""
+        values = np.asarray(pincodes, dtype=np.int64)
+        if not self.starts:
+            return np.full(len(values), self.unknown, dtype=np.intp)
+        pos = np.searchsorted(np.asarray(self.starts), values, side='right') - 1
+        clipped = np.maximum(pos, 0)
+        inside = (pos >= 0) & (values <= np.asarray(self.ends)[clipped])
+        return np.where(inside, np.asarray(self.range_zones)[clipped], self.unknown)
+
+
+_zone_map = None
+_zone_map_version = None
+
+
+def bump_zone_version(**kwargs):
+    cache.set(ZONES_VERSION_KEY, timezone.now().timestamp(), None)
+
+
+def get_zone_map():
+    """This process's ZoneMap, rebuilt when the zone tables have changed."""
+    global _zone_map, _zone_map_version
+    version = cache.get(ZONES_VERSION_KEY)
+    if _zone_map is None or version != _zone_map_version:
+        _zone_map = ZoneMap.load()
+        _zone_map_version = version
+    return _zone_map
+
+
+# ============ ROUTER ============
+
+class Router:
+    """
+    Routes orders against `stock`: {sku: int array of available units per
+    warehouse position}. `warehouse_zones[i]` is warehouse i's zone index.
+    The arrays are decremented as orders are routed.
+    """
+
+    def __init__(self, zone_map, warehouse_zones, stock):
+        self.zone_map = zone_map
+        self.warehouse_zones = np.asarray(warehouse_zones, dtype=np.intp)
+        self.stock = stock
+        self._empty = np.zeros(len(self.warehouse_zones), dtype=np.int64)
+
+    def route(self, pincode, lines):
+        """
+        lines: [(sku, quantity)]. Returns (allocations, backordered) where
+        allocations are (line index, warehouse position, quantity) and
+        backordered are (line index, quantity) nobody could supply.
+        """
+        if not len(self.warehouse_zones):
+            return [], [(line, quantity) for line, (_, quantity) in enumerate(lines)]
+        distance = self.zone_map.matrix[self.zone_map.zone_of(pincode), self.warehouse_zones]
+        # One row per SKU: lines of the same SKU draw on the same stock
+        skus = list(dict.fromkeys(sku for sku, _ in lines))
+        row_of = {sku: row for row, sku in enumerate(skus)}
+        available = np.stack([self.stock.get(sku, self._empty) for sku in skus])
+        need = np.zeros(len(skus), dtype=np.int64)
+        for sku, quantity in lines:
+            need[row_of[sku]] += quantity
+
+        placed = []
+        while need.any():
+            supply = np.minimum(available, need[:, None]).sum(axis=0)
+            # Most units first, nearest on ties (lexsort sorts by the last key first)
+            best = np.lexsort((distance, -supply))[0]
+            if supply[best] == 0:
+                break
+            taken = np.minimum(available[:, best], need)
+            for row in np.flatnonzero(taken):
+                placed.append((int(row), int(best), int(taken[row])))
+                self.stock[skus[row]][best] -= taken[row]
+            available[:, best] -= taken
+            need -= taken
+
+        # Split each SKU's placements back over its lines, in line order
+        remaining = [quantity for _, quantity in lines]
+        lines_of = defaultdict(list)
+        for line, (sku, _) in enumerate(lines):
+            lines_of[row_of[sku]].append(line)
+        allocations = []
+        for row, warehouse, quantity in placed:
+            for line in lines_of[row]:
+                part = min(quantity, remaining[line])
+                if part:
+                    allocations.append((line, warehouse, part))
+                    remaining[line] -= part
+                    quantity -= part
+
+        backordered = [(line, quantity) for line, quantity in enumerate(remaining) if quantity]
+        return allocations, backordered
+
+
+# ============ BATCH ROUTING ============
+
+def unallocated_items():
+    """Order lines with units not yet allocated to a warehouse, annotated with `allocated`."""
+    allocated = OrderAllocation.objects.filter(order_item=OuterRef('pk')).values('order_item').annotate(
+        total=Sum('quantity')
+    ).values('total')[:1]
+    return OrderItem.objects.filter(product__isnull=False).annotate(
+        allocated=Coalesce(Subquery(allocated), Value(0)),
+    ).filter(quantity__gt=F('allocated'))
+
+
+def unrouted_orders():
+    return Order.objects.filter(status__in=ROUTABLE_STATUSES).filter(
+        Exists(unallocated_items().filter(order=OuterRef('pk')))
+    ).order_by('created_at', 'id')
+
+
+@transaction.atomic
+def route_orders(order_ids=None, batch_size=None, commit=True, after=None):
+    """
+    Route one batch of orders with unallocated units (oldest first, after
+    the `after` cursor). With commit, reserves the allocated units on each
+    warehouse's Inventory row and records OrderAllocation rows. Returns a
+    summary with one route per order and the cursor for the next batch
+    (None once there are no more orders).
+    """
+    batch_size = batch_size or get_routing_settings()['batch_size']
+    orders = unrouted_orders()
+    if order_ids is not None:
+        orders = orders.filter(id__in=order_ids)
+    if after is not None:
+        created_at, last_id = after
+        orders = orders.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=last_id))
+    orders = list(orders.values_list('id', 'shipping_pincode', 'created_at')[:batch_size])
+    cursor = (orders[-1][2], orders[-1][0]) if len(orders) == batch_size else None
+
+    items = defaultdict(list)
+    for item in unallocated_items().filter(
+        order_id__in=[order_id for order_id, _, _ in orders]
+    ).values('id', 'order_id', 'product_id', 'variant_id', 'quantity', 'allocated'):
+        item['quantity'] -= item['allocated']
+        items[item['order_id']].append(item)
+
+    warehouses = list(Warehouse.objects.filter(is_active=True).values_list('id', 'pincode'))
+    zone_map = get_zone_map()
+    position = {warehouse_id: i for i, (warehouse_id, _) in enumerate(warehouses)}
+
+    rows = Inventory.objects.filter(
+        warehouse_id__in=position,
+        product_id__in={item['product_id'] for lines in items.values() for item in lines},
+    )
+    if commit:
+        rows = rows.select_for_update().order_by('id')
+
+    stock = {}
+    inventory_ids = {}
+    for inventory_id, product_id, variant_id, warehouse_id, available in rows.values_list(
+        'id', 'product_id', 'variant_id', 'warehouse_id', 'available_quantity'
+    ):
+        sku = (product_id, variant_id)
+        stock.setdefault(sku, np.zeros(len(warehouses), dtype=np.int64))[position[warehouse_id]] = max(available, 0)
+        inventory_ids[(sku, position[warehouse_id])] = inventory_id
+
+    router = Router(zone_map, [zone_map.zone_of(pincode) for _, pincode in warehouses], stock)
+    routes, allocations = [], []
+    reserved = defaultdict(int)
+    for order_id, pincode, _ in orders:
+        lines = items.get(order_id, [])
+        if not lines:
+            continue
+        placed, backordered = router.route(
+            pincode, [((line['product_id'], line['variant_id']), line['quantity']) for line in lines]
+        )
+        for line, warehouse, quantity in placed:
+            item = lines[line]
+            allocations.append(OrderAllocation(
+                order_item_id=item['id'], warehouse_id=warehouses[warehouse][0], quantity=quantity
+            ))
+            reserved[inventory_ids[((item['product_id'], item['variant_id']), warehouse)]] += quantity
+        routes.append({
+            'order_id': order_id,
+            'warehouses': sorted({warehouses[warehouse][0] for _, warehouse, _ in placed}, key=str),
+            'backordered': [{'order_item_id': lines[line]['id'], 'quantity': qty} for line, qty in backordered],
+        })
+
+    if commit and allocations:
+        OrderAllocation.objects.bulk_create(allocations, batch_size=1000)
+        _adjust(reserved, reserved_delta=1)
+
+    return {
+        'orders': len(routes),
+        'single_warehouse': sum(1 for r in routes if len(r['warehouses']) == 1 and not r['backordered']),
+        'split': sum(1 for r in routes if len(r['warehouses']) > 1),
+        'backordered': sum(1 for r in routes if r['backordered']),
+        'allocated': len(allocations),
+        'routes': routes,
+        'cursor': cursor,
+    }
+
+
+def _adjust(units_by_inventory, reserved_delta=0, quantity_delta=0):
+    """Add units x delta to reserved_quantity / quantity on many rows in one UPDATE."""
+    def by_row(delta):
+        return Case(
+            *[When(id=inventory_id, then=Value(units * delta)) for inventory_id, units in units_by_inventory.items()],
+            default=Value(0),
+        )
+
+    changes = {}
+    if reserved_delta:
+        changes['reserved_quantity'] = F('reserved_quantity') + by_row(reserved_delta)
+    if quantity_delta:
+        changes['quantity'] = F('quantity') + by_row(quantity_delta)
+    rows = Inventory.objects.filter(id__in=list(units_by_inventory))
+    rows.update(**changes)
+    rows.refresh_stock_state()
+
+
+def _open_allocations(order_id, warehouse_id=None):
+    allocations = OrderAllocation.objects.select_for_update().filter(
+        order_item__order_id=order_id, fulfilled_at__isnull=True
+    )
+    if warehouse_id is not None:
+        allocations = allocations.filter(warehouse_id=warehouse_id)
+    allocations = list(allocations.select_related('order_item'))
+    keys = {(a.order_item.product_id, a.order_item.variant_id, a.warehouse_id) for a in allocations}
+    inventory = {
+        (row.product_id, row.variant_id, row.warehouse_id): row
+        for row in Inventory.objects.select_for_update().filter(
+            warehouse_id__in={key[2] for key in keys}, product_id__in={key[0] for key in keys}
+        ).order_by('id')
+        if (row.product_id, row.variant_id, row.warehouse_id) in keys
+    }
+    return allocations, inventory
+
+
+@transaction.atomic
+def fulfil_allocations(order_id, user=None, warehouse_id=None):
+    """
+    Stock for an order left its warehouses: take it off quantity and
+    reserved. With `warehouse_id`, only that warehouse's shipment left.
+    """
+    from .views import queue_movement
+
+    allocations, inventory = _open_allocations(order_id, warehouse_id)
+    now = timezone.now()
+    for allocation in allocations:
+        item = allocation.order_item
+        row = inventory.get((item.product_id, item.variant_id, allocation.warehouse_id))
+        if row is not None:
+            previous = row.quantity
+            row.quantity -= allocation.quantity
+            row.reserved_quantity = max(row.reserved_quantity - allocation.quantity, 0)
+            row.save(update_fields=['quantity', 'reserved_quantity', 'updated_at'])
+            queue_movement(
+                row, 'out', allocation.quantity, previous, user=user,
+                reference_type='order', reference_id=order_id,
+            )
+        allocation.fulfilled_at = now
+    OrderAllocation.objects.bulk_update(allocations, ['fulfilled_at'])
+    return len(allocations)
+
+
+@transaction.atomic
+def release_allocations(order_id):
+    """Order cancelled before shipping: give reserved units back."""
+    allocations, inventory = _open_allocations(order_id)
+    released = defaultdict(int)
+    for allocation in allocations:
+        item = allocation.order_item
+        row = inventory.get((item.product_id, item.variant_id, allocation.warehouse_id))
+        if row is not None:
+            released[row.id] += allocation.quantity
+    if released:
+        _adjust(released, reserved_delta=-1)
+    OrderAllocation.objects.filter(id__in=[a.id for a in allocations]).delete()
+    return len(allocations)
@@ -3,25 +3,39 @@ Inventory Serializers
 MVVM: ViewModel Layer
 """
 from rest_framework import serializers
+from config.fieldsets import SparseFieldsetMixin
 from .models import (
     Inventory, InventoryMovement, Supplier, 
-    PurchaseOrder, PurchaseOrderItem, Shipment, Carrier
+    PurchaseOrder, PurchaseOrderItem, Shipment, Carrier, Warehouse
 )
 
 
-class InventorySerializer(serializers.ModelSerializer):
+class WarehouseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Warehouse
+        fields = '__all__'
+
+
+class InventorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
-    variant_name = serializers.CharField(source='variant.name', read_only=True)
+    variant_name = serializers.CharField(source='variant.size', read_only=True)
     sku = serializers.SerializerMethodField()
+    warehouse_code = serializers.CharField(source='warehouse.code', read_only=True, default=None)
     available_quantity = serializers.IntegerField(read_only=True)
     needs_reorder = serializers.BooleanField(read_only=True)
+    expandable_fields = {
+        'product': 'apps.products.serializers.ProductSerializer',
+        'variant': 'apps.products.serializers.ProductVariantSerializer',
+    }
+    sparse_requires = {'sku': ['product__sku']}
     
     class Meta:
         model = Inventory
         fields = '__all__'
     
     def get_sku(self, obj):
-        return obj.variant.sku if obj.variant else obj.product.sku
+        # Variants have no SKU of their own
+        return obj.product.sku
 
 
 class InventoryMovementSerializer(serializers.ModelSerializer):
@@ -54,6 +68,8 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = '__all__'
+        # Received stock has to land in a warehouse that routing allocates from
+        extra_kwargs = {'warehouse': {'required': True, 'allow_null': False}}
 
 
 class CarrierSerializer(serializers.ModelSerializer):
@@ -76,6 +92,6 @@ class ShipmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shipment
         fields = [
-            'order', 'carrier', 'tracking_number', 'shipping_charged',
+            'order', 'warehouse', 'carrier', 'tracking_number', 'shipping_charged',
             'shipping_cost', 'packaging_cost', 'weight', 'length', 'width', 'height'
         ]
@@ -0,0 +1,16 @@
+"""
+Inventory signals - keep per-process routing and rate tables fresh
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .models import Carrier, PincodeZone, RateSlab, ZoneDistance
+from .rates import bump_rates_version
+from .routing import bump_zone_version
+
+for model in (PincodeZone, ZoneDistance):
+    post_save.connect(bump_zone_version, sender=model, dispatch_uid=f'routing_zones_save_{model.__name__}')
+    post_delete.connect(bump_zone_version, sender=model, dispatch_uid=f'routing_zones_delete_{model.__name__}')
+
+for model in (Carrier, RateSlab):
+    post_save.connect(bump_rates_version, sender=model, dispatch_uid=f'shipping_rates_save_{model.__name__}')
+    post_delete.connect(bump_rates_version, sender=model, dispatch_uid=f'shipping_rates_delete_{model.__name__}')
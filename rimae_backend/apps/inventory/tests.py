@@ -0,0 +1,24 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from .routing import Router, ZoneMap
+
+
+class RouterTests(SimpleTestCase):
+
+    def router(self, stock, warehouse_zones=(0,)):
+        return Router(ZoneMap([], [], 100), list(warehouse_zones), stock)
+
+    def test_lines_of_the_same_sku_share_stock(self):
+        stock = {'a': np.array([3], dtype=np.int64)}
+        allocations, backordered = self.router(stock).route('1', [('a', 3), ('a', 3)])
+        self.assertEqual(allocations, [(0, 0, 3)])
+        self.assertEqual(backordered, [(1, 3)])
+        self.assertEqual(stock['a'].tolist(), [0])
+
+    def test_same_sku_split_across_warehouses(self):
+        stock = {'a': np.array([2, 3], dtype=np.int64), 'b': np.array([0, 1], dtype=np.int64)}
+        allocations, backordered = self.router(stock, (0, 0)).route('1', [('a', 2), ('b', 1), ('a', 2)])
+        self.assertEqual(sorted(allocations), [(0, 1, 2), (1, 1, 1), (2, 0, 1), (2, 1, 1)])
+        self.assertEqual(backordered, [])
+        self.assertEqual(stock['a'].tolist(), [1, 0])
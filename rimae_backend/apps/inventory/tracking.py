@@ -0,0 +1,229 @@
+"""
+Inventory Tracking - Bulk carrier status ingestion and order sync
+MVVM: Service Layer
+
+A carrier feed is a list of (tracking_number, status, timestamp) events.
+Events are collapsed to the furthest status per tracking number, shipments
+are resolved through the tracking_number index in chunks, and each target
+status is applied with one UPDATE per chunk, limited to shipments still in
+an earlier status, so replayed or out-of-order events can never move a
+shipment backwards. Orders are then synced with two set-based UPDATEs.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.events import outbox
+from apps.orders.models import Order
+from .models import Shipment
+
+# Shipment statuses in the order they happen. A failed delivery attempt can
+# be followed by another out_for_delivery, which is the one step back allowed.
+STATUS_RANK = {
+    'pending': 0,
+    'picked_up': 1,
+    'in_transit': 2,
+    'out_for_delivery': 3,
+    'failed': 4,
+    'delivered': 5,
+    'returned': 6,
+}
+RETRY_TRANSITIONS = {('failed', 'out_for_delivery')}
+
+# Shipment statuses at which the goods have left the warehouse
+FULFILLED_SHIPMENT_STATUSES = ('picked_up', 'in_transit', 'out_for_delivery', 'failed', 'delivered')
+
+# Order statuses a shipment update may move forward from
+ORDER_STATUSES_BEFORE_SHIPPED = ('pending', 'confirmed', 'processing')
+
+CHUNK_SIZE = 1000
+REPORT_LIMIT = 100
+
+
+def normalize_status(value):
+    return (value or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _parse_time(value):
+    parsed = parse_datetime((value or '').strip()) if value else None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+# ============ FEED PARSING ============
+
+def parse_feed(data, fmt=None):
+    """
+    Parse CSV (header: tracking_number,status,timestamp) or JSON lines.
+    Returns (events, invalid) where events are (tracking_number, status, timestamp).
+    """
+    text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+    if fmt is None:
+        fmt = 'jsonl' if text.lstrip().startswith('{') else 'csv'
+
+    if fmt == 'jsonl':
+        rows = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((line_no, json.loads(line)))
+            except ValueError:
+                rows.append((line_no, None))
+    else:
+        rows = list(enumerate(csv.DictReader(io.StringIO(text)), 2))
+
+    events, invalid = [], []
+    for line_no, row in rows:
+        if not isinstance(row, dict):
+            invalid.append({'line': line_no, 'error': 'Unparseable row'})
+            continue
+        tracking_number = str(row.get('tracking_number') or '').strip()
+        status = normalize_status(row.get('status'))
+        timestamp = _parse_time(row.get('timestamp'))
+        if not tracking_number or status not in STATUS_RANK or timestamp is None:
+            invalid.append({'line': line_no, 'tracking_number': tracking_number, 'error': 'Missing or invalid field'})
+            continue
+        events.append((tracking_number, status, timestamp))
+    return events, invalid
+
+
+def collapse(events):
+    """
+    {tracking_number: {'status', 'at', 'picked_up_at', 'delivered_at'}}: the
+    furthest status per shipment (latest event on ties) plus the times it
+    left the warehouse and was delivered, if the feed says so. A retry (see
+    RETRY_TRANSITIONS) that happened after the status it retries wins despite
+    its lower rank, matching what one-by-one updates allow.
+    """
+    latest = {}
+    for tracking_number, status, at in sorted(events, key=lambda event: event[2]):
+        entry = latest.setdefault(tracking_number, {
+            'status': status, 'at': at, 'picked_up_at': None, 'delivered_at': None,
+        })
+        retry = (entry['status'], status) in RETRY_TRANSITIONS and at > entry['at']
+        if retry or (STATUS_RANK[status], at) > (STATUS_RANK[entry['status']], entry['at']):
+            entry['status'], entry['at'] = status, at
+        if STATUS_RANK[status] >= STATUS_RANK['picked_up']:
+            entry['picked_up_at'] = min(filter(None, [entry['picked_up_at'], at]))
+        if status == 'delivered':
+            entry['delivered_at'] = at
+    return latest
+
+
+def allowed_previous(status):
+    """Statuses a shipment may be in for `status` to apply."""
+    rank = STATUS_RANK[status]
+    previous = {s for s, r in STATUS_RANK.items() if r < rank}
+    previous |= {before for before, after in RETRY_TRANSITIONS if after == status}
+    return previous
+
+
+# ============ APPLY ============
+
+@transaction.atomic
+def ingest(events, carrier=None, report_limit=REPORT_LIMIT):
+    """
+    Apply a parsed feed. Returns a report with counts and (up to
+    `report_limit`, None for all) the tracking numbers that matched no shipment.
+    """
+    latest = collapse(events)
+    shipments = Shipment.objects.all()
+    if carrier is not None:
+        shipments = shipments.filter(carrier=carrier)
+
+    found = {}
+    numbers = list(latest)
+    for i in range(0, len(numbers), CHUNK_SIZE):
+        for row in shipments.filter(tracking_number__in=numbers[i:i + CHUNK_SIZE]).values(
+            'id', 'tracking_number', 'status', 'status_updated_at', 'order_id', 'warehouse_id'
+        ):
+            found.setdefault(row['tracking_number'], []).append(row)
+
+    # Group shipments that should move by target status
+    by_status = defaultdict(list)
+    stale = 0
+    for tracking_number, event in latest.items():
+        for row in found.get(tracking_number, []):
+            newer = row['status_updated_at'] is None or event['at'] > row['status_updated_at']
+            if newer and row['status'] in allowed_previous(event['status']):
+                by_status[event['status']].append((row, event))
+            else:
+                stale += 1
+
+    updated, changed = 0, []
+    for status, group in by_status.items():
+        for i in range(0, len(group), CHUNK_SIZE):
+            chunk = group[i:i + CHUNK_SIZE]
+            updated_ids = set(_apply(status, chunk))
+            updated += len(updated_ids)
+            changed.extend(
+                {
+                    'shipment_id': row['id'], 'order_id': row['order_id'],
+                    'warehouse_id': row['warehouse_id'], 'status': status,
+                }
+                for row, _ in chunk if row['id'] in updated_ids
+            )
+
+    orders_updated = sync_orders({c['order_id'] for c in changed})
+    # Costing and stock fulfilment follow in the outbox worker, as for single updates
+    outbox.publish_many(outbox.SHIPMENT_STATUS_CHANGED, changed)
+
+    unmatched = [number for number in latest if number not in found]
+    return {
+        'events': len(events),
+        'shipments_matched': sum(len(rows) for rows in found.values()),
+        'shipments_updated': updated,
+        'stale_or_backward': stale,
+        'orders_updated': orders_updated,
+        'unmatched_count': len(unmatched),
+        'unmatched': unmatched[:report_limit],
+    }
+
+
+def _apply(status, chunk):
+    """One UPDATE moving a chunk of shipments to `status`. Returns the ids it moved."""
+    ids = [row['id'] for row, _ in chunk]
+
+    def per_row(key):
+        return Case(*[When(id=row['id'], then=event[key]) for row, event in chunk if event[key]])
+
+    changes = {'status': status, 'status_updated_at': per_row('at'), 'updated_at': timezone.now()}
+    if any(event['picked_up_at'] for _, event in chunk):
+        changes['shipped_at'] = Coalesce(F('shipped_at'), per_row('picked_up_at'))
+    if status == 'delivered':
+        changes['delivered_at'] = per_row('delivered_at')
+
+    # Re-checked in SQL so a concurrent update can't be overtaken
+    rows = Shipment.objects.select_for_update().filter(id__in=ids, status__in=allowed_previous(status))
+    moved = list(rows.values_list('id', flat=True))
+    Shipment.objects.filter(id__in=moved).update(**changes)
+    return moved
+
+
+def sync_orders(order_ids):
+    """Move orders forward from their shipments' statuses. Returns rows updated."""
+    if not order_ids:
+        return 0
+    order_ids = list(order_ids)
+    shipments = Shipment.objects.filter(order=OuterRef('pk'))
+    now = timezone.now()
+
+    # Delivered once every shipment of the order is
+    delivered = Order.objects.filter(id__in=order_ids).exclude(status__in=('delivered', 'cancelled', 'returned')).filter(
+        Exists(shipments), ~Exists(shipments.exclude(status='delivered'))
+    ).update(status='delivered', updated_at=now)
+
+    # Shipped as soon as any shipment has left the warehouse
+    shipped = Order.objects.filter(id__in=order_ids, status__in=ORDER_STATUSES_BEFORE_SHIPPED).filter(
+        Exists(shipments.filter(status__in=FULFILLED_SHIPMENT_STATUSES))
+    ).update(status='shipped', updated_at=now)
+    return delivered + shipped
@@ -4,10 +4,11 @@ Inventory URL Configuration
 from django.urls import path
 from .views import (
     InventoryListView, InventoryDetailView, InventoryAdjustView,
-    InventoryMovementListView, LowStockAlertView,
+    InventoryMovementListView, InventoryBalanceView, LowStockAlertView, ReorderSuggestionView,
+    WarehouseListView, WarehouseDetailView, RouteOrdersView,
     SupplierListView, SupplierDetailView,
     PurchaseOrderListView, PurchaseOrderDetailView, ReceivePurchaseOrderView,
-    ShipmentListView, ShipmentDetailView, UpdateShipmentStatusView,
+    ShipmentListView, ShipmentDetailView, UpdateShipmentStatusView, TrackingFeedView,
     CarrierListView, CarrierDetailView, CarrierPerformanceView
 )
 
@@ -17,8 +18,15 @@ urlpatterns = [
     path('<uuid:pk>/', InventoryDetailView.as_view(), name='inventory-detail'),
     path('<uuid:pk>/adjust/', InventoryAdjustView.as_view(), name='inventory-adjust'),
     path('<uuid:inventory_id>/movements/', InventoryMovementListView.as_view(), name='inventory-movements'),
+    path('<uuid:pk>/balance/', InventoryBalanceView.as_view(), name='inventory-balance'),
     path('movements/', InventoryMovementListView.as_view(), name='all-movements'),
     path('low-stock/', LowStockAlertView.as_view(), name='low-stock'),
+    path('reorder-suggestions/', ReorderSuggestionView.as_view(), name='reorder-suggestions'),
+    
+    # Warehouses & order routing
+    path('warehouses/', WarehouseListView.as_view(), name='warehouse-list'),
+    path('warehouses/<uuid:pk>/', WarehouseDetailView.as_view(), name='warehouse-detail'),
+    path('routing/', RouteOrdersView.as_view(), name='route-orders'),
     
     # Suppliers
     path('suppliers/', SupplierListView.as_view(), name='supplier-list'),
@@ -31,6 +39,7 @@ urlpatterns = [
     
     # Shipments
     path('shipments/', ShipmentListView.as_view(), name='shipment-list'),
+    path('shipments/tracking-feed/', TrackingFeedView.as_view(), name='shipment-tracking-feed'),
     path('shipments/<uuid:pk>/', ShipmentDetailView.as_view(), name='shipment-detail'),
     path('shipments/<uuid:pk>/status/', UpdateShipmentStatusView.as_view(), name='shipment-status'),
     
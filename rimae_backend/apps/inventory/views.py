@@ -5,34 +5,91 @@ MVVM: View Layer
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db import transaction
 from django.db.models import Sum, F, Count, Avg
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
 from .models import (
     Inventory, InventoryMovement, Supplier,
-    PurchaseOrder, PurchaseOrderItem, Shipment, Carrier
+    PurchaseOrder, PurchaseOrderItem, Shipment, Carrier, Warehouse
 )
 from .serializers import (
     InventorySerializer, InventoryMovementSerializer, SupplierSerializer,
     PurchaseOrderSerializer, PurchaseOrderItemSerializer,
-    ShipmentSerializer, ShipmentCreateSerializer, CarrierSerializer
+    ShipmentSerializer, ShipmentCreateSerializer, CarrierSerializer, WarehouseSerializer
 )
 from apps.accounts.views import IsAdmin
+from config.fieldsets import SparseQuerysetMixin
+from config.projections import Projection, ProjectedListMixin
+from apps.events import outbox
+from . import costing, rates, replenishment, routing, tracking
+from .ledger import balance_as_of
+
+
+def queue_movement(inventory, movement_type, quantity, previous_quantity, user=None,
+                   reference_type='', reference_id=None, notes=''):
+    """
+    Publish the ledger entry (plus a low-stock alert when this change crosses
+    the reorder level, or a back-in-stock alert when it restocks a sold-out
+    item) to the outbox; the InventoryMovement row is written by the worker.
+    Call inside the transaction that changed `inventory.quantity`.
+    """
+    outbox.publish(
+        outbox.INVENTORY_MOVEMENT,
+        inventory_id=inventory.id,
+        movement_type=movement_type,
+        quantity=quantity,
+        previous_quantity=previous_quantity,
+        new_quantity=inventory.quantity,
+        reference_type=reference_type,
+        reference_id=reference_id,
+        notes=notes,
+        created_by_id=user.id if user else None,
+        created_at=timezone.now(),
+    )
+
+    previous_available = previous_quantity - inventory.reserved_quantity
+    if previous_available > inventory.reorder_level >= inventory.available_quantity:
+        outbox.publish(
+            outbox.LOW_STOCK,
+            inventory_id=inventory.id,
+            product_id=inventory.product_id,
+            variant_id=inventory.variant_id,
+            available_quantity=inventory.available_quantity,
+            reorder_level=inventory.reorder_level,
+        )
+
+    # Back in stock: this row went from none available to some, and no other warehouse had any
+    if movement_type == 'in' and previous_available <= 0 < inventory.available_quantity:
+        stocked_elsewhere = Inventory.objects.filter(
+            product_id=inventory.product_id, variant_id=inventory.variant_id, available_quantity__gt=0
+        ).exclude(pk=inventory.pk).exists()
+        if not stocked_elsewhere:
+            outbox.publish(
+                outbox.BACK_IN_STOCK,
+                inventory_id=inventory.id,
+                product_id=inventory.product_id,
+                variant_id=inventory.variant_id,
+                available_quantity=inventory.available_quantity,
+            )
 
 
 # ============ INVENTORY ============
 
-class InventoryListView(generics.ListAPIView):
+class InventoryListView(ProjectedListMixin, generics.ListAPIView):
     """List all inventory with stock levels."""
     serializer_class = InventorySerializer
     permission_classes = [IsAdmin]
-    filterset_fields = ['needs_reorder']
-    search_fields = ['product__name', 'product__sku', 'variant__sku']
+    filterset_fields = ['needs_reorder', 'warehouse']
+    search_fields = ['product__name', 'product__sku', 'variant__size']
+    projection = Projection(computed={'sku': lambda row: row.product__sku}, requires=['product__sku'])
     
     def get_queryset(self):
-        return Inventory.objects.select_related('product', 'variant')
+        return Inventory.objects.select_related('product', 'variant', 'warehouse')
 
 
-class InventoryDetailView(generics.RetrieveUpdateAPIView):
+class InventoryDetailView(SparseQuerysetMixin, generics.RetrieveUpdateAPIView):
     """Get/update inventory item."""
     serializer_class = InventorySerializer
     permission_classes = [IsAdmin]
@@ -43,9 +100,10 @@ class InventoryAdjustView(APIView):
     """Adjust inventory stock."""
     permission_classes = [IsAdmin]
     
+    @transaction.atomic
     def post(self, request, pk):
         try:
-            inventory = Inventory.objects.get(pk=pk)
+            inventory = Inventory.objects.select_for_update().get(pk=pk)
         except Inventory.DoesNotExist:
             return Response({'error': 'Inventory not found'}, status=404)
         
@@ -55,35 +113,68 @@ class InventoryAdjustView(APIView):
         
         previous = inventory.quantity
         inventory.quantity += adjustment
-        inventory.save()
-        
-        InventoryMovement.objects.create(
-            inventory=inventory,
-            movement_type=movement_type,
-            quantity=adjustment,
-            previous_quantity=previous,
-            new_quantity=inventory.quantity,
-            notes=notes,
-            created_by=request.user
-        )
-        
         if movement_type == 'in':
             inventory.last_restocked = timezone.now()
-            inventory.save()
+        inventory.save()
+        
+        queue_movement(inventory, movement_type, adjustment, previous, user=request.user, notes=notes)
         
         return Response(InventorySerializer(inventory).data)
 
 
+def _parse_aware(value):
+    """ISO datetime from a query param, made timezone-aware; None if missing/invalid."""
+    parsed = parse_datetime(value or '')
+    if parsed and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class InventoryMovementListView(generics.ListAPIView):
     """List inventory movements."""
     serializer_class = InventoryMovementSerializer
     permission_classes = [IsAdmin]
     
     def get_queryset(self):
+        # Bounded by created_at so PostgreSQL only scans the matching monthly partitions.
+        # ?since= / ?until= are ISO datetimes; the store-wide list defaults to the last 30 days.
+        movements = InventoryMovement.objects.select_related('created_by')
         inventory_id = self.kwargs.get('inventory_id')
         if inventory_id:
-            return InventoryMovement.objects.filter(inventory_id=inventory_id)
-        return InventoryMovement.objects.all()
+            movements = movements.filter(inventory_id=inventory_id)
+        
+        since = _parse_aware(self.request.query_params.get('since'))
+        until = _parse_aware(self.request.query_params.get('until'))
+        if since is None and not inventory_id:
+            since = timezone.now() - timedelta(days=30)
+        if since:
+            movements = movements.filter(created_at__gte=since)
+        if until:
+            movements = movements.filter(created_at__lt=until)
+        return movements
+
+
+class InventoryBalanceView(APIView):
+    """Stock on hand at a point in time: GET ?as_of=<ISO datetime> (default now)."""
+    permission_classes = [IsAdmin]
+    
+    def get(self, request, pk):
+        if not Inventory.objects.filter(pk=pk).exists():
+            return Response({'error': 'Inventory not found'}, status=404)
+        
+        as_of = timezone.now()
+        if request.query_params.get('as_of'):
+            as_of = _parse_aware(request.query_params['as_of'])
+            if as_of is None:
+                return Response({'error': 'as_of must be an ISO datetime'}, status=400)
+        
+        quantity, snapshot_as_of = balance_as_of(pk, as_of)
+        return Response({
+            'inventory_id': pk,
+            'as_of': as_of,
+            'quantity': quantity,
+            'snapshot_as_of': snapshot_as_of,
+        })
 
 
 class LowStockAlertView(APIView):
@@ -91,13 +182,69 @@ class LowStockAlertView(APIView):
     permission_classes = [IsAdmin]
     
     def get(self, request):
+        # Served from the partial index on needs_reorder
         low_stock = Inventory.objects.filter(
-            quantity__lte=F('reorder_level')
-        ).select_related('product', 'variant')
+            needs_reorder=True
+        ).select_related('product', 'variant').order_by('available_quantity')
         
         return Response(InventorySerializer(low_stock, many=True).data)
 
 
+class ReorderSuggestionView(APIView):
+    """
+    GET: demand-driven reorder suggestions (only SKUs to order; ?all=true for every SKU).
+    POST {apply_levels: bool}: draft one purchase order per supplier and receiving warehouse.
+    """
+    permission_classes = [IsAdmin]
+    
+    def get(self, request):
+        suggestions = replenishment.suggest_reorders()
+        if request.query_params.get('all') != 'true':
+            suggestions = [s for s in suggestions if s['suggested_quantity'] > 0]
+        return Response({'count': len(suggestions), 'suggestions': suggestions})
+    
+    @transaction.atomic
+    def post(self, request):
+        suggestions = replenishment.suggest_reorders()
+        orders = replenishment.draft_purchase_orders(suggestions, user=request.user)
+        levels = replenishment.apply_reorder_levels(suggestions) if request.data.get('apply_levels') else 0
+        unsourced = [s for s in suggestions if s['suggested_quantity'] > 0 and not s['supplier_id']]
+        return Response({
+            'purchase_orders': PurchaseOrderSerializer(orders, many=True).data,
+            'reorder_levels_updated': levels,
+            'unsourced': unsourced,
+        }, status=201 if orders else 200)
+
+
+# ============ WAREHOUSES ============
+
+class WarehouseListView(generics.ListCreateAPIView):
+    serializer_class = WarehouseSerializer
+    permission_classes = [IsAdmin]
+    queryset = Warehouse.objects.all()
+
+
+class WarehouseDetailView(generics.RetrieveUpdateAPIView):
+    serializer_class = WarehouseSerializer
+    permission_classes = [IsAdmin]
+    queryset = Warehouse.objects.all()
+
+
+class RouteOrdersView(APIView):
+    """
+    POST {order_ids?: [...], dry_run?: bool}
+    Assign unrouted confirmed/processing orders to fulfillment warehouses.
+    """
+    permission_classes = [IsAdmin]
+    
+    def post(self, request):
+        summary = routing.route_orders(
+            order_ids=request.data.get('order_ids'),
+            commit=not request.data.get('dry_run', False),
+        )
+        return Response(summary)
+
+
 # ============ SUPPLIERS ============
 
 class SupplierListView(generics.ListCreateAPIView):
@@ -136,11 +283,14 @@ class ReceivePurchaseOrderView(APIView):
     """Mark items as received and update inventory."""
     permission_classes = [IsAdmin]
     
+    @transaction.atomic
     def post(self, request, pk):
         try:
             po = PurchaseOrder.objects.get(pk=pk)
         except PurchaseOrder.DoesNotExist:
             return Response({'error': 'PO not found'}, status=404)
+        if po.warehouse_id is None:
+            return Response({'error': 'Set the receiving warehouse before receiving this PO'}, status=400)
         
         items = request.data.get('items', [])
         
@@ -153,11 +303,13 @@ class ReceivePurchaseOrderView(APIView):
             received = item_data.get('received', 0)
             item.quantity_received += received
             item.save()
+            costing.add_layer(item, received)
             
             # Update inventory
-            inventory, _ = Inventory.objects.get_or_create(
+            inventory, _ = Inventory.objects.select_for_update().get_or_create(
                 product=item.product,
-                variant=item.variant
+                variant=item.variant,
+                warehouse=po.warehouse
             )
             
             previous = inventory.quantity
@@ -165,16 +317,10 @@ class ReceivePurchaseOrderView(APIView):
             inventory.last_restocked = timezone.now()
             inventory.save()
             
-            InventoryMovement.objects.create(
-                inventory=inventory,
-                movement_type='in',
-                quantity=received,
-                previous_quantity=previous,
-                new_quantity=inventory.quantity,
-                reference_type='purchase_order',
-                reference_id=po.id,
-                notes=f'Received from PO {po.po_number}',
-                created_by=request.user
+            queue_movement(
+                inventory, 'in', received, previous, user=request.user,
+                reference_type='purchase_order', reference_id=po.id,
+                notes=f'Received from PO {po.po_number}'
             )
         
         # Update PO status
@@ -196,10 +342,11 @@ class ReceivePurchaseOrderView(APIView):
 
 # ============ SHIPMENTS ============
 
-class ShipmentListView(generics.ListCreateAPIView):
+class ShipmentListView(ProjectedListMixin, generics.ListCreateAPIView):
     permission_classes = [IsAdmin]
     filterset_fields = ['status', 'carrier']
     search_fields = ['tracking_number', 'order__order_number']
+    projection = Projection()
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -208,6 +355,15 @@ class ShipmentListView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         return Shipment.objects.select_related('carrier', 'order')
+    
+    def perform_create(self, serializer):
+        shipment = serializer.save()
+        if not shipment.shipping_cost:
+            # Price from the carrier's rate card when no cost was given
+            rate = rates.shipment_rate(shipment)
+            if rate is not None:
+                shipment.shipping_cost = rate
+                shipment.save(update_fields=['shipping_cost', 'updated_at'])
 
 
 class ShipmentDetailView(generics.RetrieveUpdateAPIView):
@@ -220,6 +376,7 @@ class UpdateShipmentStatusView(APIView):
     """Update shipment status and sync with order."""
     permission_classes = [IsAdmin]
     
+    @transaction.atomic
     def post(self, request, pk):
         try:
             shipment = Shipment.objects.get(pk=pk)
@@ -228,19 +385,59 @@ class UpdateShipmentStatusView(APIView):
         
         new_status = request.data.get('status')
         shipment.status = new_status
+        shipment.status_updated_at = timezone.now()
         
         if new_status == 'picked_up':
             shipment.shipped_at = timezone.now()
         elif new_status == 'delivered':
             shipment.delivered_at = timezone.now()
-            # Update order status
-            shipment.order.status = 'delivered'
-            shipment.order.save()
         
         shipment.save()
+        
+        # Order status is synced by the outbox worker (see inventory/handlers.py)
+        outbox.publish(
+            outbox.SHIPMENT_STATUS_CHANGED,
+            shipment_id=shipment.id,
+            order_id=shipment.order_id,
+            warehouse_id=shipment.warehouse_id,
+            status=new_status,
+        )
         return Response(ShipmentSerializer(shipment).data)
 
 
+class TrackingFeedView(APIView):
+    """
+    POST a carrier tracking feed: CSV (tracking_number,status,timestamp) or
+    JSON lines, as an uploaded `file` or the raw request body.
+    ?carrier=<code> limits matching to that carrier's shipments.
+    """
+    permission_classes = [IsAdmin]
+    
+    def post(self, request):
+        carrier = None
+        if request.query_params.get('carrier'):
+            carrier = Carrier.objects.filter(code=request.query_params['carrier']).first()
+            if carrier is None:
+                return Response({'error': 'Carrier not found'}, status=404)
+        
+        content_type = request.content_type or ''
+        if content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            data = upload.read() if upload else b''
+        else:
+            # Raw CSV / NDJSON body; skip DRF's parsers
+            data = request._request.body
+        if not data:
+            return Response({'error': 'Empty feed'}, status=400)
+        
+        fmt = 'jsonl' if 'json' in content_type else None
+        events, invalid = tracking.parse_feed(data, fmt)
+        report = tracking.ingest(events, carrier=carrier)
+        report['invalid_count'] = len(invalid)
+        report['invalid'] = invalid[:tracking.REPORT_LIMIT]
+        return Response(report)
+
+
 # ============ CARRIERS ============
 
 class CarrierListView(generics.ListCreateAPIView):
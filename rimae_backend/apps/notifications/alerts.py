@@ -0,0 +1,100 @@
+"""
+Wishlist Alerts - Back-in-stock and price-drop fan-out to wishlisters
+MVVM: Service Layer
+
+Restocks and price drops reach us as outbox events, so the write that
+caused them never waits on the fan-out. An alert is one `Notification`
+delivered to every user who wishlisted the product:
+
+- recipients are read in user order through the (product, user) wishlist
+  index, `WISHLIST_ALERT_BATCH_SIZE` per outbox event; a bigger audience is
+  continued by a follow-up `WISHLIST_ALERT` event from the last user id, so
+  no single worker transaction grows with the audience
+- each batch is written in chunks with `bulk_create` (deliveries plus the
+  dedup log), and cached unread counts for the chunk are dropped in one call
+- users alerted about the same product and kind within the dedup window
+  (`WISHLIST_ALERT_DEDUP_HOURS`) are skipped
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.events import outbox
+from apps.orders.models import Wishlist
+from .feed import _unread_key, publish_latest
+from .models import Notification, UserNotification, WishlistAlertLog
+
+
+def get_alert_settings():
+    return {
+        'batch_size': getattr(settings, 'WISHLIST_ALERT_BATCH_SIZE', 5000),
+        'chunk_size': getattr(settings, 'WISHLIST_ALERT_CHUNK_SIZE', 1000),
+        'dedup_hours': getattr(settings, 'WISHLIST_ALERT_DEDUP_HOURS', {'back_in_stock': 24, 'price_drop': 72}),
+        'min_drop_percent': getattr(settings, 'WISHLIST_ALERT_MIN_PRICE_DROP_PERCENT', 5),
+    }
+
+
+def start_alert(kind, product_id, title, message='', **data):
+    """Create the alert and deliver its first batch. Returns the notification."""
+    notification = Notification.objects.create(
+        kind=kind, title=title, message=message, data={'product_id': product_id, **data}
+    )
+    deliver_batch(notification.id)
+    return notification
+
+
+def deliver_batch(notification_id, after_user_id=None, config=None):
+    """
+    Deliver one batch of `notification_id` to wishlisters after `after_user_id`,
+    queueing the next batch if there may be more. Returns (recipients seen,
+    delivered, the next batch's `after_user_id` or None when done).
+    """
+    config = config or get_alert_settings()
+    notification = Notification.objects.get(pk=notification_id)
+    product_id = notification.data['product_id']
+
+    recipients = Wishlist.objects.filter(product_id=product_id).order_by('user_id')
+    if after_user_id is not None:
+        recipients = recipients.filter(user_id__gt=after_user_id)
+    user_ids = list(recipients.values_list('user_id', flat=True)[:config['batch_size']])
+
+    now = timezone.now()
+    cutoff = now - timedelta(hours=config['dedup_hours'].get(notification.kind, 24))
+    delivered = 0
+    for start in range(0, len(user_ids), config['chunk_size']):
+        chunk = user_ids[start:start + config['chunk_size']]
+        recent = set(WishlistAlertLog.objects.filter(
+            product_id=product_id, kind=notification.kind, user_id__in=chunk, sent_at__gte=cutoff
+        ).values_list('user_id', flat=True))
+        targets = [user_id for user_id in chunk if user_id not in recent]
+        if not targets:
+            continue
+        UserNotification.objects.bulk_create(
+            [UserNotification(notification_id=notification_id, user_id=user_id) for user_id in targets],
+            ignore_conflicts=True,
+        )
+        WishlistAlertLog.objects.bulk_create(
+            [WishlistAlertLog(user_id=user_id, product_id=product_id, kind=notification.kind, sent_at=now)
+             for user_id in targets],
+            update_conflicts=True, unique_fields=['product', 'kind', 'user'], update_fields=['sent_at'],
+        )
+        delivered += len(targets)
+        # Unread counts for these users recount on their next read
+        transaction.on_commit(lambda keys=[_unread_key(user_id) for user_id in targets]: cache.delete_many(keys))
+
+    next_after = user_ids[-1] if len(user_ids) == config['batch_size'] else None
+    if next_after is not None:
+        outbox.publish(outbox.WISHLIST_ALERT, notification_id=notification_id, after_user_id=next_after)
+    if delivered:
+        transaction.on_commit(publish_latest)
+    return len(user_ids), delivered, next_after
+
+
+def is_price_drop(old_price, new_price, config=None):
+    """True if the drop is big enough to alert on."""
+    config = config or get_alert_settings()
+    return old_price > 0 and (old_price - new_price) * 100 >= old_price * Decimal(str(config['min_drop_percent']))
@@ -0,0 +1,121 @@
+"""
+Notification Feed - Fan-out, read state and the unread-count cache
+MVVM: Service Layer
+
+Unread counts live in the shared cache and are adjusted with incr/decr on
+every change, so reading one is O(1). A miss (eviction, first request)
+falls back to a COUNT over the partial unread index and re-primes the key.
+`LATEST_KEY` holds the newest delivery (`UserNotification`) id; stream and
+long-poll clients watch it instead of querying the database. The cursor is
+the delivery id rather than the notification id because one notification
+can be delivered in several batches (wishlist alerts): a later batch still
+lands above a cursor that has already moved past the notification.
+
+Both only stay current when every process shares the cache. With a
+per-process cache (LocMemCache, the default without REDIS_URL) the outbox
+worker's updates never reach the web processes, so both keys are kept for
+`LOCAL_CACHE_TTL` seconds and re-read from the database after that.
+"""
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import UserRole
+from .models import Notification, UserNotification
+
+LATEST_KEY = 'notifications:latest_id'
+UNREAD_TTL = 24 * 60 * 60
+LOCAL_CACHE_TTL = 2
+
+
+def cache_is_shared():
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _ttl(shared_ttl):
+    return shared_ttl if cache_is_shared() else LOCAL_CACHE_TTL
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _adjust_unread(user_ids, delta):
+    for user_id in user_ids:
+        try:
+            cache.incr(_unread_key(user_id), delta)
+        except ValueError:
+            # Not cached: the next read recounts from the database.
+            pass
+
+
+def unread_count(user_id):
+    count = cache.get(_unread_key(user_id))
+    if count is None:
+        count = UserNotification.objects.filter(user_id=user_id, read_at__isnull=True).count()
+        cache.set(_unread_key(user_id), count, _ttl(UNREAD_TTL))
+    return count
+
+
+def _newest_delivery_id():
+    return UserNotification.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def latest_id():
+    value = cache.get(LATEST_KEY)
+    if value is None:
+        value = _newest_delivery_id()
+        cache.set(LATEST_KEY, value, _ttl(None))
+    return value
+
+
+def publish_latest():
+    """Move `LATEST_KEY` up to the newest delivery; call once the deliveries are committed."""
+    cache.set(LATEST_KEY, max(_newest_delivery_id(), cache.get(LATEST_KEY) or 0), _ttl(None))
+
+
+def notify_admins(kind, title, message='', **data):
+    """Create a notification and deliver it to every admin."""
+    notification = Notification.objects.create(kind=kind, title=title, message=message, data=data)
+    admin_ids = list(
+        UserRole.objects.filter(role='admin', user__is_active=True).values_list('user_id', flat=True).distinct()
+    )
+    UserNotification.objects.bulk_create(
+        [UserNotification(notification=notification, user_id=user_id) for user_id in admin_ids],
+        ignore_conflicts=True,
+    )
+
+    def publish():
+        _adjust_unread(admin_ids, 1)
+        publish_latest()
+
+    transaction.on_commit(publish)
+    return notification
+
+
+def mark_read(user_id, notification_ids):
+    updated = UserNotification.objects.filter(
+        user_id=user_id, notification_id__in=notification_ids, read_at__isnull=True
+    ).update(read_at=timezone.now())
+    if updated:
+        _adjust_unread([user_id], -updated)
+    return updated
+
+
+def mark_all_read(user_id):
+    updated = UserNotification.objects.filter(
+        user_id=user_id, read_at__isnull=True
+    ).update(read_at=timezone.now())
+    cache.set(_unread_key(user_id), 0, _ttl(UNREAD_TTL))
+    return updated
+
+
+def deliveries_after(user_id, after_id, limit=50):
+    """The user's deliveries after the cursor `after_id` (a delivery id), oldest first."""
+    return list(
+        UserNotification.objects.filter(user_id=user_id, id__gt=after_id)
+        .select_related('notification')
+        .order_by('id')[:limit]
+    )
@@ -0,0 +1,96 @@
+"""
+Notifications outbox handlers - turn domain events into admin notifications and wishlist alerts
+"""
+from decimal import Decimal
+
+from apps.events.outbox import (
+    handler, ORDER_CREATED, LOW_STOCK, REVIEW_SUBMITTED, BACK_IN_STOCK, PRICE_DROPPED, WISHLIST_ALERT,
+)
+from . import alerts
+from .feed import notify_admins
+
+
+@handler(ORDER_CREATED)
+def notify_new_order(payload):
+    notify_admins(
+        'new_order',
+        f"New order {payload['order_number']}",
+        f"Order total Rs. {payload['total_amount']}",
+        order_id=payload['order_id'],
+    )
+
+
+@handler(LOW_STOCK)
+def notify_low_stock(payload):
+    from apps.inventory.models import Inventory
+
+    inventory = Inventory.objects.select_related('product', 'variant').filter(pk=payload['inventory_id']).first()
+    if not inventory:
+        return
+    label = inventory.product.name
+    if inventory.variant:
+        label = f'{label} ({inventory.variant.size})'
+    notify_admins(
+        'low_stock',
+        f'Low stock: {label}',
+        f"{payload['available_quantity']} available, reorder level {payload['reorder_level']}",
+        inventory_id=payload['inventory_id'],
+        product_id=payload['product_id'],
+    )
+
+
+@handler(REVIEW_SUBMITTED)
+def notify_review_pending(payload):
+    notify_admins(
+        'review_pending',
+        'New review awaiting moderation',
+        f"{payload['rating']}-star review",
+        review_id=payload['review_id'],
+        product_id=payload['product_id'],
+    )
+
+
+def _product_label(product_id, variant_id=None):
+    from apps.products.models import Product, ProductVariant
+
+    name = Product.objects.filter(pk=product_id).values_list('name', flat=True).first()
+    size = ProductVariant.objects.filter(pk=variant_id).values_list('size', flat=True).first() if variant_id else None
+    return name, f'{name} ({size})' if size else name
+
+
+@handler(BACK_IN_STOCK)
+def alert_back_in_stock(payload):
+    name, label = _product_label(payload['product_id'], payload.get('variant_id'))
+    if name is None:
+        return
+    alerts.start_alert(
+        'back_in_stock',
+        payload['product_id'],
+        f'Back in stock: {label}',
+        'An item on your wishlist is available again',
+        variant_id=payload.get('variant_id'),
+    )
+
+
+@handler(PRICE_DROPPED)
+def alert_price_drop(payload):
+    old_price, new_price = Decimal(str(payload['old_price'])), Decimal(str(payload['new_price']))
+    if not alerts.is_price_drop(old_price, new_price):
+        return
+    name, label = _product_label(payload['product_id'], payload.get('variant_id'))
+    if name is None:
+        return
+    alerts.start_alert(
+        'price_drop',
+        payload['product_id'],
+        f'Price drop: {label}',
+        f'Now Rs. {new_price:.2f} (was Rs. {old_price:.2f})',
+        variant_id=payload.get('variant_id'),
+        old_price=payload['old_price'],
+        new_price=payload['new_price'],
+    )
+
+
+@handler(WISHLIST_ALERT)
+def continue_wishlist_alert(payload):
+    alerts.deliver_batch(payload['notification_id'], payload['after_user_id'])
@@ -0,0 +1,74 @@
+"""
+Benchmark wishlist alert fan-out against the database: synthetic users all
+wishlist one product, then a back-in-stock alert is delivered batch by batch
+as the outbox worker would, and sent again to measure the dedup skip. Runs
+in a transaction that is rolled back.
+
+    python manage.py benchmark_wishlist_alerts
+    python manage.py benchmark_wishlist_alerts --users 100000 --batch-size 5000
+"""
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.notifications import alerts
+from apps.notifications.models import Notification
+from apps.orders.models import Wishlist
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Measure wishlist alert deliveries per second, queries per batch and the dedup skip.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=None, help='Default: WISHLIST_ALERT_BATCH_SIZE')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Default: WISHLIST_ALERT_CHUNK_SIZE')
+
+    def handle(self, *args, **options):
+        config = alerts.get_alert_settings()
+        config['batch_size'] = options['batch_size'] or config['batch_size']
+        config['chunk_size'] = options['chunk_size'] or config['chunk_size']
+
+        with transaction.atomic():
+            product, setup = self._setup(options['users'])
+            self.stdout.write(f"Set up {options['users']} wishlisters in {setup:.2f}s")
+
+            for label in ('first alert', 'repeat (deduplicated)'):
+                notification = Notification.objects.create(
+                    kind='back_in_stock', title='Benchmark', data={'product_id': str(product.id)}
+                )
+                batches = seen = delivered = queries = 0
+                after = None
+                start = time.perf_counter()
+                while True:
+                    with CaptureQueriesContext(connection) as captured:
+                        count, sent, after = alerts.deliver_batch(notification.id, after, config)
+                    batches += 1
+                    seen += count
+                    delivered += sent
+                    queries += len(captured)
+                    if after is None:
+                        break
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{label}: {delivered}/{seen} delivered in {batches} batch(es), {elapsed:.2f}s '
+                    f'({seen / elapsed:,.0f} recipients/s, {queries / batches:.0f} queries/batch)'
+                )
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS('Rolled back benchmark data'))
+
+    @staticmethod
+    def _setup(count):
+        start = time.perf_counter()
+        User = get_user_model()
+        product = Product.objects.create(name='Benchmark', sku=f'BENCH-{uuid.uuid4().hex[:8]}')
+        users = [User(username=f'bench-{uuid.uuid4().hex}', email='') for _ in range(count)]
+        User.objects.bulk_create(users, batch_size=2000)
+        Wishlist.objects.bulk_create([Wishlist(user=user, product=product) for user in users], batch_size=2000)
+        return product, time.perf_counter() - start
@@ -0,0 +1,68 @@
+"""
+Notifications Models - Admin notification feed
+MVVM: Model Layer
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+
+
+class Notification(models.Model):
+    """
+    One alert (new order, low stock, pending review, ...), delivered to
+    users through UserNotification rows.
+    """
+    KIND_CHOICES = [
+        ('new_order', 'New Order'),
+        ('low_stock', 'Low Stock'),
+        ('review_pending', 'Review Pending'),
+        ('back_in_stock', 'Back in Stock'),
+        ('price_drop', 'Price Drop'),
+        ('system', 'System'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    title = models.CharField(max_length=200)
+    message = models.TextField(blank=True)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)  # ids the UI links to
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notifications'
+        ordering = ['-id']
+
+    def __str__(self):
+        return self.title
+
+
+class UserNotification(models.Model):
+    """
+    Per-user delivery and read state of a notification. Sequential ids are
+    the stream cursor for SSE / long-poll clients (see notifications/feed.py).
+    """
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='deliveries')
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='notifications')
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'user_notifications'
+        unique_together = ['user', 'notification']
+        indexes = [
+            models.Index(fields=['user', 'notification'], name='user_notif_unread_idx',
+                         condition=Q(read_at__isnull=True)),
+            models.Index(fields=['user', 'id'], name='user_notif_cursor_idx'),
+        ]
+
+
+class WishlistAlertLog(models.Model):
+    """When a user was last alerted about a wishlisted product, per alert kind (dedup window)."""
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='+')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=30)
+    sent_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'wishlist_alert_log'
+        # Product first: fan-out looks up one product's recipients a chunk at a time
+        unique_together = ['product', 'kind', 'user']
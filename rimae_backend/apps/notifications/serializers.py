@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from .models import UserNotification
+
+
+class UserNotificationSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='notification_id', read_only=True)
+    kind = serializers.CharField(source='notification.kind', read_only=True)
+    title = serializers.CharField(source='notification.title', read_only=True)
+    message = serializers.CharField(source='notification.message', read_only=True)
+    data = serializers.JSONField(source='notification.data', read_only=True)
+    created_at = serializers.DateTimeField(source='notification.created_at', read_only=True)
+    is_read = serializers.SerializerMethodField()
+    cursor = serializers.IntegerField(source='pk', read_only=True)  # Stream position (delivery id)
+
+    class Meta:
+        model = UserNotification
+        fields = ['id', 'kind', 'title', 'message', 'data', 'created_at', 'is_read', 'read_at', 'cursor']
+
+    def get_is_read(self, obj):
+        return obj.read_at is not None
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=1000)
@@ -0,0 +1,54 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import User
+from apps.events import outbox
+from apps.orders.models import Wishlist
+from apps.products.models import Product
+from .alerts import start_alert
+
+
+@override_settings(
+    WISHLIST_ALERT_BATCH_SIZE=1,
+    NOTIFICATION_LONG_POLL_SECONDS=0.2,
+    NOTIFICATION_STREAM_POLL_SECONDS=0.05,
+)
+class WishlistAlertStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name='Oud', sku='OUD')
+        users = [User.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(2)]
+        for user in users:
+            Wishlist.objects.create(user=user, product=self.product)
+        # Batches go out in user id order
+        self.first, self.second = sorted(users, key=lambda user: user.pk)
+
+    @staticmethod
+    async def _get(path, params):
+        return await AsyncClient().get(path, params)
+
+    def poll(self, user, after=None):
+        params = {'token': str(AccessToken.for_user(user))}
+        if after is not None:
+            params['after'] = after
+        response = async_to_sync(self._get)('/api/v1/notifications/poll/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_later_batch_reaches_a_connected_client(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = start_alert('back_in_stock', str(self.product.id), 'Back in stock')
+
+        # The second wishlister's client wakes on the first batch and finds nothing for itself
+        first_poll = self.poll(self.second)
+        self.assertEqual(first_poll['notifications'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.drain()  # Second batch
+
+        second_poll = self.poll(self.second, after=first_poll['cursor'])
+        self.assertEqual([item['id'] for item in second_poll['notifications']], [notification.id])
+        self.assertGreater(second_poll['cursor'], first_poll['cursor'])
@@ -1,11 +1,17 @@
 from django.urls import path
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from apps.accounts.views import IsAdmin
+from .views import (
+    NotificationsView, UnreadCountView, MarkReadView, MarkAllReadView,
+    notification_stream, notification_long_poll
+)
 
-class NotificationsView(APIView):
-    permission_classes = [IsAdmin]
-    def get(self, request):
-        return Response([])
+urlpatterns = [
+    path('', NotificationsView.as_view(), name='notifications'),
+    path('unread-count/', UnreadCountView.as_view(), name='notifications-unread-count'),
+    path('read/', MarkReadView.as_view(), name='notifications-read'),
+    path('<int:pk>/read/', MarkReadView.as_view(), name='notification-read'),
+    path('read-all/', MarkAllReadView.as_view(), name='notifications-read-all'),
 
-urlpatterns = [path('', NotificationsView.as_view())]
+    # Push delivery - serve through config.asgi
+    path('stream/', notification_stream, name='notifications-stream'),
+    path('poll/', notification_long_poll, name='notifications-poll'),
+]
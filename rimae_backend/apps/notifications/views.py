@@ -0,0 +1,202 @@
+"""
+Notifications Views - User feed, read state, SSE and long-poll delivery
+MVVM: View Layer
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import User
+from . import feed
+from .models import UserNotification
+from .serializers import MarkReadSerializer, UserNotificationSerializer
+
+
+def get_stream_settings():
+    return {
+        'poll_seconds': getattr(settings, 'NOTIFICATION_STREAM_POLL_SECONDS', 1.0),
+        'heartbeat_seconds': getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15),
+        'max_seconds': getattr(settings, 'NOTIFICATION_STREAM_MAX_SECONDS', 300),
+        'long_poll_seconds': getattr(settings, 'NOTIFICATION_LONG_POLL_SECONDS', 25),
+    }
+
+
+# ============ REST ENDPOINTS ============
+
+class NotificationsView(generics.ListAPIView):
+    """GET /api/v1/notifications/ - the current user's feed (admin alerts, wishlist alerts), newest first."""
+    serializer_class = UserNotificationSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ['notification__kind']
+
+    def get_queryset(self):
+        queryset = UserNotification.objects.filter(user=self.request.user).select_related('notification')
+        if self.request.query_params.get('unread') == 'true':
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset.order_by('-notification_id')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        return Response({
+            'unread_count': feed.unread_count(request.user.id),
+            'notifications': response.data,
+        })
+
+
+class UnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': feed.unread_count(request.user.id)})
+
+
+class MarkReadView(APIView):
+    """POST {ids: [...]} or POST /{id}/read/"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk=None):
+        if pk is not None:
+            ids = [pk]
+        else:
+            serializer = MarkReadSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            ids = serializer.validated_data['ids']
+        updated = feed.mark_read(request.user.id, ids)
+        return Response({'updated': updated, 'unread_count': feed.unread_count(request.user.id)})
+
+
+class MarkAllReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        updated = feed.mark_all_read(request.user.id)
+        return Response({'updated': updated, 'unread_count': 0})
+
+
+# ============ PUSH DELIVERY (ASGI) ============
+
+async def _authenticate_user(request):
+    """
+    EventSource can't send headers, so the access token may also come as ?token=.
+    Returns the active user's id, or None.
+    """
+    raw = request.GET.get('token')
+    header = request.headers.get('Authorization', '')
+    if not raw and header.startswith('Bearer '):
+        raw = header[len('Bearer '):]
+    if not raw:
+        return None
+
+    try:
+        user_id = AccessToken(raw)[jwt_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+
+    if not await User.objects.filter(pk=user_id, is_active=True).aexists():
+        return None
+    return user_id
+
+
+def _serialize(deliveries):
+    return [UserNotificationSerializer(d).data for d in deliveries]
+
+
+def _parse_cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def _event_stream(user_id, last_id):
+    config = get_stream_settings()
+    started = last_write = time.monotonic()
+    last_count = None
+
+    yield 'retry: 3000\n\n'
+    while time.monotonic() - started < config['max_seconds']:
+        latest = await sync_to_async(feed.latest_id)()
+        if latest > last_id:
+            deliveries = await sync_to_async(feed.deliveries_after)(user_id, last_id)
+            for item in _serialize(deliveries):
+                yield f"id: {item['cursor']}\nevent: notification\ndata: {json.dumps(item)}\n\n"
+                last_id = item['cursor']
+            if not deliveries:
+                last_id = latest
+            last_write = time.monotonic()
+
+        count = await sync_to_async(feed.unread_count)(user_id)
+        if count != last_count:
+            yield f"event: unread\ndata: {json.dumps({'unread_count': count})}\n\n"
+            last_count = count
+            last_write = time.monotonic()
+
+        if time.monotonic() - last_write > config['heartbeat_seconds']:
+            yield ': ping\n\n'
+            last_write = time.monotonic()
+
+        await asyncio.sleep(config['poll_seconds'])
+
+
+async def notification_stream(request):
+    """
+    GET /api/v1/notifications/stream/?token=<access token>
+    Server-Sent Events: `notification` events carry feed items (id = cursor),
+    `unread` events carry the counter. Reconnects resume from Last-Event-ID.
+    """
+    user_id = await _authenticate_user(request)
+    if user_id is None:
+        return JsonResponse({'error': 'Access token required'}, status=401)
+
+    last_id = _parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('after'))
+    if last_id is None:
+        last_id = await sync_to_async(feed.latest_id)()
+
+    response = StreamingHttpResponse(_event_stream(user_id, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+async def notification_long_poll(request):
+    """
+    GET /api/v1/notifications/poll/?after=<cursor>
+    Returns as soon as there is something newer than `after`, or empty on timeout.
+    """
+    user_id = await _authenticate_user(request)
+    if user_id is None:
+        return JsonResponse({'error': 'Access token required'}, status=401)
+
+    config = get_stream_settings()
+    after = _parse_cursor(request.GET.get('after'))
+    if after is None:
+        after = await sync_to_async(feed.latest_id)()
+
+    deadline = time.monotonic() + config['long_poll_seconds']
+    deliveries = []
+    while time.monotonic() < deadline:
+        latest = await sync_to_async(feed.latest_id)()
+        if latest > after:
+            deliveries = await sync_to_async(feed.deliveries_after)(user_id, after)
+            if deliveries:
+                break
+            after = latest  # Newer notifications exist, none for this user
+        await asyncio.sleep(config['poll_seconds'])
+
+    items = _serialize(deliveries)
+    return JsonResponse({
+        'notifications': items,
+        'cursor': items[-1]['cursor'] if items else after,
+        'unread_count': await sync_to_async(feed.unread_count)(user_id),
+    })
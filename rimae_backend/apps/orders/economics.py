@@ -0,0 +1,151 @@
+"""
+Orders Economics - Per-product and per-variant unit economics
+MVVM: Service Layer
+
+One grouped query over order_items joined to orders yields, per product
+(or product + variant), units, revenue, FIFO cost of goods and the item's
+share of every order-level amount. An item's share of its order is
+total_price / subtotal:
+
+- adjustments: total_amount - subtotal (shipping charged, tax, discount)
+- shipping_cost, packaging_cost, payment_gateway_fee, cac
+
+so net profit per row is revenue + adjustments - cogs - allocated costs,
+and the rows of a period add up to the same net profit as its orders.
+
+Reports are cached per (period, filters, grouping) under the latest order
+change; periods that ended before today keep longer.
+"""
+import hashlib
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Max, Sum, Value, When
+from django.utils import timezone
+
+from .models import CENT, Order, OrderItem
+
+ALLOCATED = {
+    'adjustments': F('order__total_amount') - F('order__subtotal'),
+    'shipping_cost': F('order__shipping_cost'),
+    'packaging_cost': F('order__packaging_cost'),
+    'gateway_fee': F('order__payment_gateway_fee'),
+    'cac': F('order__cac'),
+}
+GROUPINGS = {
+    'product': ['product_id'],
+    'variant': ['product_id', 'variant_id'],
+}
+ORDERING_FIELDS = {'units', 'revenue', 'cogs', 'gross_profit', 'net_profit', 'margin', 'net_profit_per_unit'}
+# Wide enough for sums over millions of rows
+TOTAL = DecimalField(max_digits=20, decimal_places=4)
+
+
+def get_economics_settings():
+    return {
+        'statuses': getattr(settings, 'UNIT_ECONOMICS_STATUSES', ['delivered']),
+        'open_period_seconds': getattr(settings, 'UNIT_ECONOMICS_CACHE_SECONDS', 300),
+        'closed_period_seconds': getattr(settings, 'UNIT_ECONOMICS_CLOSED_CACHE_SECONDS', 24 * 3600),
+    }
+
+
+def _allocated(amount):
+    """SUM of this item's share of an order-level amount."""
+    return Sum(Case(
+        When(order__subtotal__gt=0, then=ExpressionWrapper(
+            amount * F('total_price') / F('order__subtotal'), output_field=TOTAL
+        )),
+        default=Value(Decimal('0')),
+        output_field=TOTAL,
+    ))
+
+
+def period_bounds(date_from=None, date_to=None):
+    """Aware [start, end) datetimes for inclusive local dates; either side may be open."""
+    start = timezone.make_aware(datetime.combine(date_from, time.min)) if date_from else None
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)) if date_to else None
+    return start, end
+
+
+def sku_rows(date_from=None, date_to=None, category=None, group='variant', statuses=None):
+    """One grouped query: a dict of sums per product (or variant)."""
+    statuses = statuses or get_economics_settings()['statuses']
+    start, end = period_bounds(date_from, date_to)
+
+    items = OrderItem.objects.filter(order__status__in=statuses)
+    if start:
+        items = items.filter(order__created_at__gte=start)
+    if end:
+        items = items.filter(order__created_at__lt=end)
+    if category:
+        items = items.filter(product__category=category)
+
+    return items.values(*GROUPINGS[group]).annotate(
+        sku=Max('sku'),
+        name=Max('product_name'),
+        category=Max('product__category'),
+        **({'variant_name': Max('variant_name')} if group == 'variant' else {}),
+        orders=Count('order_id', distinct=True),
+        units=Sum('quantity'),
+        revenue=Sum('total_price'),
+        cogs=Sum(ExpressionWrapper(F('unit_cost') * F('quantity'), output_field=TOTAL)),
+        gross_profit=Sum('profit'),
+        **{name: _allocated(amount) for name, amount in ALLOCATED.items()},
+    ).order_by()
+
+
+def _money(value):
+    return float((value or Decimal('0')).quantize(CENT))
+
+
+def _finish(row):
+    """Net profit, margin and per-unit figures for one row of sums."""
+    costs = sum((row[name] or Decimal('0')) for name in ALLOCATED if name != 'adjustments')
+    net_revenue = (row['revenue'] or Decimal('0')) + (row['adjustments'] or Decimal('0'))
+    net_profit = net_revenue - (row['cogs'] or Decimal('0')) - costs
+    units = row['units'] or 0
+    out = {key: value for key, value in row.items() if not isinstance(value, Decimal)}
+    out.update({key: _money(value) for key, value in row.items() if isinstance(value, Decimal)})
+    out.update({
+        'net_revenue': _money(net_revenue),
+        'net_profit': _money(net_profit),
+        'margin': float((net_profit * 100 / net_revenue).quantize(CENT)) if net_revenue else 0,
+        'net_profit_per_unit': _money(net_profit / units) if units else 0,
+    })
+    return out
+
+
+def report(date_from=None, date_to=None, category=None, group='variant', ordering='-net_profit'):
+    """Cached per-SKU report: {'period', 'rows', 'totals'}."""
+    config = get_economics_settings()
+    latest = Order.objects.last_updated()
+    key = 'orders:unit-economics:' + hashlib.sha256(repr((
+        date_from, date_to, category, group, ordering, sorted(config['statuses']), latest,
+    )).encode()).hexdigest()[:32]
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = [_finish(row) for row in sku_rows(date_from, date_to, category, group, config['statuses'])]
+    field = ordering.lstrip('-')
+    rows.sort(key=lambda row: row[field], reverse=ordering.startswith('-'))
+
+    totals = {
+        name: round(sum(row[name] for row in rows), 2)
+        for name in ('revenue', *ALLOCATED, 'net_revenue', 'cogs', 'gross_profit', 'net_profit')
+    }
+    totals['units'] = sum(row['units'] for row in rows)
+    totals['margin'] = round(totals['net_profit'] * 100 / totals['net_revenue'], 2) if totals['net_revenue'] else 0
+
+    result = {
+        'period': {'from': date_from, 'to': date_to},
+        'group': group,
+        'category': category,
+        'rows': rows,
+        'totals': totals,
+    }
+    closed = date_to is not None and date_to < timezone.localdate()
+    cache.set(key, result, config['closed_period_seconds'] if closed else config['open_period_seconds'])
+    return result
@@ -0,0 +1,24 @@
+"""
+Orders outbox handlers - run by the outbox worker, not in the request
+"""
+from django.core.mail import send_mail
+
+from apps.events.outbox import handler, ORDER_CREATED
+from .models import Order
+
+
+@handler(ORDER_CREATED)
+def send_order_confirmation(payload):
+    order = Order.objects.select_related('user').filter(pk=payload['order_id']).first()
+    if not order or not order.user or not order.user.email:
+        return
+    send_mail(
+        subject=f'Your RIMAE order {order.order_number}',
+        message=(
+            f'Hi {order.shipping_name},\n\n'
+            f'Thanks for your order {order.order_number} of Rs. {order.total_amount}. '
+            f'We will let you know when it ships.\n\n- RIMAE'
+        ),
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
@@ -0,0 +1,233 @@
+"""
+Benchmark the orjson renderer/parser against DRF's on synthetic payloads
+shaped like the product list, admin order list and cart responses (no
+database access). Also checks the rendered bytes are identical.
+
+    python manage.py benchmark_json
+    python manage.py benchmark_json --page-size 100 --repeat 500
+"""
+import io
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from config.parsers import ORJSONParser
+from config.renderers import ORJSONRenderer
+
+SIZES = [('8ml', 499), ('50ml', 1899), ('100ml', 2999)]
+NOTES = ['Oud', 'Rose', 'Amber', 'Sandalwood', 'Vanilla', 'Musk', 'Bergamot', 'Saffron', 'Jasmine', 'Vetiver']
+
+
+def _money(value):
+    return f'{value:.2f}'
+
+
+def _timestamp(rng):
+    moment = datetime(2024, 1, 1, tzinfo=dt_timezone.utc) + timedelta(seconds=rng.randint(0, 60 * 86400))
+    return moment.isoformat().replace('+00:00', 'Z')
+
+
+def _variant(rng, size, mrp):
+    discount = rng.choice([0, 10, 15, 20])
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'size': size,
+        'mrp': _money(mrp),
+        'discount': discount,
+        'price': _money(mrp * (100 - discount) / 100),
+    }
+
+
+def _product(rng):
+    name = f'{rng.choice(NOTES)} {rng.choice(NOTES)} Eau de Parfum'
+    urls = [f'https://cdn.rimae.com/products/{rng.getrandbits(40):x}.jpg' for _ in range(4)]
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'name': name,
+        'sku': f'RM{rng.randint(1000, 9999)}',
+        'product_type': 'perfume',
+        'gender': rng.choice(['men', 'women', 'unisex']),
+        'category': 'luxury',
+        'notes': rng.sample(NOTES, 3),
+        'description': f'{name} — a long-lasting blend with {", ".join(rng.sample(NOTES, 4))} notes. ' * 3,
+        'occasion': ['evening', 'party'],
+        'tag': rng.choice(['bestseller', 'new', '']),
+        'sillage': 'strong',
+        'projection': 'moderate',
+        'longevity': '8-10 hours',
+        'max_order_threshold': 5,
+        'stock_id': f'STK{rng.randint(10000, 99999)}',
+        'is_active': True,
+        'created_at': _timestamp(rng),
+        'variants': [_variant(rng, size, mrp) for size, mrp in SIZES],
+        'product_images': [{
+            'image': urls[0],
+            'images': urls[1:],
+            'srcset': ', '.join(f'{urls[0]}?w={w} {w}w' for w in (200, 400, 800, 1600)),
+            'images_srcset': [', '.join(f'{url}?w={w} {w}w' for w in (200, 400, 800, 1600)) for url in urls[1:]],
+        }],
+    }
+
+
+def _order(rng):
+    items = []
+    for _ in range(rng.randint(1, 4)):
+        size, price = rng.choice(SIZES)
+        quantity = rng.randint(1, 3)
+        items.append({
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'profit': _money((price * 0.55) * quantity),
+            'product_name': f'{rng.choice(NOTES)} Eau de Parfum',
+            'variant_name': size,
+            'sku': f'RM{rng.randint(1000, 9999)}',
+            'quantity': quantity,
+            'unit_price': _money(price),
+            'unit_cost': _money(price * 0.45),
+            'total_price': _money(price * quantity),
+            'costed_at': _timestamp(rng),
+            'order': None,
+            'product': str(uuid.UUID(int=rng.getrandbits(128))),
+            'variant': str(uuid.UUID(int=rng.getrandbits(128))),
+        })
+    subtotal = sum(float(item['total_price']) for item in items)
+    order = {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'items': items,
+        'gross_profit': _money(subtotal * 0.55),
+        'net_profit': _money(subtotal * 0.4),
+        'profit_margin': _money(40),
+        'customer_name': 'Aanya',
+        'customer_email': f'customer{rng.randint(1, 10 ** 6)}@example.com',
+        'order_number': f'RM{rng.randint(10 ** 9, 10 ** 10 - 1)}',
+        'status': rng.choice(['confirmed', 'shipped', 'delivered']),
+        'payment_status': 'paid',
+        'subtotal': _money(subtotal),
+        'discount_amount': _money(0),
+        'shipping_charged': _money(79),
+        'tax_amount': _money(subtotal * 0.18),
+        'total_amount': _money(subtotal * 1.18 + 79),
+        'cogs': _money(subtotal * 0.45),
+        'shipping_cost': _money(62),
+        'packaging_cost': _money(25),
+        'payment_gateway_fee': _money(subtotal * 0.02),
+        'cac': _money(120),
+        'shipping_name': 'Aanya Sharma',
+        'shipping_phone': '9876543210',
+        'shipping_address1': '12, MG Road, Indiranagar',
+        'shipping_address2': '',
+        'shipping_city': 'Bengaluru',
+        'shipping_state': 'Karnataka',
+        'shipping_pincode': str(rng.randint(110001, 855999)),
+        'payment_method': 'upi',
+        'payment_id': f'pay_{rng.getrandbits(48):x}',
+        'customer_notes': '',
+        'admin_notes': '',
+        'created_at': _timestamp(rng),
+        'updated_at': _timestamp(rng),
+        'user': str(uuid.UUID(int=rng.getrandbits(128))),
+        'coupon': None,
+    }
+    for item in items:
+        item['order'] = order['id']
+    return order
+
+
+def _page(results, count):
+    page = ReturnDict(serializer=None)
+    page.update({
+        'count': count,
+        'next': 'https://api.rimae.com/api/v1/?page=2',
+        'previous': None,
+        'results': ReturnList(results, serializer=None),
+    })
+    return page
+
+
+def payloads(page_size, seed):
+    rng = random.Random(seed)
+    cart_products = [_product(rng) for _ in range(6)]
+    cart = ReturnDict(serializer=None)
+    cart.update({
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'items': [{
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'product': product,
+            'variant': product['variants'][1],
+            'quantity': rng.randint(1, 3),
+            'created_at': _timestamp(rng),
+        } for product in cart_products],
+        'total': 11394.0,
+        'updated_at': _timestamp(rng),
+    })
+    return [
+        ('product list', _page([_product(rng) for _ in range(page_size)], 480)),
+        ('admin order list', _page([_order(rng) for _ in range(page_size)], 25000)),
+        ('cart', cart),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare render/parse time, peak allocations and output bytes of the orjson and DRF JSON codecs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        drf_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        drf_parser, fast_parser = JSONParser(), ORJSONParser()
+        context = {'encoding': 'utf-8'}
+
+        for name, data in payloads(options['page_size'], options['seed']):
+            expected = drf_renderer.render(data, 'application/json')
+            actual = fast_renderer.render(data, 'application/json')
+
+            rows = []
+            for label, render, parse in (
+                ('drf', drf_renderer.render, drf_parser.parse),
+                ('orjson', fast_renderer.render, fast_parser.parse),
+            ):
+                render_ms = self._time(lambda: render(data, 'application/json'), repeat)
+                parse_ms = self._time(lambda: parse(io.BytesIO(expected), None, context), repeat)
+                rows.append((label, render_ms, parse_ms, self._peak(lambda: render(data, 'application/json'))))
+
+            (_, drf_render, drf_parse, drf_peak), (_, fast_render, fast_parse, fast_peak) = rows
+            self.stdout.write(f'{name} ({len(expected) / 1024:.1f} KiB)')
+            for label, render_ms, parse_ms, peak in rows:
+                self.stdout.write(
+                    f'  {label:<7} render {render_ms:8.3f} ms  parse {parse_ms:8.3f} ms  peak {peak / 1024:8.1f} KiB'
+                )
+            self.stdout.write(
+                f'  speedup render x{drf_render / fast_render:.1f}, parse x{drf_parse / fast_parse:.1f}, '
+                f'allocations x{drf_peak / max(fast_peak, 1):.1f} fewer'
+            )
+            if actual == expected:
+                self.stdout.write(self.style.SUCCESS('  output identical'))
+            else:
+                self.stdout.write(self.style.ERROR('  output differs from DRF'))
+
+    @staticmethod
+    def _time(fn, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    @staticmethod
+    def _peak(fn):
+        tracemalloc.start()
+        try:
+            fn()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
@@ -0,0 +1,13 @@
+"""Recompute stored profit columns for every order and order item."""
+from django.core.management.base import BaseCommand
+
+from apps.orders.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = 'Backfill Order.gross_profit / net_profit / profit_margin and OrderItem.profit in two UPDATEs.'
+
+    def handle(self, *args, **options):
+        items = OrderItem.objects.all().refresh_profit()
+        orders = Order.objects.all().refresh_profit()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {orders} order(s) and {items} item(s)'))
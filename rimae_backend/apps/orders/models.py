@@ -3,12 +3,49 @@ Orders Models - Order management with Unit Economics
 MVVM: Model Layer
 """
 from django.db import models
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
 import uuid
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+MONEY = DecimalField(max_digits=10, decimal_places=2)
+
+
+class OrderQuerySet(models.QuerySet):
+    def refresh_profit(self):
+        """
+        Recompute the stored profit columns in one UPDATE. Use after any
+        queryset .update() that touches total_amount or a cost column.
+        """
+        net = F('total_amount') - (
+            F('cogs') + F('shipping_cost') + F('packaging_cost') + F('payment_gateway_fee') + F('cac')
+        )
+        return self.update(
+            gross_profit=ExpressionWrapper(F('total_amount') - F('cogs'), output_field=MONEY),
+            net_profit=ExpressionWrapper(net, output_field=MONEY),
+            profit_margin=Case(
+                When(total_amount__gt=0, then=ExpressionWrapper(net * 100 / F('total_amount'), output_field=MONEY)),
+                default=Value(Decimal('0')),
+                output_field=MONEY,
+            ),
+        )
+
+    def last_updated(self):
+        """updated_at of the most recently saved order (an index read), or None. Cache versions key off it."""
+        return self.order_by('-updated_at').values_list('updated_at', flat=True).first()
+
+
+class OrderItemQuerySet(models.QuerySet):
+    def refresh_profit(self):
+        """Recompute stored item profit in one UPDATE (after .update() of prices or costs)."""
+        return self.update(profit=ExpressionWrapper(F('total_price') - F('unit_cost') * F('quantity'), output_field=MONEY))
 
 
 class Order(models.Model):
     """Order with full unit economics tracking."""
+    # Fields profit is derived from
+    PROFIT_FIELDS = {'total_amount', 'cogs', 'shipping_cost', 'packaging_cost', 'payment_gateway_fee', 'cac'}
+
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
@@ -38,6 +75,7 @@ class Order(models.Model):
     subtotal = models.DecimalField(max_digits=10, decimal_places=2)
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     shipping_charged = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    shipping_carrier = models.CharField(max_length=20, blank=True)  # Carrier code quoted at checkout
     tax_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     
@@ -48,21 +86,11 @@ class Order(models.Model):
     payment_gateway_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     cac = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Customer Acquisition Cost
     
-    # Computed profit
-    @property
-    def gross_profit(self):
-        return self.total_amount - self.cogs
-    
-    @property
-    def net_profit(self):
-        total_costs = self.cogs + self.shipping_cost + self.packaging_cost + self.payment_gateway_fee + self.cac
-        return self.total_amount - total_costs
-    
-    @property
-    def profit_margin(self):
-        if self.total_amount > 0:
-            return (self.net_profit / self.total_amount) * 100
-        return Decimal('0')
+    # Computed profit, stored so admin lists sort / filter and analytics sum in SQL;
+    # maintained by save() / refresh_profit()
+    gross_profit = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    net_profit = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    profit_margin = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)  # Percent of total
     
     # Shipping Address
     shipping_name = models.CharField(max_length=100)
@@ -87,14 +115,39 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         db_table = 'orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['net_profit'], name='orders_net_profit_idx'),
+            # Latest change: analytics / unit economics cache versions
+            models.Index(fields=['-updated_at'], name='orders_updated_idx'),
+            models.Index(fields=['profit_margin'], name='orders_profit_margin_idx'),
+            # Period reports (orders/economics.py)
+            models.Index(fields=['status', 'created_at'], name='orders_status_created_idx'),
+        ]
+    
+    def compute_profit(self):
+        total = Decimal(self.total_amount)
+        costs = self.cogs + self.shipping_cost + self.packaging_cost + self.payment_gateway_fee + self.cac
+        self.gross_profit = total - self.cogs
+        self.net_profit = total - costs
+        if total > 0:
+            # Rounded as refresh_profit()'s UPDATE is (numeric columns round half up)
+            self.profit_margin = (self.net_profit * 100 / total).quantize(CENT, ROUND_HALF_UP)
+        else:
+            self.profit_margin = Decimal('0')
     
     def save(self, *args, **kwargs):
         if not self.order_number:
             from datetime import datetime
             self.order_number = f"ORD{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        self.compute_profit()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.PROFIT_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'gross_profit', 'net_profit', 'profit_margin'}
         super().save(*args, **kwargs)
 
 
@@ -111,11 +164,33 @@ class OrderItem(models.Model):
     
     quantity = models.PositiveIntegerField(default=1)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
-    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # COGS per unit
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # COGS per unit, from FIFO cost layers
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    costed_at = models.DateTimeField(null=True, blank=True)  # Set once cost layers were consumed
+    # total_price - unit_cost * quantity; maintained by save() / refresh_profit()
+    profit = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+
+    objects = OrderItemQuerySet.as_manager()
+
+    # Fields profit is derived from
+    PROFIT_FIELDS = {'total_price', 'unit_cost', 'quantity'}
 
     class Meta:
         db_table = 'order_items'
+        indexes = [
+            # Per-product profit sums read only the index
+            models.Index(fields=['product', 'profit'], name='order_items_product_profit_idx'),
+        ]
+
+    def compute_profit(self):
+        self.profit = self.total_price - self.unit_cost * self.quantity
+
+    def save(self, *args, **kwargs):
+        self.compute_profit()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.PROFIT_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'profit'}
+        super().save(*args, **kwargs)
 
 
 class Coupon(models.Model):
@@ -178,3 +253,7 @@ class Wishlist(models.Model):
     class Meta:
         db_table = 'wishlist'
         unique_together = ['user', 'product']
+        indexes = [
+            # Alert fan-out walks one product's wishlisters in user order
+            models.Index(fields=['product', 'user'], name='wishlist_product_user_idx'),
+        ]
@@ -4,25 +4,25 @@ MVVM: ViewModel Layer
 """
 from rest_framework import serializers
 from .models import Order, OrderItem, Coupon, Cart, CartItem, Wishlist
-from apps.products.serializers import ProductSerializer
+from apps.products.serializers import ProductSerializer, prefetch_srcsets, wants_srcsets
+from config.fieldsets import SparseFieldsetMixin
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    profit = serializers.SerializerMethodField()
+class OrderItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    profit = serializers.FloatField(read_only=True)  # Stored column
+    expandable_fields = {'product': 'apps.products.serializers.ProductSerializer'}
     
     class Meta:
         model = OrderItem
         fields = '__all__'
-    
-    def get_profit(self, obj):
-        return float(obj.total_price - (obj.unit_cost * obj.quantity))
 
 
-class OrderListSerializer(serializers.ModelSerializer):
+class OrderListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Light serializer for order lists."""
     customer_name = serializers.CharField(source='user.first_name', read_only=True)
     customer_email = serializers.CharField(source='user.email', read_only=True)
     item_count = serializers.SerializerMethodField()
+    sparse_requires = {'item_count': []}  # Counts with its own query
     
     class Meta:
         model = Order
@@ -35,12 +35,12 @@ class OrderListSerializer(serializers.ModelSerializer):
         return obj.items.count()
 
 
-class OrderDetailSerializer(serializers.ModelSerializer):
+class OrderDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Full order with unit economics."""
     items = OrderItemSerializer(many=True, read_only=True)
     gross_profit = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     net_profit = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    profit_margin = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    profit_margin = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     customer_name = serializers.CharField(source='user.first_name', read_only=True)
     customer_email = serializers.CharField(source='user.email', read_only=True)
     
@@ -52,22 +52,23 @@ class OrderDetailSerializer(serializers.ModelSerializer):
 class OrderCreateSerializer(serializers.ModelSerializer):
     """Create order from cart."""
     items = serializers.ListField(child=serializers.DictField(), write_only=True)
+    carrier = serializers.CharField(write_only=True, required=False, allow_blank=True)  # Default: cheapest quote
     
     class Meta:
         model = Order
         fields = [
             'shipping_name', 'shipping_phone', 'shipping_address1', 'shipping_address2',
             'shipping_city', 'shipping_state', 'shipping_pincode', 'payment_method',
-            'customer_notes', 'items', 'coupon'
+            'customer_notes', 'items', 'coupon', 'carrier'
         ]
 
 
 class OrderAdminUpdateSerializer(serializers.ModelSerializer):
-    """Admin can update costs for unit economics."""
+    """Admin can update costs for unit economics. COGS comes from FIFO cost layers."""
     class Meta:
         model = Order
         fields = [
-            'status', 'payment_status', 'cogs', 'shipping_cost', 
+            'status', 'payment_status', 'shipping_cost', 
             'packaging_cost', 'payment_gateway_fee', 'cac', 'admin_notes'
         ]
 
@@ -78,7 +79,7 @@ class CouponSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.UUIDField(write_only=True)
     variant_id = serializers.UUIDField(write_only=True, required=False)
@@ -88,14 +89,21 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'product_id', 'variant', 'variant_id', 'quantity', 'created_at']
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total = serializers.SerializerMethodField()
+    sparse_requires = {'total': ['items__quantity', 'items__variant__price', 'items__product']}
     
     class Meta:
         model = Cart
         fields = ['id', 'items', 'total', 'updated_at']
     
+    def to_representation(self, instance):
+        items = self.fields.get('items')
+        if items is not None and wants_srcsets(items.child.fields.get('product')):
+            prefetch_srcsets(self, [item.product for item in instance.items.all()])
+        return super().to_representation(instance)
+    
     def get_total(self, obj):
         total = 0
         for item in obj.items.all():
@@ -104,10 +112,21 @@ class CartSerializer(serializers.ModelSerializer):
         return float(total)
 
 
-class WishlistSerializer(serializers.ModelSerializer):
+class WishlistListSerializer(serializers.ListSerializer):
+    """Resolves image srcsets for the whole page with a single asset query."""
+
+    def to_representation(self, data):
+        items = data.all() if hasattr(data, 'all') else data
+        if wants_srcsets(self.child.fields.get('product')):
+            prefetch_srcsets(self, [item.product for item in items])
+        return super().to_representation(items)
+
+
+class WishlistSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.UUIDField(write_only=True)
     
     class Meta:
         model = Wishlist
         fields = ['id', 'product', 'product_id', 'created_at']
+        list_serializer_class = WishlistListSerializer
@@ -3,11 +3,11 @@ Orders URL Configuration
 """
 from django.urls import path
 from .views import (
-    CartView, CartAddItem, CartUpdateItem, CartRemoveItem,
+    CartView, CartAddItem, CartUpdateItem, CartRemoveItem, CartShippingQuoteView,
     WishlistView, WishlistRemove,
     UserOrderListView, UserOrderDetailView, CreateOrderView, ApplyCouponView,
     AdminOrderListView, AdminOrderDetailView,
-    AdminCouponListView, AdminCouponDetailView, UnitEconomicsView
+    AdminCouponListView, AdminCouponDetailView, UnitEconomicsView, SkuUnitEconomicsView
 )
 
 urlpatterns = [
@@ -16,6 +16,7 @@ urlpatterns = [
     path('cart/add/', CartAddItem.as_view(), name='cart-add'),
     path('cart/update/<uuid:item_id>/', CartUpdateItem.as_view(), name='cart-update'),
     path('cart/remove/<uuid:item_id>/', CartRemoveItem.as_view(), name='cart-remove'),
+    path('cart/shipping-quote/', CartShippingQuoteView.as_view(), name='cart-shipping-quote'),
     
     # Wishlist
     path('wishlist/', WishlistView.as_view(), name='wishlist'),
@@ -33,4 +34,5 @@ urlpatterns = [
     path('admin/coupons/', AdminCouponListView.as_view(), name='admin-coupons'),
     path('admin/coupons/<uuid:pk>/', AdminCouponDetailView.as_view(), name='admin-coupon-detail'),
     path('admin/unit-economics/', UnitEconomicsView.as_view(), name='unit-economics'),
+    path('admin/unit-economics/skus/', SkuUnitEconomicsView.as_view(), name='unit-economics-skus'),
 ]
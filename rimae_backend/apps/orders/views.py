@@ -2,10 +2,15 @@
 Orders Views - API endpoints
 MVVM: View Layer
 """
+from datetime import date
+from decimal import Decimal
+
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db import transaction
 from django.db.models import Sum, F, Count
+from . import economics
 from .models import Order, OrderItem, Coupon, Cart, CartItem, Wishlist
 from .serializers import (
     OrderListSerializer, OrderDetailSerializer, OrderCreateSerializer,
@@ -13,22 +18,35 @@ from .serializers import (
     CartSerializer, CartItemSerializer, WishlistSerializer
 )
 from apps.accounts.views import IsAdmin
+from config.fieldsets import SparseQuerysetMixin, prefetch_for
+from config.projections import Projection, ProjectedListMixin
 from apps.products.models import Product, ProductVariant
+from apps.events import outbox
+from apps.inventory import costing, rates, routing
 
 
 # ============ USER ENDPOINTS ============
 
+def _cart_response(request, cart):
+    serializer = CartSerializer(cart, context={'request': request})
+    prefetch_for([cart], serializer)
+    return Response(serializer.data)
+
+
 class CartView(generics.RetrieveAPIView):
     """Get current user's cart."""
     serializer_class = CartSerializer
     
     def get_object(self):
         cart, _ = Cart.objects.get_or_create(user=self.request.user)
+        prefetch_for([cart], self.get_serializer())
         return cart
 
 
 class CartAddItem(APIView):
     """Add item to cart."""
+    throttle_scope = 'cart'
+
     def post(self, request):
         cart, _ = Cart.objects.get_or_create(user=request.user)
         product_id = request.data.get('product_id')
@@ -55,7 +73,7 @@ class CartAddItem(APIView):
             cart_item.quantity += quantity
             cart_item.save()
         
-        return Response(CartSerializer(cart).data)
+        return _cart_response(request, cart)
 
 
 class CartUpdateItem(APIView):
@@ -74,7 +92,7 @@ class CartUpdateItem(APIView):
             cart_item.save()
         
         cart = Cart.objects.get(user=request.user)
-        return Response(CartSerializer(cart).data)
+        return _cart_response(request, cart)
 
 
 class CartRemoveItem(APIView):
@@ -87,10 +105,32 @@ class CartRemoveItem(APIView):
             pass
         
         cart = Cart.objects.get(user=request.user)
-        return Response(CartSerializer(cart).data)
+        return _cart_response(request, cart)
 
 
-class WishlistView(generics.ListCreateAPIView):
+class CartShippingQuoteView(APIView):
+    """GET ?pincode=XXXXXX - shipping rate per carrier for the current cart."""
+    def get(self, request):
+        pincode = request.query_params.get('pincode', '').strip()
+        if not pincode.isdigit():
+            return Response({'error': 'A numeric pincode is required'}, status=400)
+        
+        cart = Cart.objects.filter(user=request.user).first()
+        items = cart.items.select_related('variant') if cart else []
+        grams, quotes = rates.cart_quotes(
+            pincode, [(item.variant.size if item.variant else None, item.quantity) for item in items]
+        )
+        return Response({
+            'pincode': pincode,
+            'weight_grams': grams,
+            'quotes': [
+                {'carrier': code, 'rate': rate}
+                for code, rate in sorted(quotes.items(), key=lambda q: q[1])
+            ],
+        })
+
+
+class WishlistView(SparseQuerysetMixin, generics.ListCreateAPIView):
     """Get/add to wishlist."""
     serializer_class = WishlistSerializer
     
@@ -118,7 +158,7 @@ class WishlistRemove(APIView):
         return Response({'status': 'removed'})
 
 
-class UserOrderListView(generics.ListAPIView):
+class UserOrderListView(SparseQuerysetMixin, generics.ListAPIView):
     """User's order history."""
     serializer_class = OrderListSerializer
     
@@ -126,7 +166,7 @@ class UserOrderListView(generics.ListAPIView):
         return Order.objects.filter(user=self.request.user)
 
 
-class UserOrderDetailView(generics.RetrieveAPIView):
+class UserOrderDetailView(SparseQuerysetMixin, generics.RetrieveAPIView):
     """Get specific order."""
     serializer_class = OrderDetailSerializer
     
@@ -136,6 +176,9 @@ class UserOrderDetailView(generics.RetrieveAPIView):
 
 class CreateOrderView(APIView):
     """Create order from cart."""
+    throttle_scope = 'checkout'
+
+    @transaction.atomic
     def post(self, request):
         serializer = OrderCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -144,37 +187,47 @@ class CreateOrderView(APIView):
         if not cart or not cart.items.exists():
             return Response({'error': 'Cart is empty'}, status=400)
         
-        # Calculate totals
+        # Calculate totals. Unit costs and COGS come from FIFO cost layers
+        # once the order is fulfilled (see inventory/costing.py).
         subtotal = 0
-        cogs = 0
         items_data = []
         
         for cart_item in cart.items.all():
             price = cart_item.variant.price if cart_item.variant else cart_item.product.price
-            cost = cart_item.variant.cost_price if cart_item.variant else cart_item.product.cost_price
             line_total = price * cart_item.quantity
             subtotal += line_total
-            cogs += cost * cart_item.quantity
             
             items_data.append({
                 'product': cart_item.product,
                 'variant': cart_item.variant,
                 'product_name': cart_item.product.name,
-                'variant_name': cart_item.variant.name if cart_item.variant else '',
-                'sku': cart_item.variant.sku if cart_item.variant else cart_item.product.sku,
+                'variant_name': cart_item.variant.size if cart_item.variant else '',
+                'sku': cart_item.product.sku,
                 'quantity': cart_item.quantity,
                 'unit_price': price,
-                'unit_cost': cost,
                 'total_price': line_total,
             })
         
+        # Shipping from the rate cards, as quoted for the cart
+        _, quotes = rates.cart_quotes(
+            serializer.validated_data['shipping_pincode'],
+            [(item['variant'].size if item['variant'] else None, item['quantity']) for item in items_data],
+        )
+        carrier = serializer.validated_data.get('carrier') or (min(quotes, key=quotes.get) if quotes else '')
+        if carrier and carrier not in quotes:
+            return Response({'error': f'Carrier {carrier} does not deliver to this pincode'}, status=400)
+        if not quotes and rates.get_rate_table().has_rates:
+            return Response({'error': 'No carrier delivers to this pincode'}, status=400)
+        shipping_charged = quotes.get(carrier, Decimal('0'))
+        
         # Create order
         order = Order.objects.create(
             user=request.user,
             subtotal=subtotal,
-            total_amount=subtotal,  # Add shipping/tax later
-            cogs=cogs,
-            **{k: v for k, v in serializer.validated_data.items() if k != 'items'}
+            shipping_charged=shipping_charged,
+            shipping_carrier=carrier,
+            total_amount=subtotal + shipping_charged,  # Tax later
+            **{k: v for k, v in serializer.validated_data.items() if k not in ('items', 'carrier')}
         )
         
         # Create order items
@@ -184,6 +237,15 @@ class CreateOrderView(APIView):
         # Clear cart
         cart.items.all().delete()
         
+        # Confirmation email etc. happen in the outbox worker
+        outbox.publish(
+            outbox.ORDER_CREATED,
+            order_id=order.id,
+            order_number=order.order_number,
+            user_id=request.user.id,
+            total_amount=order.total_amount,
+        )
+        
         return Response(OrderDetailSerializer(order).data, status=201)
 
 
@@ -209,19 +271,27 @@ class ApplyCouponView(APIView):
 
 # ============ ADMIN ENDPOINTS ============
 
-class AdminOrderListView(generics.ListAPIView):
+class AdminOrderListView(ProjectedListMixin, generics.ListAPIView):
     """Admin: List all orders with unit economics."""
     serializer_class = OrderDetailSerializer
     permission_classes = [IsAdmin]
-    filterset_fields = ['status', 'payment_status']
+    filterset_fields = {
+        'status': ['exact'],
+        'payment_status': ['exact'],
+        # ?net_profit__lt=0, ?profit_margin__gte=20 ... on the stored columns
+        'gross_profit': ['gte', 'lte', 'lt', 'gt'],
+        'net_profit': ['gte', 'lte', 'lt', 'gt'],
+        'profit_margin': ['gte', 'lte', 'lt', 'gt'],
+    }
     search_fields = ['order_number', 'user__email', 'shipping_name']
-    ordering_fields = ['created_at', 'total_amount', 'net_profit']
+    ordering_fields = ['created_at', 'total_amount', 'gross_profit', 'net_profit', 'profit_margin']
+    projection = Projection()
     
     def get_queryset(self):
         return Order.objects.select_related('user').prefetch_related('items')
 
 
-class AdminOrderDetailView(generics.RetrieveUpdateAPIView):
+class AdminOrderDetailView(SparseQuerysetMixin, generics.RetrieveUpdateAPIView):
     """Admin: Get/update order with costs."""
     permission_classes = [IsAdmin]
     queryset = Order.objects.all()
@@ -230,6 +300,15 @@ class AdminOrderDetailView(generics.RetrieveUpdateAPIView):
         if self.request.method in ['PUT', 'PATCH']:
             return OrderAdminUpdateSerializer
         return OrderDetailSerializer
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        order = serializer.save()
+        if order.status in costing.FULFILLED_STATUSES:
+            routing.fulfil_allocations(order.id, user=self.request.user)
+            costing.cost_order(order.id)
+        elif order.status == 'cancelled':
+            routing.release_allocations(order.id)
 
 
 class AdminCouponListView(generics.ListCreateAPIView):
@@ -262,6 +341,8 @@ class UnitEconomicsView(APIView):
             total_packaging=Sum('packaging_cost'),
             total_gateway_fees=Sum('payment_gateway_fee'),
             total_cac=Sum('cac'),
+            total_gross_profit=Sum('gross_profit'),
+            total_net_profit=Sum('net_profit'),
             order_count=Count('id')
         )
         
@@ -279,6 +360,7 @@ class UnitEconomicsView(APIView):
         ).values('month').annotate(
             revenue=Sum('total_amount'),
             cogs=Sum('cogs'),
+            net_profit=Sum('net_profit'),
             orders=Count('id')
         ).order_by('month')
         
@@ -286,11 +368,41 @@ class UnitEconomicsView(APIView):
             'summary': {
                 'total_revenue': float(revenue),
                 'total_costs': float(total_costs),
-                'gross_profit': float(revenue - (totals['total_cogs'] or 0)),
-                'net_profit': float(revenue - total_costs),
-                'profit_margin': float((revenue - total_costs) / revenue * 100) if revenue else 0,
+                'gross_profit': float(totals['total_gross_profit'] or 0),
+                'net_profit': float(totals['total_net_profit'] or 0),
+                'profit_margin': float((totals['total_net_profit'] or 0) / revenue * 100) if revenue else 0,
                 'order_count': totals['order_count'],
                 'avg_order_value': float(revenue / totals['order_count']) if totals['order_count'] else 0,
             },
             'monthly': list(monthly)
         })
+
+
+class SkuUnitEconomicsView(APIView):
+    """
+    Admin: profitability per product or variant (see orders/economics.py).
+
+    GET /api/v1/orders/admin/unit-economics/skus/
+        ?from=YYYY-MM-DD&to=YYYY-MM-DD&category=...
+        &group=variant|product&ordering=-net_profit
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            date_from, date_to = (
+                date.fromisoformat(params[name]) if params.get(name) else None for name in ('from', 'to')
+            )
+        except ValueError:
+            return Response({'error': 'from / to must be YYYY-MM-DD'}, status=400)
+
+        group = params.get('group', 'variant')
+        if group not in economics.GROUPINGS:
+            return Response({'error': f'group must be one of {", ".join(economics.GROUPINGS)}'}, status=400)
+        ordering = params.get('ordering', '-net_profit')
+        if ordering.lstrip('-') not in economics.ORDERING_FIELDS:
+            return Response({'error': f'ordering must be one of {", ".join(sorted(economics.ORDERING_FIELDS))}'},
+                            status=400)
+
+        return Response(economics.report(date_from, date_to, params.get('category') or None, group, ordering))
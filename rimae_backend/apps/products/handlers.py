@@ -0,0 +1,10 @@
+"""
+Products outbox handlers - run by the outbox worker, not in the request
+"""
+from apps.events.outbox import handler, CATALOG_CHANGED
+from . import snapshots
+
+
+@handler(CATALOG_CHANGED)
+def regenerate_catalog_shards(payload):
+    snapshots.regenerate(payload['shards'], products=payload.get('products'))
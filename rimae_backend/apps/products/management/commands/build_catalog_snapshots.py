@@ -0,0 +1,26 @@
+"""
+Write the static catalog snapshots (sharded JSON + .gz/.br) and manifest.
+
+    python manage.py build_catalog_snapshots
+    python manage.py build_catalog_snapshots --shard all --shard gender/female
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products import snapshots
+
+
+class Command(BaseCommand):
+    help = 'Render catalog shards to disk; unchanged pages are not rewritten.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shard', action='append', dest='shards',
+            help='Only regenerate this shard (repeatable); default is every shard',
+        )
+
+    def handle(self, *args, **options):
+        summary = snapshots.regenerate(options['shards'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Regenerated {summary['shards']} shard(s), rendered {summary['pages_rendered']} page(s), "
+            f"wrote {summary['pages_written']} new; manifest version {summary['version']}"
+        ))
@@ -0,0 +1,47 @@
+"""
+Manage daily partitions of the product view events table (PostgreSQL).
+
+    python manage.py partition_product_views --convert           # once
+    python manage.py partition_product_views                     # daily cron: create ahead, drop expired
+    python manage.py partition_product_views --drop-before 2025-01-01
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.partitions import (
+    PartitionError, convert_to_partitioned, drop_partitions, ensure_partitions
+)
+
+
+class Command(BaseCommand):
+    help = 'Convert, extend or expire the partitioned product_views table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true', help='Rebuild product_views as a partitioned table')
+        parser.add_argument('--keep-legacy', action='store_true', help='Keep the pre-conversion table')
+        parser.add_argument('--days-ahead', type=int, help='Default: PRODUCT_VIEW_PARTITION_DAYS_AHEAD')
+        parser.add_argument('--drop-before', help='YYYY-MM-DD: drop partitions ending before this day '
+                                                  '(default: PRODUCT_VIEW_RETENTION_DAYS ago)')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['drop_before']:
+            try:
+                before = datetime.strptime(options['drop_before'], '%Y-%m-%d').replace(tzinfo=dt_timezone.utc)
+            except ValueError:
+                raise CommandError('--drop-before must be YYYY-MM-DD')
+
+        try:
+            if options['convert']:
+                if convert_to_partitioned(options['days_ahead'], options['keep_legacy']):
+                    self.stdout.write(self.style.SUCCESS('Converted product_views to daily partitions'))
+                else:
+                    self.stdout.write('product_views is already partitioned')
+
+            created = ensure_partitions(options['days_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'Partitions present: {created[0]} .. {created[-1]}'))
+            dropped = drop_partitions(before)
+            self.stdout.write(self.style.SUCCESS(f'Dropped {len(dropped)} expired partition(s)'))
+        except PartitionError as e:
+            raise CommandError(str(e))
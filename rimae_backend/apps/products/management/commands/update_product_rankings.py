@@ -0,0 +1,23 @@
+"""
+Fold completed time buckets into the trending / bestseller scores.
+
+    python manage.py update_product_rankings              # cron, once per bucket (hourly)
+    python manage.py update_product_rankings --rebuild    # zero and rescore the backfill window
+"""
+from django.core.management.base import BaseCommand
+
+from apps.products.ranking import rebuild_scores, update_scores
+
+
+class Command(BaseCommand):
+    help = 'Update time-decayed product ranking scores incrementally.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Reset all scores and rescore from scratch')
+
+    def handle(self, *args, **options):
+        summary = rebuild_scores() if options['rebuild'] else update_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {summary['products']} product score(s) through {summary['processed_until']:%Y-%m-%d %H:%M}"
+            f"{' (epoch rebased)' if summary['rebased'] else ''}"
+        ))
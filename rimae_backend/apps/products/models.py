@@ -52,12 +52,38 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Time-decayed popularity, maintained by products/ranking.py with queryset
+    # updates only; save() leaves them out so an edit can't overwrite them
+    trending_score = models.FloatField(default=0, editable=False)
+    bestselling_score = models.FloatField(default=0, editable=False)
+    RANKING_FIELDS = {'trending_score', 'bestselling_score'}
+
     class Meta:
         db_table = 'products'   # ✅ THIS GOES HERE
+        indexes = [
+            # Leaderboards: ?ordering=trending|bestselling, overall and per facet
+            models.Index(fields=['-trending_score', 'id'], name='products_trending_idx'),
+            models.Index(fields=['category', '-trending_score', 'id'], name='products_cat_trending_idx'),
+            models.Index(fields=['gender', '-trending_score', 'id'], name='products_gender_trending_idx'),
+            models.Index(fields=['product_type', '-trending_score', 'id'], name='products_type_trending_idx'),
+            models.Index(fields=['-bestselling_score', 'id'], name='products_bestselling_idx'),
+            models.Index(fields=['category', '-bestselling_score', 'id'], name='products_cat_bestsell_idx'),
+            models.Index(fields=['gender', '-bestselling_score', 'id'], name='products_gender_bestsell_idx'),
+            models.Index(fields=['product_type', '-bestselling_score', 'id'], name='products_type_bestsell_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.RANKING_FIELDS and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
 
 class ProductVariant(models.Model):
     SIZE_CHOICES = (
@@ -98,4 +124,40 @@ class ProductImage(models.Model):
         db_table = "product_images"
 
     def __str__(self):
-        return f"Images for {self.product.name}"
\ No newline at end of file
+        return f"Images for {self.product.name}"
+
+class ProductView(models.Model):
+    """
+    One storefront product page view. Written in batches by the view buffer
+    (products/pageviews.py), never one INSERT per view.
+    """
+    id = models.BigAutoField(primary_key=True)
+    product = models.ForeignKey(Product, related_name='views', on_delete=models.CASCADE)
+    user = models.ForeignKey('accounts.User', null=True, blank=True, related_name='product_views', on_delete=models.CASCADE)
+    visitor_id = models.CharField(max_length=64, blank=True)  # Anonymous storefront id
+    source = models.CharField(max_length=30, blank=True)  # listing, search, recommendation, ...
+    viewed_at = models.DateTimeField()
+
+    class Meta:
+        # In PostgreSQL this is a table partitioned by day on viewed_at
+        # (see products/partitions.py); the DB primary key is (id, viewed_at).
+        db_table = 'product_views'
+        indexes = [
+            models.Index(fields=['user', '-viewed_at'], name='product_views_user_recent_idx',
+                         condition=models.Q(user__isnull=False)),
+            models.Index(fields=['product', 'viewed_at'], name='product_views_product_idx'),
+        ]
+
+
+class ProductRankingState(models.Model):
+    """
+    Single row: the decay epoch ranking scores are expressed against, and
+    the end of the last time bucket folded into them.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    epoch = models.DateTimeField()
+    processed_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'product_ranking_state'
@@ -0,0 +1,197 @@
+"""
+Products Page Views - Buffered ingestion of storefront product views
+MVVM: Service Layer
+
+The beacon endpoint only appends events to an in-process buffer and
+returns. A background thread per process writes the buffer out in one
+batch when it reaches `PRODUCT_VIEW_BUFFER_SIZE` events or every
+`PRODUCT_VIEW_FLUSH_SECONDS`, whichever comes first: `COPY ... FROM STDIN`
+on PostgreSQL, `bulk_create` elsewhere. Each batch is cleaned first, with
+one lookup per check: events whose product no longer exists are dropped,
+views by deleted users are kept as anonymous, and on a partitioned table
+events for days without a partition (there is no DEFAULT) are dropped.
+
+Views are analytics, not ledger data: a crashed process loses at most one
+unflushed buffer, and if the database is unreachable the buffer is capped
+at `PRODUCT_VIEW_MAX_PENDING` (oldest events dropped first). A batch the
+database rejects for its data is retried one row at a time, and the rows
+that still fail are dropped, so a bad row never holds the buffer back.
+"""
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, connection
+
+from apps.accounts.models import User
+from .models import Product, ProductView
+from .partitions import day_start, partition_days
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['product_id', 'user_id', 'visitor_id', 'source', 'viewed_at']
+
+
+def get_pageview_settings():
+    return {
+        'enabled': getattr(settings, 'PRODUCT_VIEWS_ENABLED', True),
+        'buffer_size': getattr(settings, 'PRODUCT_VIEW_BUFFER_SIZE', 500),
+        'flush_seconds': getattr(settings, 'PRODUCT_VIEW_FLUSH_SECONDS', 2.0),
+        'max_pending': getattr(settings, 'PRODUCT_VIEW_MAX_PENDING', 50000),
+        'max_events_per_request': getattr(settings, 'PRODUCT_VIEW_MAX_EVENTS_PER_REQUEST', 50),
+    }
+
+
+# ============ WRITING ============
+
+def _copy(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for product_id, user_id, visitor_id, source, viewed_at in rows:
+        writer.writerow([product_id, user_id if user_id is not None else '', visitor_id, source, viewed_at.isoformat()])
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        # Empty user_id is NULL; empty visitor_id / source stay ''
+        cursor.cursor.copy_expert(
+            f'COPY "{ProductView._meta.db_table}" ({", ".join(COLUMNS)}) FROM STDIN '
+            f'WITH (FORMAT csv, FORCE_NOT_NULL (visitor_id, source))',
+            buffer,
+        )
+
+
+def clean_views(rows):
+    """Drop rows that can't be written and anonymise views by deleted users (see module docstring)."""
+    products = {str(pk) for pk in Product.objects.filter(id__in={row[0] for row in rows}).values_list('id', flat=True)}
+    rows = [row for row in rows if str(row[0]) in products]
+
+    user_ids = {row[1] for row in rows if row[1] is not None}
+    users = {str(pk) for pk in User.objects.filter(id__in=user_ids).values_list('id', flat=True)} if user_ids else set()
+    rows = [row if row[1] is None or str(row[1]) in users else (row[0], None, *row[2:]) for row in rows]
+
+    days = partition_days() if rows else None
+    if days is not None:
+        kept = [row for row in rows if day_start(row[4]) in days]
+        if len(kept) < len(rows):
+            logger.warning('Dropped %s product view(s) with no partition for their day', len(rows) - len(kept))
+        rows = kept
+    return rows
+
+
+def insert_views(rows):
+    if connection.vendor == 'postgresql':
+        _copy(rows)
+    else:
+        ProductView.objects.bulk_create(
+            [ProductView(**dict(zip(COLUMNS, row))) for row in rows], batch_size=1000
+        )
+
+
+def write_views(rows):
+    """Insert (product_id, user_id, visitor_id, source, viewed_at) rows in one batch. Returns rows written."""
+    rows = clean_views(rows)
+    if rows:
+        insert_views(rows)
+    return len(rows)
+
+
+# ============ BUFFER ============
+
+class ViewBuffer:
+    """Thread-safe per-process event buffer with a background flusher."""
+
+    def __init__(self, config=None):
+        self._config = config
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._events = []
+        self._thread = None
+        self._pid = None
+        self.dropped = 0
+
+    @property
+    def config(self):
+        return self._config or get_pageview_settings()
+
+    def add(self, rows):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's thread and events aren't ours
+                self._events, self._thread, self._pid = [], None, os.getpid()
+            self._events.extend(rows)
+            self._trim()
+            full = len(self._events) >= self.config['buffer_size']
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='product-view-flusher', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _trim(self):
+        overflow = len(self._events) - self.config['max_pending']
+        if overflow > 0:
+            del self._events[:overflow]
+            self.dropped += overflow
+
+    def flush(self):
+        """Write everything buffered so far. Returns rows written."""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            return write_views(events)
+        except (DataError, IntegrityError):
+            logger.warning('Product view batch rejected; writing %s event(s) one at a time', len(events))
+            return self._write_each(events)
+        except Exception:
+            logger.exception('Product view flush failed; %s event(s) kept for retry', len(events))
+            self._requeue(events)
+            return 0
+
+    def _write_each(self, events):
+        rows = clean_views(events)
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                insert_views([row])
+            except (DataError, IntegrityError):
+                logger.warning('Dropped product view %r rejected by the database', row)
+                with self._lock:
+                    self.dropped += 1
+            except Exception:
+                logger.exception('Product view flush failed; %s event(s) kept for retry', len(rows) - i)
+                self._requeue(rows[i:])
+                break
+            else:
+                written += 1
+        return written
+
+    def _requeue(self, events):
+        with self._lock:
+            self._events[:0] = events
+            self._trim()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.config['flush_seconds'])
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return len(self._events)
+
+
+buffer = ViewBuffer()
+atexit.register(buffer.flush)
+
+
+def record(rows):
+    """Queue view rows for the next batch write."""
+    if get_pageview_settings()['enabled'] and rows:
+        buffer.add(rows)
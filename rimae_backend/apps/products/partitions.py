@@ -0,0 +1,209 @@
+"""
+Products Partitions - Daily range partitions for product view events
+MVVM: Service Layer (PostgreSQL only)
+
+`product_views` is converted once into a table partitioned by day on
+viewed_at. After that, `ensure_partitions` keeps a few days created ahead,
+and days past the retention window are detached and dropped whole instead
+of being deleted row by row. Per-user and per-product indexes are declared
+on the parent, so every partition gets them.
+
+There is no DEFAULT partition: PostgreSQL refuses DETACH ... CONCURRENTLY
+while one exists. A view can only be written once its day has a partition,
+so run `ensure_partitions` (the daily command) ahead of time. Tables
+converted with a DEFAULT partition have it folded into daily partitions on
+the next `ensure_partitions`.
+"""
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+TABLE = 'product_views'
+SEQUENCE = f'{TABLE}_id_partitioned_seq'
+_PARTITION_RE = re.compile(rf'^{TABLE}_(\d{{4}})(\d{{2}})(\d{{2}})$')
+
+
+class PartitionError(Exception):
+    pass
+
+
+def get_partition_settings():
+    return {
+        'days_ahead': getattr(settings, 'PRODUCT_VIEW_PARTITION_DAYS_AHEAD', 7),
+        'retention_days': getattr(settings, 'PRODUCT_VIEW_RETENTION_DAYS', 180),
+    }
+
+
+def day_start(value):
+    return value.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(start):
+    return f'{TABLE}_{start:%Y%m%d}'
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise PartitionError('Product view partitioning requires PostgreSQL')
+
+
+def is_partitioned():
+    _require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = %s AND n.nspname = current_schema()", [TABLE]
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions():
+    """[(name, day_start)] of attached daily partitions, oldest first."""
+    _require_postgres()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s", [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            start = datetime(*map(int, match.groups()), tzinfo=dt_timezone.utc)
+            partitions.append((name, start))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def partition_days():
+    """Start of every day with an attached partition, or None if the table isn't partitioned."""
+    if connection.vendor != 'postgresql' or not is_partitioned():
+        return None
+    return {start for _, start in list_partitions()}
+
+
+def _create_partition(cursor, start):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(start)}" PARTITION OF "{TABLE}" '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [start, start + timedelta(days=1)]
+    )
+
+
+def _retire_default_partition(cursor):
+    """Move the rows of a DEFAULT partition (older conversions) into daily partitions."""
+    default = f'{TABLE}_default'
+    cursor.execute('SELECT to_regclass(%s)', [default])
+    if cursor.fetchone()[0] is None:
+        return False
+    cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{default}"')
+    cursor.execute(f"SELECT DISTINCT date_trunc('day', viewed_at AT TIME ZONE 'UTC') FROM \"{default}\"")
+    for (day,) in cursor.fetchall():
+        _create_partition(cursor, day.replace(tzinfo=dt_timezone.utc))
+    cursor.execute(
+        f'INSERT INTO "{TABLE}" (id, product_id, user_id, visitor_id, source, viewed_at) '
+        f'SELECT id, product_id, user_id, visitor_id, source, viewed_at FROM "{default}"'
+    )
+    cursor.execute(f'DROP TABLE "{default}"')
+    return True
+
+
+def ensure_partitions(days_ahead=None, start=None):
+    """Create daily partitions from `start` (default: today, UTC) through `days_ahead`."""
+    if not is_partitioned():
+        raise PartitionError(f'{TABLE} is not partitioned yet; run with --convert first')
+
+    days_ahead = get_partition_settings()['days_ahead'] if days_ahead is None else days_ahead
+    first = day_start(start or timezone.now())
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        _retire_default_partition(cursor)
+        for offset in range(days_ahead + 1):
+            begin = first + timedelta(days=offset)
+            _create_partition(cursor, begin)
+            created.append(partition_name(begin))
+    return created
+
+
+def convert_to_partitioned(days_ahead=None, keep_legacy=False):
+    """
+    One-off: rebuild product_views as a partitioned table and copy existing
+    rows. Holds an exclusive lock on the table for the duration of the copy.
+    """
+    if is_partitioned():
+        return False
+
+    days_ahead = get_partition_settings()['days_ahead'] if days_ahead is None else days_ahead
+    legacy = f'{TABLE}_legacy'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{legacy}" INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (viewed_at)'
+        )
+        # id keeps its own sequence: identity columns on partitioned tables need PostgreSQL 17
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" AS bigint OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(%s)', [SEQUENCE])
+        # The partition key must be part of the primary key
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, viewed_at)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT {TABLE}_product_fk FOREIGN KEY (product_id) '
+            f'REFERENCES products (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ADD CONSTRAINT {TABLE}_user_fk FOREIGN KEY (user_id) '
+            f'REFERENCES users (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(
+            f'CREATE INDEX {TABLE}_user_recent_p_idx ON "{TABLE}" (user_id, viewed_at DESC) '
+            f'WHERE user_id IS NOT NULL'
+        )
+        cursor.execute(f'CREATE INDEX {TABLE}_product_p_idx ON "{TABLE}" (product_id, viewed_at)')
+
+        cursor.execute(f'SELECT MIN(viewed_at), MAX(viewed_at) FROM "{legacy}"')
+        oldest, newest = cursor.fetchone()
+        today = day_start(timezone.now())
+        retention_start = today - timedelta(days=get_partition_settings()['retention_days'])
+        current = max(day_start(oldest or today), retention_start)
+        last = max(today + timedelta(days=days_ahead), day_start(newest or today))
+        # Every retained day gets a partition; no DEFAULT (see module docstring)
+        while current <= last:
+            _create_partition(cursor, current)
+            current += timedelta(days=1)
+
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" (id, product_id, user_id, visitor_id, source, viewed_at) '
+            f'SELECT id, product_id, user_id, visitor_id, source, viewed_at FROM "{legacy}" '
+            f'WHERE viewed_at >= %s', [retention_start]
+        )
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM "{TABLE}"), 0) + 1, false)', [SEQUENCE])
+        if not keep_legacy:
+            cursor.execute(f'DROP TABLE "{legacy}"')
+    return True
+
+
+def drop_partitions(before=None):
+    """
+    Detach and drop daily partitions that end on or before `before` (default:
+    the retention window). Must run outside a transaction for CONCURRENTLY.
+    """
+    if before is None:
+        before = day_start(timezone.now()) - timedelta(days=get_partition_settings()['retention_days'])
+
+    dropped = []
+    with connection.cursor() as cursor:
+        for name, start in list_partitions():
+            if start + timedelta(days=1) > before:
+                break
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}" CONCURRENTLY')
+            cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+    return dropped
@@ -0,0 +1,155 @@
+"""
+Products Ranking - Time-decayed trending and bestseller scores
+MVVM: Service Layer
+
+Each board scores a product as a weighted sum of its activity, every event
+decaying with the board's half-life. Scores use forward decay: an event in
+the time bucket starting at `b` adds `weight * 2 ** ((b - epoch) / half_life)`
+for a fixed epoch, so old scores never need touching as time passes and
+comparing stored values is comparing decayed scores. Each run folds only
+the buckets completed since the last one into `Product.trending_score` /
+`bestselling_score`, from three grouped queries:
+
+- units sold (`OrderItem.quantity`, cancelled orders excluded)
+- wishlist adds
+- product page views (`ProductView`, products/pageviews.py)
+
+When the newest bucket gets `PRODUCT_RANKING_REBASE_HALF_LIVES` half-lives
+past the epoch, all scores are rescaled in one UPDATE and the epoch moves
+up, keeping the floats far from overflow.
+
+The scores are plain indexed columns (overall and per category, gender and
+product type), so `?ordering=trending` / `?ordering=bestselling` is an index
+scan, not an aggregation.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from apps.orders.models import OrderItem, Wishlist
+from .models import Product, ProductRankingState, ProductView
+
+# Orders whose units never counted as sold
+EXCLUDED_ORDER_STATUSES = ('cancelled',)
+
+BOARDS = {'trending': 'trending_score', 'bestselling': 'bestselling_score'}
+# ?ordering= values -> order_by(), matching the leaderboard indexes on Product
+ORDERINGS = {board: [f'-{field}', 'id'] for board, field in BOARDS.items()}
+
+
+def get_ranking_settings():
+    return {
+        'bucket': getattr(settings, 'PRODUCT_RANKING_BUCKET', 'hour'),  # Trunc kind: 'hour' or 'day'
+        'settle_seconds': getattr(settings, 'PRODUCT_RANKING_SETTLE_SECONDS', 120),
+        'backfill_days': getattr(settings, 'PRODUCT_RANKING_BACKFILL_DAYS', 90),
+        'half_life_hours': getattr(settings, 'PRODUCT_RANKING_HALF_LIFE_HOURS', {
+            'trending': 48,
+            'bestselling': 24 * 30,
+        }),
+        'weights': getattr(settings, 'PRODUCT_RANKING_WEIGHTS', {
+            'trending': {'units': 10, 'wishlist': 5, 'views': 1},
+            'bestselling': {'units': 1},
+        }),
+        'rebase_half_lives': getattr(settings, 'PRODUCT_RANKING_REBASE_HALF_LIVES', 256),
+    }
+
+
+def bucket_start(value, kind):
+    value = value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if kind == 'day' else value
+
+
+def decay_factor(bucket, epoch, half_life_hours):
+    return 2 ** ((bucket - epoch).total_seconds() / (half_life_hours * 3600))
+
+
+# ============ ACTIVITY ============
+
+def _grouped(queryset, timestamp, amount, start, end, kind):
+    return queryset.filter(**{f'{timestamp}__gte': start, f'{timestamp}__lt': end}).annotate(
+        bucket=Trunc(timestamp, kind, tzinfo=dt_timezone.utc),
+    ).values('product_id', 'bucket').annotate(amount=amount).values_list('product_id', 'bucket', 'amount')
+
+
+def activity(start, end, kind):
+    """{source: [(product_id, bucket start, amount)]} for events in [start, end)."""
+    units = OrderItem.objects.filter(product__isnull=False).exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+    return {
+        'units': _grouped(units, 'order__created_at', Sum('quantity'), start, end, kind),
+        'wishlist': _grouped(Wishlist.objects.all(), 'created_at', Count('id'), start, end, kind),
+        'views': _grouped(ProductView.objects.all(), 'viewed_at', Count('id'), start, end, kind),
+    }
+
+
+# ============ SCORES ============
+
+def _rebase(state, end, config):
+    """Move the epoch up to `end` if the fastest-decaying board needs it."""
+    shortest = min(config['half_life_hours'].values())
+    if (end - state.epoch).total_seconds() / (shortest * 3600) < config['rebase_half_lives']:
+        return False
+    Product.objects.update(**{
+        field: F(field) / decay_factor(end, state.epoch, config['half_life_hours'][board])
+        for board, field in BOARDS.items()
+    })
+    state.epoch = end
+    return True
+
+
+def update_scores(now=None):
+    """
+    Fold every bucket completed since the last run into the stored scores.
+    Safe to run concurrently (the state row is locked). Returns a summary.
+    """
+    config = get_ranking_settings()
+    kind = config['bucket']
+    end = bucket_start((now or timezone.now()) - timedelta(seconds=config['settle_seconds']), kind)
+
+    with transaction.atomic():
+        state = ProductRankingState.objects.select_for_update().filter(pk=1).first()
+        if state is None:
+            # First run: score the backfill window. The epoch sits at its start
+            start = bucket_start(end - timedelta(days=config['backfill_days']), kind)
+            state = ProductRankingState.objects.create(pk=1, epoch=start, processed_until=start)
+        start = state.processed_until
+        if start >= end:
+            return {'products': 0, 'rebased': False, 'processed_until': start}
+
+        rebased = _rebase(state, end, config)
+        deltas = defaultdict(lambda: dict.fromkeys(BOARDS, 0.0))
+        factors = {}
+        for source, rows in activity(start, end, kind).items():
+            for product_id, bucket, amount in rows:
+                for board, weights in config['weights'].items():
+                    weight = weights.get(source)
+                    if not weight:
+                        continue
+                    key = (board, bucket)
+                    if key not in factors:
+                        factors[key] = decay_factor(bucket, state.epoch, config['half_life_hours'][board])
+                    deltas[product_id][board] += weight * float(amount) * factors[key]
+
+        products = []
+        for product_id, scores in deltas.items():
+            product = Product(id=product_id)
+            for board, field in BOARDS.items():
+                setattr(product, field, F(field) + scores[board])
+            products.append(product)
+        Product.objects.bulk_update(products, list(BOARDS.values()), batch_size=500)
+
+        state.processed_until = end
+        state.save()
+    return {'products': len(products), 'rebased': rebased, 'processed_until': end}
+
+
+def rebuild_scores(now=None):
+    """Zero every score and rescore the backfill window from scratch."""
+    with transaction.atomic():
+        ProductRankingState.objects.filter(pk=1).delete()
+        Product.objects.update(**{field: 0 for field in BOARDS.values()})
+        return update_scores(now)
@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from .models import Product, ProductVariant, ProductImage
+from apps.assets.derivatives import srcset_map
+from config.fieldsets import SparseFieldsetMixin
 
 
 # -----------------------------
 # Product Variant Serializer
 # -----------------------------
-class ProductVariantSerializer(serializers.ModelSerializer):
+class ProductVariantSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ProductVariant
         fields = [
@@ -20,19 +22,72 @@ class ProductVariantSerializer(serializers.ModelSerializer):
 # -----------------------------
 # Product Image Serializer
 # -----------------------------
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+    images_srcset = serializers.SerializerMethodField()
+    sparse_requires = {'srcset': ['image', 'images'], 'images_srcset': ['image', 'images']}
+
     class Meta:
         model = ProductImage
         fields = [
             'image',
             'images',
+            'srcset',
+            'images_srcset',
         ]
 
+    def _srcsets(self, obj):
+        # Product lists pre-resolve every URL in one query (see ProductListSerializer)
+        resolved = self.context.get('srcset_map')
+        if resolved is not None:
+            return resolved
+        # Otherwise one query per image, shared by both fields
+        cached = getattr(self, '_srcset_cache', None)
+        if cached is None or cached[0] is not obj:
+            cached = (obj, srcset_map([obj.image, *obj.images], self.context.get('request')))
+            self._srcset_cache = cached
+        return cached[1]
+
+    def get_srcset(self, obj):
+        return self._srcsets(obj).get(obj.image, '') if obj.image else ''
+
+    def get_images_srcset(self, obj):
+        resolved = self._srcsets(obj)
+        return [resolved.get(url, '') for url in obj.images]
+
+
+def wants_srcsets(product_serializer):
+    """Whether a ProductSerializer will render image srcsets (not excluded by ?fields=)."""
+    images = product_serializer.fields.get('product_images') if product_serializer else None
+    return images is not None and bool({'srcset', 'images_srcset'} & set(images.child.fields))
+
+
+def prefetch_srcsets(serializer, products):
+    """Resolve the srcsets of every product's images with one query, for the whole render."""
+    urls = []
+    for product in products:
+        if product is None:
+            continue
+        for product_image in product.product_images.all():
+            urls.append(product_image.image)
+            urls.extend(product_image.images)
+    serializer.context['srcset_map'] = srcset_map(urls, serializer.context.get('request'))
+
+
+class ProductListSerializer(serializers.ListSerializer):
+    """Resolves image srcsets for the whole page with a single asset query."""
+
+    def to_representation(self, data):
+        products = data.all() if hasattr(data, 'all') else data
+        if wants_srcsets(self.child):
+            prefetch_srcsets(self, products)
+        return super().to_representation(products)
+
 
 # -----------------------------
 # Product READ Serializer
 # -----------------------------
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     variants = ProductVariantSerializer(many=True, read_only=True)
     product_images = ProductImageSerializer(many=True, read_only=True)
 
@@ -59,6 +114,7 @@ class ProductSerializer(serializers.ModelSerializer):
             'variants',
             'product_images',
         ]
+        list_serializer_class = ProductListSerializer
 
 
 # -----------------------------
@@ -130,9 +186,14 @@ class ProductWriteSerializer(serializers.ModelSerializer):
 
         # Update variants
         if variants_data is not None:
+            from .signals import publish_price_drop  # signals -> snapshots imports this module
+
+            # Variants are replaced, so price drops are matched up by size
+            previous_prices = dict(instance.variants.values_list('size', 'price'))
             instance.variants.all().delete()
             for variant in variants_data:
-                ProductVariant.objects.create(product=instance, **variant)
+                created = ProductVariant.objects.create(product=instance, **variant)
+                publish_price_drop(created, previous_prices.get(created.size))
 
         # Update images (single row logic)
         if image is not None or images is not None:
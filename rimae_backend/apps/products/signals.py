@@ -0,0 +1,92 @@
+"""
+Products signals - mark catalog snapshot shards stale when products change,
+and publish variant price drops for wishlist alerts
+"""
+from threading import local
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.events import outbox
+from apps.events.models import OutboxEvent
+from .models import Product, ProductImage, ProductVariant
+from .snapshots import get_snapshot_settings, shards_for
+
+_catalog = local()
+
+
+def publish_catalog_change(product_id, *facets):
+    """
+    Shards and products go into this thread's last catalog event while the
+    worker hasn't claimed it, so a product saved with its variants and images
+    is one event and one render. If that row was processed or rolled back, a
+    new one starts.
+    """
+    if not get_snapshot_settings()['enabled']:
+        return
+    shards = {shard for category, gender in facets for shard in shards_for(category, gender)}
+    products = {str(product_id)}
+    event = getattr(_catalog, 'event', None)
+    if event is not None:
+        payload = {
+            'shards': sorted(shards | set(event.payload['shards'])),
+            'products': sorted(products | set(event.payload['products'])),
+        }
+        if OutboxEvent.objects.filter(pk=event.pk, status='pending').update(payload=payload):
+            event.payload = payload
+            return
+    _catalog.event = outbox.publish(outbox.CATALOG_CHANGED, shards=sorted(shards), products=sorted(products))
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_facets(sender, instance, **kwargs):
+    # A product moving category or gender leaves its old shards stale too
+    instance._facets_before = None if instance._state.adding else (
+        Product.objects.filter(pk=instance.pk).values_list('category', 'gender').first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    before = getattr(instance, '_facets_before', None)
+    publish_catalog_change(instance.pk, (instance.category, instance.gender), *([before] if before else []))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    publish_catalog_change(instance.pk, (instance.category, instance.gender))
+
+
+def product_part_changed(sender, instance, **kwargs):
+    facets = Product.objects.filter(pk=instance.product_id).values_list('category', 'gender').first()
+    if facets:  # Otherwise the product itself is being deleted, which publishes
+        publish_catalog_change(instance.product_id, facets)
+
+
+for model in (ProductVariant, ProductImage):
+    post_save.connect(product_part_changed, sender=model, dispatch_uid=f'catalog_save_{model.__name__}')
+    post_delete.connect(product_part_changed, sender=model, dispatch_uid=f'catalog_delete_{model.__name__}')
+
+
+def publish_price_drop(variant, old_price):
+    if old_price is not None and variant.price < old_price:
+        outbox.publish(
+            outbox.PRICE_DROPPED,
+            product_id=variant.product_id,
+            variant_id=variant.id,
+            old_price=old_price,
+            new_price=variant.price,
+        )
+
+
+@receiver(pre_save, sender=ProductVariant)
+def remember_variant_price(sender, instance, **kwargs):
+    instance._price_before = None if instance._state.adding else (
+        ProductVariant.objects.filter(pk=instance.pk).values_list('price', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=ProductVariant)
+def variant_saved(sender, instance, created, **kwargs):
+    if not created:
+        publish_price_drop(instance, getattr(instance, '_price_before', None))
@@ -0,0 +1,288 @@
+"""
+Products Snapshots - Pre-rendered, pre-compressed catalog pages on disk
+MVVM: Service Layer
+
+The public catalog is the same for every visitor, so it is written out as
+static JSON: one shard per facet ('all', 'category/<slug>', 'gender/<gender>'),
+split into pages of the API's page size. Every page is stored under its
+content hash (`page-1.<hash>.json`) next to `.gz` and, when the brotli
+package is installed, `.br` variants, so a reverse proxy can serve them
+directly (nginx `gzip_static` / `brotli_static`) with immutable caching.
+
+`manifest.json` maps each shard to its current page files and is the only
+file that changes in place. Product changes publish an outbox event naming
+the products and the shards they were and are in. For each of those shards
+the worker reads the ordered product ids (one id-only query) and compares
+each page's ids with the previous run's, kept in `page-index.json`: only
+pages holding a changed product, or whose ids differ, are rendered again.
+Shards are ordered newest first with a stable tie-break, so a plain edit
+renders one page per shard; an added or removed product changes the count
+every page carries and re-renders the whole shard. Pages whose hash is
+unchanged are not rewritten. Files dropped from the manifest are kept for
+one more update so clients holding the previous manifest don't 404.
+"""
+import fcntl
+import gzip
+import hashlib
+import os
+from contextlib import contextmanager
+
+import orjson
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from config.renderers import ORJSONRenderer
+from .models import Product
+from .serializers import ProductSerializer
+
+try:
+    import brotli
+except ImportError:  # Optional: .br variants are skipped without it
+    brotli = None
+
+ALL_SHARD = 'all'
+MANIFEST_NAME = 'manifest.json'
+PAGE_INDEX_NAME = 'page-index.json'
+
+
+def get_snapshot_settings():
+    return {
+        'root': str(getattr(settings, 'CATALOG_SNAPSHOT_ROOT', os.path.join(settings.MEDIA_ROOT, 'catalog'))),
+        'url': getattr(settings, 'CATALOG_SNAPSHOT_URL', f'{settings.MEDIA_URL}catalog/'),
+        'page_size': getattr(settings, 'CATALOG_SNAPSHOT_PAGE_SIZE', settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)),
+        'enabled': getattr(settings, 'CATALOG_SNAPSHOTS_ENABLED', True),
+    }
+
+
+def encodings():
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+# ============ SHARDS ============
+
+def category_slug(category):
+    return slugify(category or '') or 'uncategorized'
+
+
+def shards_for(category, gender):
+    """Shards a product with these facets appears in."""
+    return [ALL_SHARD, f'category/{category_slug(category)}', f'gender/{gender}']
+
+
+def all_shards():
+    shards = {ALL_SHARD}
+    for category, gender in Product.objects.filter(is_active=True).values_list('category', 'gender').distinct():
+        shards.update(shards_for(category, gender))
+    return shards
+
+
+def shard_queryset(shard):
+    """The shard's products in page order (newest first, id breaking ties)."""
+    products = Product.objects.filter(is_active=True)
+    if shard.startswith('category/'):
+        slug = shard.split('/', 1)[1]
+        # Slugs aren't stored, so match them against the distinct category values
+        categories = [c for c in products.values_list('category', flat=True).distinct() if category_slug(c) == slug]
+        match = Q(category__in=[c for c in categories if c is not None])
+        if None in categories:
+            match |= Q(category__isnull=True)
+        products = products.filter(match)
+    elif shard.startswith('gender/'):
+        products = products.filter(gender=shard.split('/', 1)[1])
+    elif shard != ALL_SHARD:
+        return Product.objects.none()
+    return products.order_by('-created_at', 'id')
+
+
+def shard_pages(shard, page_size):
+    """The shard's product ids (as strings), split into pages."""
+    ids = [str(pk) for pk in shard_queryset(shard).values_list('id', flat=True)]
+    return [ids[start:start + page_size] for start in range(0, len(ids), page_size)]
+
+
+def render_pages(shard, pages, numbers):
+    """{page number: JSON bytes} for the given 1-based page `numbers` of a shard split by `shard_pages`."""
+    wanted = [pk for number in numbers for pk in pages[number - 1]]
+    products = Product.objects.filter(id__in=wanted).prefetch_related('variants', 'product_images').in_bulk()
+    products = {str(pk): product for pk, product in products.items()}
+    renderer = ORJSONRenderer()
+    count = sum(len(page) for page in pages)
+    rendered = {}
+    for number in numbers:
+        # A product deleted since the ids were read is left out; its own event re-renders the page
+        chunk = [products[pk] for pk in pages[number - 1] if pk in products]
+        rendered[number] = renderer.render({
+            'shard': shard,
+            'page': number,
+            'num_pages': len(pages),
+            'count': count,
+            'results': ProductSerializer(chunk, many=True).data,
+        })
+    return rendered
+
+
+def stale_pages(pages, previous, changed):
+    """
+    1-based numbers of `pages` to render, given the page ids of the last run
+    (`previous`, None if unknown) and the changed product ids (None: all).
+    """
+    if changed is None or previous is None or len(previous) != len(pages) or (
+        sum(map(len, previous)) != sum(map(len, pages))
+    ):
+        return list(range(1, len(pages) + 1))  # Every page carries count and num_pages
+    return [
+        number for number, (ids, before) in enumerate(zip(pages, previous), 1)
+        if ids != before or not changed.isdisjoint(ids)
+    ]
+
+
+# ============ FILES ============
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _write(path, data):
+    # Write-then-rename so a proxy never serves a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _variant_paths(path):
+    return [path, f'{path}.gz', f'{path}.br']
+
+
+def write_page(root, shard, number, data):
+    """Write a page and its compressed variants under its content hash. Returns the manifest entry."""
+    digest = content_hash(data)
+    path = f'{shard}/page-{number}.{digest}.json'
+    full = os.path.join(root, path)
+    if not os.path.exists(full):
+        _write(f'{full}.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(f'{full}.br', brotli.compress(data, quality=11))
+        _write(full, data)  # Last, so an existing page always has its variants
+    return {'path': path, 'hash': digest, 'bytes': len(data)}
+
+
+def _remove(root, paths):
+    for path in paths:
+        for variant in _variant_paths(os.path.join(root, path)):
+            try:
+                os.remove(variant)
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def _locked(root):
+    """Serialize snapshot writers (several outbox workers may run)."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# ============ MANIFEST ============
+
+def read_manifest(root=None):
+    root = root or get_snapshot_settings()['root']
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def _manifest_paths(manifest):
+    return {page['path'] for shard in manifest['shards'].values() for page in shard['pages']}
+
+
+def _read_page_index(root, manifest):
+    """{shard: [page ids]} from the run that wrote `manifest`, or {} if it doesn't match it."""
+    try:
+        with open(os.path.join(root, PAGE_INDEX_NAME), 'rb') as f:
+            index = orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+    return index['shards'] if manifest and index.get('version') == manifest.get('version') else {}
+
+
+def regenerate(shards=None, products=None):
+    """
+    Re-render `shards` (all shards when None, or when there is no manifest
+    yet) and publish a new manifest. With `products` (changed product ids),
+    only the pages they affect are rendered; see the module docstring.
+    Returns a summary.
+    """
+    config = get_snapshot_settings()
+    root = config['root']
+    changed = None if products is None else {str(pk) for pk in products}
+    with _locked(root):
+        manifest = read_manifest(root)
+        if manifest is None or shards is None:
+            shards = all_shards() | set(manifest['shards'] if manifest else ())
+            manifest = manifest or {'shards': {}, 'retired': []}
+        page_index = _read_page_index(root, manifest)
+        if manifest.get('page_size') != config['page_size']:
+            page_index = {}
+
+        before = _manifest_paths(manifest)
+        now = timezone.now().isoformat()
+        written = rendered_count = 0
+        for shard in sorted(set(shards)):
+            pages_ids = shard_pages(shard, config['page_size'])
+            previous = manifest['shards'].get(shard, {}).get('pages', [])
+            stale = stale_pages(pages_ids, page_index.get(shard), changed)
+            rendered = render_pages(shard, pages_ids, stale)
+            rendered_count += len(rendered)
+            known = {page['hash'] for page in previous}
+            pages = [
+                write_page(root, shard, number, rendered[number]) if number in rendered else previous[number - 1]
+                for number in range(1, len(pages_ids) + 1)
+            ]
+            written += sum(1 for page in pages if page['hash'] not in known)
+            page_index[shard] = pages_ids
+            if pages or shard == ALL_SHARD:
+                manifest['shards'][shard] = {
+                    'count': sum(map(len, pages_ids)), 'pages': pages,
+                    'generated_at': now if rendered or not previous else manifest['shards'][shard]['generated_at'],
+                }
+            else:
+                manifest['shards'].pop(shard, None)
+                page_index.pop(shard, None)
+
+        # Files dropped by the previous update go now; this update's go next time
+        current = _manifest_paths(manifest)
+        _remove(root, set(manifest.get('retired', [])) - current)
+        manifest['retired'] = sorted(before - current)
+        manifest.update({
+            'generated_at': now,
+            'base_url': config['url'],
+            'page_size': config['page_size'],
+            'encodings': encodings(),
+        })
+        # Changes only when some page's content does, so it works as an ETag
+        manifest['version'] = content_hash(orjson.dumps(
+            {shard: [page['hash'] for page in entry['pages']] for shard, entry in manifest['shards'].items()},
+            option=orjson.OPT_SORT_KEYS,
+        ))
+        _write(os.path.join(root, MANIFEST_NAME), orjson.dumps(manifest))
+        # After the manifest: an index that doesn't match it only costs a full render
+        page_index = {shard: ids for shard, ids in page_index.items() if shard in manifest['shards']}
+        _write(os.path.join(root, PAGE_INDEX_NAME),
+               orjson.dumps({'version': manifest['version'], 'shards': page_index}))
+
+    return {
+        'shards': len(shards), 'pages_rendered': rendered_count, 'pages_written': written,
+        'version': manifest['version'],
+    }
+
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet
+from .views import ProductViewSet, CatalogManifestView, ProductViewBeaconView
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='products')
 
 urlpatterns = [
+    path('catalog/manifest/', CatalogManifestView.as_view(), name='catalog-manifest'),
+    path('views/', ProductViewBeaconView.as_view(), name='product-view-beacon'),
     path('', include(router.urls)),
 ]
@@ -1,24 +1,50 @@
+import uuid
+
+import orjson
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
 from django.db import transaction
+from django.utils import timezone
 
+from config.fieldsets import SparseQuerysetMixin
+from . import pageviews, ranking, snapshots
 from .models import Product, ProductVariant
 from .serializers import ProductSerializer, ProductWriteSerializer
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductOrderingFilter(OrderingFilter):
+    """?ordering=trending / ?ordering=bestselling read the stored scores (see products/ranking.py)."""
+
+    def get_ordering(self, request, queryset, view):
+        board = request.query_params.get(self.ordering_param, '').strip()
+        if board in ranking.ORDERINGS:
+            return ranking.ORDERINGS[board]
+        return super().get_ordering(request, queryset, view)
+
+
+class ProductViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     GET /api/v1/products/products/
     GET /api/v1/products/products/{id}/
     POST /api/v1/products/products/
     PUT / PATCH /api/v1/products/products/{id}/
     DELETE /api/v1/products/products/{id}/
+
+    GETs accept ?fields=id,name,variants.price (see config.fieldsets).
+    Lists accept ?category=, ?gender=, ?product_type= and
+    ?ordering=trending|bestselling for per-facet leaderboards.
     """
 
-    queryset = Product.objects.all().prefetch_related('variants')
+    queryset = Product.objects.all().prefetch_related('variants', 'product_images')
     lookup_field = 'id'
     permission_classes = [AllowAny]
+    filter_backends = [DjangoFilterBackend, SearchFilter, ProductOrderingFilter]
+    filterset_fields = ['category', 'gender', 'product_type']
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -53,3 +79,82 @@ class ProductViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CatalogManifestView(APIView):
+    """
+    GET /api/v1/products/catalog/manifest/
+
+    Current catalog snapshot files per shard (see products/snapshots.py).
+    Clients revalidate with If-None-Match; the page files themselves are
+    content-hashed and served from disk.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        manifest = snapshots.read_manifest()
+        if manifest is None:
+            return Response({'error': 'Catalog snapshots have not been built'}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{manifest["version"]}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        manifest.pop('retired', None)
+        return Response(manifest, headers=headers)
+
+
+class ProductViewBeaconView(APIView):
+    """
+    POST /api/v1/products/views/
+
+    Storefront view tracking, fire-and-forget (navigator.sendBeacon works:
+    the body is read as JSON whatever the content type). Accepts one event
+    or {"events": [...]}, each {"product_id", "source"?, "visitor_id"?}.
+    Events are buffered and written in batches (see products/pageviews.py);
+    the response is always 204 and carries no body.
+    """
+    permission_classes = [AllowAny]
+
+    def perform_authentication(self, request):
+        # Views are attributed to a user when the token is valid, but a
+        # missing or expired one must not turn the beacon into a 401
+        pass
+
+    def _user_id(self, request):
+        try:
+            user = request.user
+        except AuthenticationFailed:
+            return None
+        return user.pk if user.is_authenticated else None
+
+    def post(self, request):
+        try:
+            payload = orjson.loads(request.body or b'{}')
+        except orjson.JSONDecodeError:
+            return Response({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+
+        events = payload.get('events', [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(events, list):
+            return Response({'error': 'Expected an event or a list of events'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_id = self._user_id(request)
+        now = timezone.now()
+        rows = []
+        for event in events[:pageviews.get_pageview_settings()['max_events_per_request']]:
+            if not isinstance(event, dict):
+                continue
+            try:
+                product_id = uuid.UUID(str(event.get('product_id')))
+            except ValueError:
+                continue
+            rows.append((
+                product_id,
+                user_id,
+                str(event.get('visitor_id') or '')[:64],
+                str(event.get('source') or '')[:30],
+                now,
+            ))
+        pageviews.record(rows)
+        return Response(status=status.HTTP_204_NO_CONTENT)
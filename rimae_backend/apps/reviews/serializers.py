@@ -1,9 +1,11 @@
 from rest_framework import serializers
+from config.fieldsets import SparseFieldsetMixin
 from .models import Review
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.first_name', read_only=True)
     product_name = serializers.CharField(source='product.name', read_only=True)
+    expandable_fields = {'product': 'apps.products.serializers.ProductSerializer'}
     
     class Meta:
         model = Review
@@ -1,25 +1,36 @@
+from django.db import transaction
 from rest_framework import generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import Review
 from .serializers import ReviewSerializer
 from apps.accounts.views import IsAdmin
+from apps.events import outbox
+from config.fieldsets import SparseQuerysetMixin
 
-class ProductReviewsView(generics.ListCreateAPIView):
+class ProductReviewsView(SparseQuerysetMixin, generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
     
     def get_queryset(self):
         return Review.objects.filter(product_id=self.kwargs['product_id'], status='approved')
     
+    @transaction.atomic
     def perform_create(self, serializer):
         from apps.orders.models import OrderItem
         is_verified = OrderItem.objects.filter(
             order__user=self.request.user, product_id=self.kwargs['product_id']
         ).exists()
-        serializer.save(user=self.request.user, product_id=self.kwargs['product_id'], is_verified_purchase=is_verified)
+        review = serializer.save(user=self.request.user, product_id=self.kwargs['product_id'], is_verified_purchase=is_verified)
+        outbox.publish(
+            outbox.REVIEW_SUBMITTED,
+            review_id=review.id,
+            product_id=review.product_id,
+            user_id=review.user_id,
+            rating=review.rating,
+        )
 
-class AdminReviewListView(generics.ListAPIView):
+class AdminReviewListView(SparseQuerysetMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAdmin]
     queryset = Review.objects.all()
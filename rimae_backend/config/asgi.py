@@ -0,0 +1,12 @@
+"""
+ASGI config for RIMAE project.
+Serve with an ASGI server (e.g. `uvicorn config.asgi:application`) so the
+notification stream and long-poll endpoints don't tie up a worker thread.
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+application = get_asgi_application()
@@ -0,0 +1,233 @@
+"""
+API Fieldsets - Sparse fields and expansion that also narrow the query
+MVVM: ViewModel Layer
+
+On GET requests, serializers using `SparseFieldsetMixin` honour:
+
+    ?fields=id,name,variants.price     only these fields (dotted for nested)
+    ?expand=product,items.product      embed these relations instead of a pk
+
+Without the parameters the output is unchanged. The same field selection
+is turned into a query plan for the view (`SparseQuerysetMixin`):
+`only()` for the columns the chosen fields read, `select_related()` for
+forward relations they follow, and `Prefetch` objects (themselves narrowed)
+for nested lists, so relations nobody asked for are never fetched.
+
+Fields the plan can't see through (method fields, properties, '*'
+sources) disable column trimming for their serializer unless it declares
+`sparse_requires = {'field': ['column', 'relation__column', ...]}`.
+"""
+from django.db.models import Prefetch, prefetch_related_objects
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+# ============ REQUEST PARAMETERS ============
+
+def _parse(value):
+    """'id,variants.price' -> {'id': {}, 'variants': {'price': {}}}"""
+    tree = {}
+    for item in value.split(','):
+        node = tree
+        for part in filter(None, item.strip().split('.')):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def requested(request, param):
+    """Parsed `?fields=` / `?expand=` tree, or None when the parameter is absent."""
+    cache = request.__dict__.setdefault('_sparse_fieldsets', {})
+    if param not in cache:
+        value = request.query_params.get(param) if hasattr(request, 'query_params') else request.GET.get(param)
+        cache[param] = _parse(value) if value else None
+    return cache[param]
+
+
+def _path(serializer):
+    """Field names from the root serializer down to this one."""
+    names = []
+    node = serializer
+    while node.parent is not None:
+        if node.field_name:
+            names.append(node.field_name)
+        node = node.parent
+    return names[::-1]
+
+
+def _subtree(tree, path):
+    node = tree
+    for name in path:
+        if not node:
+            return None
+        node = node.get(name)
+    return node or None
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin. `expandable_fields` maps a field name to the dotted
+    path of the serializer embedded on `?expand=`.
+    """
+    expandable_fields = {}
+    sparse_requires = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+
+        path = _path(self)
+        for name in _subtree(requested(request, 'expand'), path) or ():
+            if name in self.expandable_fields and name in fields:
+                fields[name] = import_string(self.expandable_fields[name])(read_only=True)
+
+        wanted = _subtree(requested(request, 'fields'), path)
+        if wanted:
+            fields = type(fields)((name, field) for name, field in fields.items() if name in wanted)
+        return fields
+
+
+# ============ QUERY PLAN ============
+
+class _Plan:
+    def __init__(self, model):
+        self.model = model
+        self.only = {model._meta.pk.name}
+        self.exact = True  # False: some field reads columns we can't see
+        self.select = set()
+        self.prefetch = {}
+        self.children = {}  # reverse relation -> [child serializer or None, extra lookups]
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _forward(field):
+    return field is not None and field.concrete and (field.many_to_one or field.one_to_one)
+
+
+def _require(plan, lookup):
+    """Record what reading `lookup` (Django lookup syntax) needs. Returns False if unknown."""
+    model, path = plan.model, []
+    parts = lookup.split('__')
+    for i, part in enumerate(parts):
+        field = _model_field(model, part)
+        if field is None:
+            return False
+        if field.one_to_many and not path:
+            entry = plan.children.setdefault(part, [None, []])
+            if parts[i + 1:]:
+                entry[1].append('__'.join(parts[i + 1:]))
+            return True
+        if i == len(parts) - 1 and field.concrete and not field.many_to_many:
+            plan.only.add('__'.join(parts))
+            return True
+        if not _forward(field):
+            return False
+        path.append(part)
+        plan.select.add('__'.join(path))
+        model = field.related_model
+    return False
+
+
+def plan_for(serializer, model, extra=()):
+    """Query plan for rendering `serializer`'s (sparse) fields over `model` rows."""
+    plan = _Plan(model)
+    requires = getattr(serializer, 'sparse_requires', {})
+
+    for field in serializer._readable_fields:
+        name = field.field_name
+        if name in requires:
+            plan.exact &= all([_require(plan, lookup) for lookup in requires[name]])
+        elif isinstance(field, serializers.ListSerializer):
+            relation = _model_field(model, field.source)
+            if relation is not None and relation.one_to_many:
+                plan.children.setdefault(field.source, [None, []])[0] = field.child
+            else:
+                plan.exact = False
+        elif isinstance(field, serializers.BaseSerializer):
+            relation = _model_field(model, field.source)
+            if _forward(relation):
+                _merge_forward(plan, field.source, plan_for(field, relation.related_model))
+            else:
+                plan.exact = False
+        elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            plan.exact = False
+        elif not _require(plan, '__'.join(field.source_attrs)):
+            plan.exact = False
+
+    for lookup in extra:
+        plan.exact &= _require(plan, lookup)
+
+    for name, (child, lookups) in plan.children.items():
+        relation = model._meta.get_field(name)
+        if child is not None:
+            child_plan = plan_for(child, relation.related_model, lookups)
+        else:
+            child_plan = _Plan(relation.related_model)
+            for lookup in lookups:
+                child_plan.exact &= _require(child_plan, lookup)
+        child_plan.only.add(relation.field.name)  # The join back to the parent
+        plan.prefetch[name] = Prefetch(name, queryset=_apply(relation.related_model._default_manager.all(), child_plan))
+    return plan
+
+
+def _merge_forward(plan, name, child):
+    plan.select.add(name)
+    plan.select.update(f'{name}__{path}' for path in child.select)
+    if child.exact:
+        plan.only.update(f'{name}__{column}' for column in child.only)
+    else:
+        plan.only.add(name)
+    for lookup, prefetch in child.prefetch.items():
+        plan.prefetch[f'{name}__{lookup}'] = Prefetch(f'{name}__{lookup}', queryset=prefetch.queryset)
+
+
+def _apply(queryset, plan, keep_existing=False):
+    if not keep_existing:
+        queryset = queryset.select_related(None).prefetch_related(None)
+    else:
+        queryset = queryset.prefetch_related(None).prefetch_related(*[
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_to', lookup) not in plan.prefetch
+        ])
+    if plan.select:
+        queryset = queryset.select_related(*plan.select)
+    if plan.exact:
+        queryset = queryset.only(*plan.only)
+    return queryset.prefetch_related(*plan.prefetch.values())
+
+
+def narrow_queryset(queryset, serializer):
+    """
+    `queryset` narrowed to what `serializer` will read. Relations the view
+    selected or prefetched are only dropped when the plan is exact.
+    """
+    plan = plan_for(serializer, queryset.model)
+    return _apply(queryset, plan, keep_existing=not plan.exact)
+
+
+def prefetch_for(instances, serializer):
+    """Prefetch what `serializer` will read onto already-loaded instances."""
+    if instances:
+        plan = plan_for(serializer, type(instances[0]))
+        prefetch_related_objects(instances, *plan.prefetch.values())
+
+
+class SparseQuerysetMixin:
+    """GenericAPIView mixin: narrow GET querysets to the requested fieldset."""
+
+    # filter_queryset rather than get_queryset: views override the latter
+    # without calling super(), and both list() and get_object() go through it
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS:
+            queryset = narrow_queryset(queryset, self.get_serializer())
+        return queryset
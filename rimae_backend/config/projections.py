@@ -0,0 +1,292 @@
+"""
+API Projections - values()-backed list rendering from existing serializers
+MVVM: ViewModel Layer
+
+A list view's output shape stays declared once, by its serializer. A
+`Projection` compiles that serializer's readable fields into one
+`.values()` query and a per-field conversion plan, so rows go from
+the database cursor to dicts without model instances or DRF's per-object
+attribute resolution:
+
+- model fields and dotted sources ('carrier.name') become lookups
+  ('carrier__name'); each value goes through the field's own
+  `to_representation`, so the JSON is identical
+- a null relation on a dotted source behaves as in DRF: the field's
+  default, null if `allow_null`, otherwise the key is left out
+- model properties and `SerializerMethodField`s are evaluated against a
+  lightweight row object exposing the model's concrete attributes, so
+  their code runs unchanged as long as it only reads columns
+- nested serializers over reverse relations ('items') are projected
+  recursively with one extra query per page; serializers embedded on a
+  foreign key (`?expand=`) are rendered from one batched fetch per page
+
+Anything else (methods that follow relations or query per object) is
+supplied through `computed`: a function of the row object, or a `Related`
+batch lookup.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import PKOnlyObject, RelatedField
+from rest_framework.response import Response
+
+from config.fieldsets import narrow_queryset
+
+SKIP = object()
+
+
+class Related:
+    """A field filled with `flat` values of a reverse relation, fetched for the whole page at once."""
+
+    def __init__(self, relation, flat):
+        self.relation = relation
+        self.flat = flat
+
+
+class _Row:
+    """
+    Attribute access over a values() row, for model properties and serializer
+    methods. Properties of the model resolve too, so they can build on each other.
+    """
+    __slots__ = ('_row', '_model')
+
+    def __init__(self, row, model):
+        self._row = row
+        self._model = model
+
+    def __getattr__(self, name):
+        try:
+            return self._row[name]
+        except KeyError:
+            prop = getattr(self._model, name, None)
+            if isinstance(prop, property):
+                return prop.fget(self)
+            raise AttributeError(name) from None
+
+
+def _converter(field, model_field):
+    """Row value -> representation, as `field.to_representation` would produce it."""
+    if isinstance(field, RelatedField):
+        return lambda value: field.to_representation(PKOnlyObject(pk=value))
+    if isinstance(field, drf_fields.FileField):
+        return lambda value: field.to_representation(model_field.attr_class(None, model_field, value))
+    # DRF's own implementations for these
+    if type(field) in (drf_fields.CharField, drf_fields.EmailField):
+        return str
+    if type(field) is drf_fields.IntegerField:
+        return int
+    return field.to_representation
+
+
+def _missing(field):
+    """What DRF emits when a dotted source crosses a null relation."""
+    if field.default is not empty:
+        return field.get_default()
+    if field.allow_null:
+        return None
+    return SKIP
+
+
+class Projection:
+    """
+    Declared on a list view; compiled against the view's serializer per
+    request. `requires` lists extra lookups the `computed` functions read.
+    """
+
+    def __init__(self, computed=None, requires=()):
+        self.computed = computed or {}
+        self.requires = list(requires)
+
+    def bind(self, serializer, queryset):
+        return BoundProjection(serializer, queryset, self.computed, self.requires)
+
+
+class BoundProjection:
+    """
+    A projection compiled against one serializer instance and queryset.
+
+    `plan` holds one step per output key, in serializer order:
+    (name, kind, source, convert, null_checks, fallback) where kind is
+    'value' (read `source` from the row), 'row' (call `source(row)`) or
+    'batch' (take the pk's entry from the page-level lookup `source`).
+    """
+
+    def __init__(self, serializer, queryset, computed=None, requires=()):
+        computed = computed or {}
+        self.model = queryset.model
+        self.pk = self.model._meta.pk.attname
+        self.lookups = {self.pk, *requires}
+        self.plan = []
+        needs_row = False
+        annotations = set(queryset.query.annotations)
+
+        for field in serializer._readable_fields:
+            name = field.field_name
+            spec = computed.get(name)
+            if isinstance(spec, Related):
+                self._step(name, 'batch', self._related(spec))
+            elif spec is not None:
+                self._step(name, 'row', self._on_row(spec))
+                needs_row = True
+            elif isinstance(field, serializers.SerializerMethodField):
+                self._step(name, 'row', self._on_row(getattr(field.parent, field.method_name)))
+                needs_row = True
+            elif isinstance(field, serializers.ListSerializer):
+                self._step(name, 'batch', self._nested(field))
+            elif isinstance(field, serializers.BaseSerializer):
+                self._step(name, 'batch', self._embedded(field))
+            else:
+                needs_row |= self._compile_field(field, annotations)
+
+        if needs_row:
+            # Properties and methods read columns by attribute name
+            self.lookups.update(f.attname for f in self.model._meta.concrete_fields)
+        self.queryset = queryset.prefetch_related(None).values(*self.lookups)
+
+    def _step(self, name, kind, source, convert=None, null_checks=None, fallback=None):
+        self.plan.append((name, kind, source, convert, null_checks, fallback))
+
+    def _on_row(self, func):
+        model = self.model
+        return lambda row: func(_Row(row, model))
+
+    def _compile_field(self, field, annotations):
+        """Add the step for a plain field. Returns True if it needs the full row."""
+        name, attrs = field.field_name, field.source_attrs
+        model, path, null_checks = self.model, [], []
+
+        for i, attr in enumerate(attrs):
+            last = i == len(attrs) - 1
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                model_field = None
+
+            if model_field is None:
+                if not last or path:
+                    break
+                if attr in annotations:
+                    self.lookups.add(attr)
+                    self._step(name, 'value', attr, _converter(field, None))
+                    return False
+                if isinstance(getattr(model, attr, None), property):
+                    convert = field.to_representation
+                    self._step(name, 'row', self._on_row(
+                        lambda obj: _none_or(convert, getattr(obj, attr))
+                    ))
+                    return True
+                break
+
+            if last:
+                lookup = model_field.attname if not path else '__'.join(path + [attr])
+                self.lookups.add(lookup)
+                self._step(name, 'value', lookup, _converter(field, model_field), null_checks, _missing(field))
+                return False
+
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                break
+            if model_field.null:
+                # A null foreign key on the way makes DRF fall back to default / null / skip
+                check = model_field.attname if not path else '__'.join(path + [attr])
+                self.lookups.add(check)
+                null_checks.append(check)
+            path.append(attr)
+            model = model_field.related_model
+
+        raise ImproperlyConfigured(
+            f'{field.parent.__class__.__name__}.{name} (source {field.source!r}) cannot be projected; '
+            'pass it in `computed`.'
+        )
+
+    def _nested(self, field):
+        relation = self.model._meta.get_field(field.source)
+        if not relation.one_to_many:
+            raise ImproperlyConfigured(f'Nested field {field.field_name!r} must be a reverse foreign key')
+        fk = relation.field.attname
+        child = BoundProjection(field.child, relation.related_model._default_manager.all())
+        rows = child.queryset.values(*child.lookups, fk)
+
+        def fetch(pks, parents):
+            page = list(rows.filter(**{f'{fk}__in': pks}))
+            grouped = defaultdict(list)
+            for row, item in zip(page, child.represent(page)):
+                grouped[row[fk]].append(item)
+            return grouped
+        return fetch
+
+    def _embedded(self, field):
+        relation = self.model._meta.get_field(field.source)
+        if not (relation.many_to_one or relation.one_to_one) or not relation.concrete:
+            raise ImproperlyConfigured(f'Embedded field {field.field_name!r} must be a foreign key')
+        fk, pk = relation.attname, self.pk
+        self.lookups.add(fk)
+        objects = narrow_queryset(relation.related_model._default_manager.all(), field)
+
+        def fetch(pks, parents):
+            # Model instances here: embedded serializers (?expand=) are full serializers
+            found = objects.in_bulk({row[fk] for row in parents if row[fk] is not None})
+            return {
+                row[pk]: field.to_representation(found[row[fk]]) if row[fk] in found else None
+                for row in parents
+            }
+        return fetch
+
+    def _related(self, spec):
+        relation = self.model._meta.get_field(spec.relation)
+        fk = relation.field.attname
+        rows = relation.related_model._default_manager.values_list(fk, spec.flat)
+
+        def fetch(pks, parents):
+            grouped = defaultdict(list)
+            for key, value in rows.filter(**{f'{fk}__in': pks}):
+                grouped[key].append(value)
+            return grouped
+        return fetch
+
+    def represent(self, rows):
+        rows = list(rows)
+        pks = [row[self.pk] for row in rows]
+        batches = {name: source(pks, rows) for name, kind, source, _, _, _ in self.plan if kind == 'batch'}
+
+        out = []
+        for row in rows:
+            item = {}
+            for name, kind, source, convert, null_checks, fallback in self.plan:
+                if kind == 'value':
+                    if null_checks and any(row[check] is None for check in null_checks):
+                        if fallback is not SKIP:
+                            item[name] = fallback
+                        continue
+                    value = row[source]
+                    item[name] = None if value is None else convert(value)
+                elif kind == 'row':
+                    item[name] = source(row)
+                else:
+                    item[name] = batches[name].get(row[self.pk], [])
+            out.append(item)
+        return out
+
+
+def _none_or(convert, value):
+    return None if value is None else convert(value)
+
+
+class ProjectedListMixin:
+    """
+    For ListAPIView subclasses: render GET lists through `projection`
+    instead of model instances and `serializer.data`. Filtering, search,
+    ordering and pagination are unchanged.
+    """
+    projection = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        bound = self.projection.bind(self.get_serializer(), queryset)
+
+        page = self.paginate_queryset(bound.queryset)
+        if page is not None:
+            return self.get_paginated_response(bound.represent(page))
+        return Response(bound.represent(bound.queryset))
@@ -0,0 +1,73 @@
+"""
+API Renderers - orjson-backed JSON output
+MVVM: View Layer
+
+`ORJSONRenderer` produces the same bytes as DRF's JSONRenderer with our
+settings (UNICODE_JSON, COMPACT_JSON, STRICT_JSON) for everything our
+serializers emit, in a fraction of the time and with far fewer allocations:
+
+- datetimes in UTC end in 'Z', like DRF's encoder (OPT_UTC_Z)
+- values orjson has no native encoding for (Decimal, numpy scalars and arrays,
+  lazy translations, QuerySets, timedelta, ...) go through DRF's own
+  JSONEncoder.default, so they are encoded exactly as before
+- U+2028/U+2029 are escaped, as DRF does for JSONP safety
+- NaN and +/-Infinity, which orjson writes as null, still fail under
+  STRICT_JSON: when the output has a null, the data is checked for
+  non-finite floats and handed to DRF's renderer, which raises
+
+Anything orjson refuses (non-string dict keys, integers over 64 bits, aware
+`time` values) and indented output (browsable API, `; indent=` in Accept)
+is handed to DRF's renderer unchanged. Known difference: floats of 1e16 and
+above or below 1e-4 spell their exponent without '+' or leading zeros
+('1e16' vs '1e+16'); the value is identical.
+"""
+import math
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+LINE_SEPARATOR = b'\xe2\x80\xa8'  # U+2028 in UTF-8
+PARAGRAPH_SEPARATOR = b'\xe2\x80\xa9'  # U+2029
+
+
+def has_non_finite(data):
+    """True if `data` holds a NaN or infinite float anywhere in its dicts, lists and tuples."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif hasattr(value, 'tolist'):  # numpy, as DRF's JSONEncoder.default converts it
+            stack.append(value.tolist())
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in JSONRenderer that serializes with orjson."""
+
+    _default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.strict and b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)  # Raises ValueError
+
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'apps.assets',
     'apps.analytics',
     'apps.notifications',
+    'apps.events',
 ]
 
 MIDDLEWARE = [
@@ -76,6 +77,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database - PostgreSQL
 DATABASES = {
@@ -89,6 +91,23 @@ DATABASES = {
     }
 }
 
+# Cache - shared across workers when REDIS_URL is set (unread counters, etc.)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # Culling past the default 300 entries would drop revoked refresh tokens
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -114,6 +133,114 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Email (order confirmations are sent by the outbox worker)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'RIMAE <no-reply@rimae.com>')
+
+# Transactional outbox (drained by `manage.py run_outbox_worker`)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE_SECONDS = 5
+OUTBOX_RETENTION_DAYS = 7
+
+# Admin notification push delivery
+NOTIFICATION_STREAM_POLL_SECONDS = 1.0
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = 15
+NOTIFICATION_STREAM_MAX_SECONDS = 300  # Client reconnects with Last-Event-ID
+NOTIFICATION_LONG_POLL_SECONDS = 25
+
+# Chunked asset uploads
+ASSET_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB per PUT
+ASSET_UPLOAD_MAX_SIZE = 2 ** 31 - 1  # Just under 2 GB: the largest Asset.file_size (IntegerField) holds
+
+# Image derivatives (encoded off the request path, exposed as srcset)
+ASSET_DERIVATIVE_WIDTHS = [200, 400, 800, 1600]
+ASSET_DERIVATIVE_FORMATS = ['webp']  # Add 'avif' if Pillow is built with AVIF support
+ASSET_DERIVATIVE_QUALITY = 80
+ASSET_DERIVATIVE_WORKERS = 2
+
+# Demand-driven reorder suggestions (inventory/replenishment.py)
+REPLENISHMENT_HISTORY_DAYS = 730
+REPLENISHMENT_SHORT_WINDOW_DAYS = 28
+REPLENISHMENT_LONG_WINDOW_DAYS = 90
+REPLENISHMENT_SERVICE_Z = 1.65  # ~95% cycle service level
+REPLENISHMENT_COVER_DAYS = 30
+REPLENISHMENT_DEFAULT_LEAD_DAYS = 14  # Suppliers with no received POs yet
+REPLENISHMENT_RECEIVING_WAREHOUSE = None  # Warehouse code for SKUs not yet shipped; None = first active
+
+# Order-to-warehouse routing (inventory/routing.py)
+ROUTING_BATCH_SIZE = 500
+ROUTING_UNKNOWN_DISTANCE_KM = 3000  # Pincodes outside every configured zone range
+
+# Shipping rate cards (inventory/rates.py)
+SHIPPING_RATE_GRAIN_GRAMS = 50  # Slab boundaries are rounded up to this
+SHIPPING_MAX_WEIGHT_GRAMS = 30000
+SHIPPING_ITEM_WEIGHT_GRAMS = {'8ml': 60, '50ml': 300, '100ml': 450}  # Packed weight per variant size
+SHIPPING_DEFAULT_ITEM_WEIGHT_GRAMS = 300
+SHIPPING_PACKAGING_WEIGHT_GRAMS = 150
+
+# Static catalog snapshots (products/snapshots.py); serve CATALOG_SNAPSHOT_ROOT from the proxy
+CATALOG_SNAPSHOTS_ENABLED = True
+CATALOG_SNAPSHOT_ROOT = MEDIA_ROOT / 'catalog'
+CATALOG_SNAPSHOT_URL = f'{MEDIA_URL}catalog/'
+CATALOG_SNAPSHOT_PAGE_SIZE = 20
+
+# Wishlist back-in-stock / price-drop alerts (notifications/alerts.py)
+WISHLIST_ALERT_BATCH_SIZE = 5000  # Recipients per outbox event; bigger fan-outs continue in follow-ups
+WISHLIST_ALERT_CHUNK_SIZE = 1000  # Rows per bulk_create
+WISHLIST_ALERT_DEDUP_HOURS = {'back_in_stock': 24, 'price_drop': 72}
+WISHLIST_ALERT_MIN_PRICE_DROP_PERCENT = 5
+
+# Product view tracking (products/pageviews.py, products/partitions.py)
+PRODUCT_VIEWS_ENABLED = True
+PRODUCT_VIEW_BUFFER_SIZE = 500            # Flush when this many events are buffered
+PRODUCT_VIEW_FLUSH_SECONDS = 2.0          # ... or after this long
+PRODUCT_VIEW_MAX_PENDING = 50000          # Per process, while the database is unreachable
+PRODUCT_VIEW_MAX_EVENTS_PER_REQUEST = 50
+PRODUCT_VIEW_PARTITION_DAYS_AHEAD = 7
+PRODUCT_VIEW_RETENTION_DAYS = 180
+
+# Trending / bestseller ranking (products/ranking.py); run update_product_rankings once per bucket
+PRODUCT_RANKING_BUCKET = 'hour'
+PRODUCT_RANKING_BACKFILL_DAYS = 90
+PRODUCT_RANKING_HALF_LIFE_HOURS = {'trending': 48, 'bestselling': 24 * 30}
+PRODUCT_RANKING_WEIGHTS = {
+    'trending': {'units': 10, 'wishlist': 5, 'views': 1},
+    'bestselling': {'units': 1},
+}
+
+# Cohort analytics (analytics/cohorts.py)
+COHORT_ANALYTICS_MAX_MONTHS = 24
+COHORT_ANALYTICS_CACHE_SECONDS = 6 * 3600  # Upper bound on staleness; order saves refresh it sooner
+
+# Per-SKU unit economics (orders/economics.py)
+UNIT_ECONOMICS_STATUSES = ['delivered']
+UNIT_ECONOMICS_CACHE_SECONDS = 300              # Periods that include today
+UNIT_ECONOMICS_CLOSED_CACHE_SECONDS = 24 * 3600
+
+# Claims-based JWT request users (accounts/authentication.py)
+ACCOUNT_ACTIVE_CACHE_SECONDS = 60  # How long a deactivation can go unnoticed without a user save
+
+# Refresh-token blacklist (accounts/tokens.py); the alias must not evict keys early
+TOKEN_BLACKLIST_CACHE = 'default'
+
+# API throttling (config/throttling.py): policies are a rate counted per 'user' (IP when
+# anonymous) or per 'ip'; scopes map a view's throttle_scope to {policy: cost}
+THROTTLE_POLICIES = {
+    'user': {'rate': '1200/min', 'by': 'user'},
+    'ip': {'rate': '600/min', 'by': 'ip'},
+    'login': {'rate': '10/min', 'by': 'ip'},
+    'cart': {'rate': '60/min', 'by': 'user'},
+    'checkout': {'rate': '10/min', 'by': 'user'},
+}
+THROTTLE_SCOPES = {
+    'default': {'user': 1},
+    'login': {'login': 1, 'ip': 20},  # Password hashing: each attempt weighs 20 on the IP budget
+    'cart': {'cart': 1, 'user': 1},
+    'checkout': {'checkout': 1, 'user': 10},
+}
+THROTTLE_CACHE = 'default'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS Configuration
@@ -129,18 +256,32 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Request user from token claims; the row loads only if a view needs it
+        'apps.accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson drop-ins for DRF's JSON renderer/parser (same output and input; see config/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'config.throttling.SlidingWindowThrottle',
+    ],
 }
 
 # JWT Settings
@@ -148,6 +289,7 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    'BLACKLIST_AFTER_ROTATION': True,  # Revoked in the shared cache (accounts/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.RotatingTokenRefreshSerializer',
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
@@ -0,0 +1,120 @@
+"""
+API Throttling - Sliding-window rate limits in the shared cache
+MVVM: ViewModel Layer
+
+Policies (`THROTTLE_POLICIES`) are a rate and what they count by: 'user'
+(the authenticated user, else the client IP) or 'ip'. A view picks its
+policies through `throttle_scope`, and `THROTTLE_SCOPES` maps each scope to
+{policy: cost}, so an expensive endpoint can spend several units of a
+shared budget per call (login attempts weigh more on the IP budget than
+page loads do). Views without a scope use the 'default' scope.
+
+Each policy counts in two fixed windows and estimates the sliding window
+as `previous * (1 - elapsed fraction) + current`, which is two integers
+per client per policy in the cache and one incr plus one get per check
+(the previous window is read for all policies in a single get_many).
+Rejected requests give their units back and respond 429 with Retry-After
+set to when the request would fit.
+"""
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY = 'throttle:{policy}:{ident}:{window}'
+
+
+def get_throttle_settings():
+    return {
+        'policies': getattr(settings, 'THROTTLE_POLICIES', {}),
+        'scopes': getattr(settings, 'THROTTLE_SCOPES', {}),
+        'cache': getattr(settings, 'THROTTLE_CACHE', 'default'),
+    }
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/min' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def wait_time(limit, window, elapsed, previous, current, cost):
+    """Seconds until `cost` more units fit, given the counts that didn't fit."""
+    # Still in this window: the previous window's weight has to shrink enough
+    if current + cost <= limit and previous:
+        fraction = 1 - (limit - cost - current) / previous
+        return max(fraction * window - elapsed, 0)
+    # Otherwise this window's count has to fade once it becomes the previous one
+    fraction = 1 - (limit - cost) / current if current else 0
+    return window - elapsed + max(fraction, 0) * window
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Settings-driven sliding-window throttle; see the module docstring."""
+
+    def __init__(self):
+        self._wait = None
+
+    def _ident(self, request, by):
+        if by == 'user':
+            try:
+                user = getattr(request, 'user', None)
+            except AuthenticationFailed:
+                # Throttles run before the view's own authentication handling;
+                # a bad token counts against the IP instead of failing here
+                user = None
+            if user is not None and user.is_authenticated:
+                return f'u{user.pk}'
+        return f'i{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        config = get_throttle_settings()
+        costs = config['scopes'].get(getattr(view, 'throttle_scope', None) or 'default')
+        if not costs:
+            return True
+
+        cache = caches[config['cache']]
+        now = time.time()
+        checks = []
+        for policy, cost in costs.items():
+            limit, window = parse_rate(config['policies'][policy]['rate'])
+            index, elapsed = divmod(now, window)
+            ident = self._ident(request, config['policies'][policy].get('by', 'user'))
+            checks.append((policy, cost, limit, window, elapsed,
+                           KEY.format(policy=policy, ident=ident, window=int(index)),
+                           KEY.format(policy=policy, ident=ident, window=int(index) - 1)))
+
+        previous = cache.get_many([check[6] for check in checks])
+        counted, waits = [], []
+        for policy, cost, limit, window, elapsed, key, previous_key in checks:
+            current = self._incr(cache, key, cost, window)
+            counted.append((key, cost))
+            before = previous.get(previous_key, 0)
+            if before * (1 - elapsed / window) + current > limit:
+                waits.append(wait_time(limit, window, elapsed, before, current - cost, cost))
+
+        if not waits:
+            return True
+        for key, cost in counted:
+            cache.decr(key, cost)
+        self._wait = math.ceil(max(waits))
+        return False
+
+    @staticmethod
+    def _incr(cache, key, cost, window):
+        try:
+            return cache.incr(key, cost)
+        except ValueError:
+            # First hit in this window; it's read as the previous one for one more window
+            if cache.add(key, cost, window * 2):
+                return cost
+            return cache.incr(key, cost)
+
+    def wait(self):
+        return self._wait